@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+import bson
+from mumundo.backend.Logger import get_logger
+from mumundo.backend.Metrics import CACHE_REQUESTS
+
+logger = get_logger("Cache")
+
+# redis://host:port/db shares entries and invalidations between workers; unset keeps
+# everything in process (fine for a single worker)
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+KEY_PREFIX = "mumundo:"
+INVALIDATION_CHANNEL = "mumundo:cache:invalidate"
+
+# Values go through BSON so ObjectIds and datetimes round-trip, and every get
+# returns a fresh copy that callers are free to mutate
+def _encode(value):
+    return bson.encode({"v": value})
+
+def _decode(payload):
+    return bson.decode(payload)["v"]
+
+# Per-process LRU with per-entry TTLs. Keys are (namespace, key) so a whole
+# namespace (e.g. every cached feed page) can be dropped at once.
+class MemoryCache:
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._listeners = {}
+
+    # callback(keys) runs on this worker whenever keys in namespace are invalidated
+    # here or on another worker; keys is None when the whole namespace is dropped
+    def on_invalidate(self, namespace, callback):
+        self._listeners.setdefault(namespace, []).append(callback)
+
+    def _local_get(self, namespace, key):
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return payload
+
+    def _local_set(self, namespace, key, payload, ttl):
+        self._entries[(namespace, key)] = (payload, time.monotonic() + ttl if ttl else None)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _local_invalidate(self, namespace, keys):
+        if keys is None:
+            for cached in [cached for cached in self._entries if cached[0] == namespace]:
+                del self._entries[cached]
+        else:
+            for key in keys:
+                self._entries.pop((namespace, key), None)
+        for callback in self._listeners.get(namespace, ()):
+            callback(keys)
+
+    async def get(self, namespace, key):
+        payload = self._local_get(namespace, str(key))
+        CACHE_REQUESTS.inc(namespace, "miss" if payload is None else "hit")
+        return None if payload is None else _decode(payload)
+
+    async def set(self, namespace, key, value, ttl=None):
+        self._local_set(namespace, str(key), _encode(value), ttl)
+
+    async def invalidate(self, namespace, *keys):
+        self._local_invalidate(namespace, [str(key) for key in keys])
+
+    async def invalidate_namespace(self, namespace):
+        self._local_invalidate(namespace, None)
+
+    # Drops this worker's local entries only
+    def clear(self):
+        self._entries.clear()
+
+    async def start(self):
+        return None
+
+    async def close(self):
+        self.clear()
+
+# Local LRU in front of a shared Redis. Writes go to both; invalidations delete from
+# Redis and are published so every worker drops its local copy. Redis being down
+# degrades to local-only caching rather than failing requests.
+class RedisCache(MemoryCache):
+
+    def __init__(self, url, max_entries=CACHE_MAX_ENTRIES, local_ttl=5.0):
+        super().__init__(max_entries)
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+        # Bounds how long a worker that missed an invalidation message serves stale data
+        self._local_ttl = local_ttl
+        self._origin = uuid.uuid4().hex
+        self._listener = None
+        self._subscribed = None
+
+    def _redis_key(self, namespace, key):
+        return f"{KEY_PREFIX}{namespace}:{key}"
+
+    def _local_ttl_for(self, ttl):
+        return min(ttl, self._local_ttl) if ttl else self._local_ttl
+
+    async def get(self, namespace, key):
+
+        key = str(key)
+        payload = self._local_get(namespace, key)
+        if payload is None:
+            try:
+                payload = await self._redis.get(self._redis_key(namespace, key))
+            except self._errors as e:
+                logger.warning("Cache read failed: %s", e, sample=0.01)
+            if payload is not None:
+                self._local_set(namespace, key, payload, self._local_ttl)
+
+        CACHE_REQUESTS.inc(namespace, "miss" if payload is None else "hit")
+        return None if payload is None else _decode(payload)
+
+    async def set(self, namespace, key, value, ttl=None):
+        key, payload = str(key), _encode(value)
+        self._local_set(namespace, key, payload, self._local_ttl_for(ttl))
+        try:
+            await self._redis.set(self._redis_key(namespace, key), payload, px=int(ttl * 1000) if ttl else None)
+        except self._errors as e:
+            logger.warning("Cache write failed: %s", e, sample=0.01)
+
+    async def _publish(self, namespace, keys):
+        message = json.dumps({"origin": self._origin, "namespace": namespace, "keys": keys})
+        await self._redis.publish(INVALIDATION_CHANNEL, message)
+
+    async def invalidate(self, namespace, *keys):
+        keys = [str(key) for key in keys]
+        self._local_invalidate(namespace, keys)
+        try:
+            if keys:
+                await self._redis.delete(*(self._redis_key(namespace, key) for key in keys))
+            await self._publish(namespace, keys)
+        except self._errors as e:
+            logger.error("Cache invalidation failed for %s: %s", namespace, e)
+
+    async def invalidate_namespace(self, namespace):
+        self._local_invalidate(namespace, None)
+        try:
+            stale = [key async for key in self._redis.scan_iter(match=f"{KEY_PREFIX}{namespace}:*")]
+            if stale:
+                await self._redis.delete(*stale)
+            await self._publish(namespace, None)
+        except self._errors as e:
+            logger.error("Cache invalidation failed for %s: %s", namespace, e)
+
+    async def _listen(self):
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self._subscribed.set()
+                async for message in pubsub.listen():
+                    data = json.loads(message["data"])
+                    if data["origin"] != self._origin:
+                        self._local_invalidate(data["namespace"], data["keys"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Anything published while disconnected is lost, so start from a clean slate
+                logger.error("Cache invalidation listener failed, retrying: %s", e)
+                self.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    # Subscribes to invalidations from other workers; returns the listener task
+    async def start(self):
+        if self._listener is None:
+            self._subscribed = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+            try:
+                await asyncio.wait_for(self._subscribed.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("Cache invalidation listener not subscribed yet, continuing")
+        return self._listener
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        await self._redis.aclose()
+        await super().close()
+
+def create_cache(url=CACHE_URL):
+    return RedisCache(url) if url else MemoryCache()
+
+# Process-wide cache used by the routers
+cache = create_cache()
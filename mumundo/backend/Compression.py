@@ -0,0 +1,133 @@
+import asyncio
+import gzip
+import os
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+# brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth the CPU or the header bytes
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+THREAD_SIZE = int(os.getenv("COMPRESSION_THREAD_BYTES", "65536"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+
+# Per-response compression favours speed; cached variants are compressed once, so they get the max
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+PRECOMPRESSED_GZIP_LEVEL = 9
+PRECOMPRESSED_BROTLI_QUALITY = 11
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Picks the best encoding the client accepts (q > 0), preferring brotli, or None
+def negotiate(accept_encoding):
+
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body, encoding, precompressed=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=PRECOMPRESSED_BROTLI_QUALITY if precompressed else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=PRECOMPRESSED_GZIP_LEVEL if precompressed else GZIP_LEVEL, mtime=0)
+
+async def compress_off_loop(body, encoding, precompressed=False):
+    if len(body) >= THREAD_SIZE:
+        return await asyncio.to_thread(compress, body, encoding, precompressed)
+    return compress(body, encoding, precompressed)
+
+def _compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+# For cached responses: the identity body plus every encoding we can serve, built once
+# when the entry is stored so cache hits never recompress
+async def encode_variants(body):
+    variants = {"identity": body}
+    if len(body) >= MIN_SIZE:
+        for encoding in available_encodings():
+            variants[encoding] = await compress_off_loop(body, encoding, precompressed=True)
+    return variants
+
+def negotiated_response(request, variants, media_type="application/json"):
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding not in variants:
+        return Response(variants["identity"], media_type=media_type, headers={"Vary": "Accept-Encoding"})
+    return Response(
+        variants[encoding],
+        media_type=media_type,
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+    )
+
+# Pure ASGI middleware that compresses complete response bodies above MIN_SIZE.
+# Responses that already carry a Content-Encoding (e.g. precompressed cache hits)
+# and streamed responses are passed through untouched.
+class CompressionMiddleware:
+
+    def __init__(self, app, minimum_size=MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether compression applies
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+
+            if ("content-encoding" in headers or message.get("more_body", False)
+                    or not _compressible(headers.get("content-type", "")) or len(body) < self.minimum_size):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = await compress_off_loop(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
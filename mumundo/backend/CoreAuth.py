@@ -1,10 +1,13 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import os
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from pydantic import BaseModel
+from beanie import PydanticObjectId
+from pydantic import BaseModel, ConfigDict
+from mumundo.backend.Cache import cache
 from mumundo.backend.Logger import get_logger
 from mumundo.backend.models.user import User
 import bcrypt
@@ -22,6 +25,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# How long an authenticated user document is reused before rereading it
+PRINCIPAL_CACHE_SECONDS = float(os.getenv("PRINCIPAL_CACHE_SECONDS", "60"))
+
 # Models/Classes
 class UserCreate(BaseModel):
     email: str
@@ -39,6 +45,19 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
 
+# What get_current_user returns: the user's fields minus the password hash, frozen and
+# without Document methods, so a cached copy can't be saved back over the real user
+class Principal(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    id: PydanticObjectId
+    email: str
+    username: str
+    profile_picture: str = "default.jpg"
+    created_at: datetime
+    bio: Optional[str] = ""
+    is_admin: bool = False
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -60,6 +79,26 @@ def hash_password(password: str) -> str:
 async def get_user_by_email(email: str):
     return await User.find_one(User.email == email)
 
+# Principal lookup for get_current_user, cached per email
+async def get_principal(email: str):
+
+    cached = await cache.get("principal", email)
+    if cached is not None:
+        return Principal.model_validate(cached)
+
+    user = await get_user_by_email(email)
+    if user is None:
+        return None
+
+    principal = Principal.model_validate(user.model_dump(exclude={"hashed_password"}))
+    if PRINCIPAL_CACHE_SECONDS > 0:
+        await cache.set("principal", email, principal.model_dump(mode="json"), ttl=PRINCIPAL_CACHE_SECONDS)
+    return principal
+
+# Call wherever the user document changes (profile, admin flag, deletion)
+async def invalidate_principal(email: str):
+    await cache.invalidate("principal", email)
+
 async def authenticate_user(email: str, password: str):
     user = await get_user_by_email(email)
     if not user:
@@ -77,7 +116,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.info("Decoding access token")
+        logger.debug("Decoding access token", sample=0.01)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -87,21 +126,41 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
 
 
-    logger.info(f"Token valid for user: {token_data.email}")
-    user = await get_user_by_email(token_data.email)
-    
+    logger.debug("Token valid for user: %s", token_data.email, sample=0.01)
+    user = await get_principal(token_data.email)
+
     if user is None:
         raise credentials_exception
 
     return user
 
+# Admin checks read is_admin from the database rather than the cached principal, so a
+# revoked admin loses access immediately. A stale cached principal is dropped as well.
+async def is_admin(principal: Principal):
+
+    current = await get_user_by_email(principal.email)
+    if current is None or not current.is_admin:
+        if principal.is_admin:
+            await invalidate_principal(principal.email)
+        return False
+
+    return True
+
+# For admin routes
+async def get_current_admin(user: Principal = Depends(get_current_user)):
+
+    if not await is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return user
+
 # POST route for creating a new user
 @auth_router.post("/register", response_model=Token)
 async def register(user_data: UserCreate):
 
     # Check if user already exists, if not create new entry
     existing_user = await get_user_by_email(user_data.email)
-    logger.info(f"Attempting to register user with email: {user_data.email}")
+    logger.info("Attempting to register user with email: %s", user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,7 +175,7 @@ async def register(user_data: UserCreate):
     )
 
     await new_user.insert()
-    logger.info(f"Successfully registered user: {user_data.email}")
+    logger.info("Successfully registered user: %s", user_data.email)
 
     # Create and return access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -131,9 +190,9 @@ async def register(user_data: UserCreate):
 async def login(form_data: UserLogin):
 
     user = await authenticate_user(form_data.email, form_data.password)
-    logger.info(f"Login attempt for email: {form_data.email}")
+    logger.info("Login attempt for email: %s", form_data.email)
     if not user:
-        logger.warning(f"Failed login attempt for email: {form_data.email}")
+        logger.warning("Failed login attempt for email: %s", form_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -144,7 +203,7 @@ async def login(form_data: UserLogin):
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
-    logger.info(f"User logged in successfully: {form_data.email}")
+    logger.info("User logged in successfully: %s", form_data.email)
     return {"access_token": access_token, "token_type": "bearer"}
 
 # GET route to fetch current user info
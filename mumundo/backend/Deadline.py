@@ -0,0 +1,28 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from mumundo.backend.Metrics import DEADLINES_EXCEEDED
+
+# Per-request time budget for the database reads of a route. Work awaited inside the
+# block is cancelled when the budget runs out and the client gets a 504 instead of a
+# connection held open behind a slow or unreachable database. Only awaited (Motor) calls
+# can be cancelled; a blocking pymongo call inside the block runs to completion first.
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "5"))
+
+# Use as `async with deadline(...)` around a block or as a decorator on a whole route.
+# seconds=None uses REQUEST_DEADLINE_SECONDS (read per request); 0 or less disables it.
+@asynccontextmanager
+async def deadline(operation, seconds=None):
+
+    seconds = REQUEST_DEADLINE_SECONDS if seconds is None else seconds
+    if seconds <= 0:
+        yield
+        return
+
+    try:
+        async with asyncio.timeout(seconds):
+            yield
+    except TimeoutError:
+        DEADLINES_EXCEEDED.inc(operation)
+        raise HTTPException(status_code=504, detail=f"Timed out after {seconds:g}s: {operation}")
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+from bson import ObjectId
+
+# Streaming exports of playlist tracks. Everything here is a plain generator over
+# pymongo cursors: StreamingResponse iterates sync generators in a worker thread,
+# so the blocking reads stay off the event loop, and at most one batch of song
+# ids and songs is held in memory at a time however large the library is.
+
+BATCH_SIZE = 500
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+COLUMNS = ("playlist_id", "playlist", "position", "song_id", "title", "artist", "album", "length", "spotify_id")
+
+SONG_FIELDS = {"Title": 1, "Artist": 1, "Album": 1, "Length": 1, "spotify_id": 1}
+
+# Rows for one playlist in track order. Song ids are read in $slice windows rather
+# than loading the whole Songs array, and each window is joined with one $in.
+def playlist_rows(db, playlist_id, title, batch_size=None):
+
+    batch_size = batch_size or BATCH_SIZE
+    position = 0
+    while True:
+        window = db.playlist.find_one(
+            {"_id": ObjectId(playlist_id)},
+            {"_id": 1, "Songs": {"$slice": [position, batch_size]}}
+        )
+        song_ids = [ObjectId(song_id) for song_id in (window or {}).get("Songs", [])]
+        if not song_ids:
+            return
+
+        songs = {song["_id"]: song for song in db.song.find({"_id": {"$in": list(set(song_ids))}}, SONG_FIELDS)}
+
+        rows = []
+        for offset, song_id in enumerate(song_ids):
+            song = songs.get(song_id, {})
+            rows.append({
+                "playlist_id": str(playlist_id),
+                "playlist": title,
+                "position": position + offset,
+                "song_id": str(song_id),
+                "title": song.get("Title"),
+                "artist": song.get("Artist"),
+                "album": song.get("Album"),
+                "length": song.get("Length"),
+                "spotify_id": song.get("spotify_id"),
+            })
+        yield rows
+
+        if len(song_ids) < batch_size:
+            return
+        position += batch_size
+
+# Every playlist the user owns, in creation order; the cursor never loads Songs
+def library_rows(db, user_id, batch_size=None):
+    for playlist in db.playlist.find({"User": str(user_id)}, {"Title": 1}).sort("_id", 1):
+        yield from playlist_rows(db, playlist["_id"], playlist.get("Title", ""), batch_size)
+
+# Serializers turning batches of rows into one response chunk per batch
+def ndjson_chunks(batches):
+    for rows in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def serialize(batches, export_format):
+    return csv_chunks(batches) if export_format == "csv" else ndjson_chunks(batches)
+
+def attachment_headers(name, export_format):
+    safe_name = "".join(c for c in name if c.isalnum() or c in " -_").strip() or "export"
+    return {"Content-Disposition": f'attachment; filename="{safe_name}.{export_format}"'}
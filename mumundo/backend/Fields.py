@@ -0,0 +1,39 @@
+from fastapi import HTTPException
+
+# Sparse fieldsets: ?fields=id,name,imageUrl picks the response fields a client needs.
+# Each endpoint maps its response fields to the document fields they are built from, so
+# one selection becomes both the Mongo projection and the trimmed response.
+
+# Returns the requested response fields, or None for "everything" when fields is absent
+def parse(fields, field_map):
+    if fields is None or not fields.strip():
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(field_map)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(field_map)}"
+        )
+    return requested
+
+def wanted(requested, name):
+    return requested is None or name in requested
+
+# Mongo projection covering the requested fields; None (the whole document) when nothing was selected
+def projection(requested, field_map):
+    if requested is None:
+        return None
+    fields = {"_id": 1}
+    for name in requested:
+        fields.update({source: 1 for source in field_map[name]})
+    return fields
+
+def trim(document, requested):
+    if requested is None:
+        return document
+    return {name: value for name, value in document.items() if name in requested}
+
+# Stable text form of a selection, for cache keys and ETags
+def key(requested):
+    return None if requested is None else ",".join(sorted(requested))
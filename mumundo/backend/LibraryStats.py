@@ -0,0 +1,137 @@
+from collections import Counter
+from datetime import datetime
+from bson import ObjectId
+
+# Per-user library totals in SpotifyDB.user_stats, keyed by the user id string:
+#   {"_id": user_id, "playlist_count", "track_count", "total_time", "artists": {name: tracks}}
+# Writes are $inc deltas so importing or deleting a playlist never rereads the library;
+# rebuild_user/rebuild_all recompute from the playlists to repair drift.
+
+TOP_ARTISTS = 10
+
+SONG_FIELDS = {"Artist": 1, "Artists": 1, "Length": 1}
+
+# Artist names become field names under "artists", which can't contain "." or start with "$"
+def _artist_key(name):
+    return name.replace(".", "．").replace("$", "＄")
+
+def _artist_name(key):
+    return key.replace("．", ".").replace("＄", "$")
+
+# Songs keep their artist names as a list in "Artists". Songs stored before that only have
+# the "Artist" display string, which is split on the ", " it was joined with (and so
+# splits names like "Tyler, The Creator")
+def _song_artists(song):
+    if song.get("Artists"):
+        return song["Artists"]
+    return [name for name in (song.get("Artist") or "").split(", ") if name]
+
+# Totals for one playlist's songs; a song listed twice counts twice, like the playlist does
+def playlist_totals(songs):
+    artists = Counter()
+    total_time = 0
+    for song in songs:
+        total_time += song.get("Length") or 0
+        artists.update(_song_artists(song))
+    return len(songs), total_time, artists
+
+# Resolves a playlist's Songs ids to song documents in playlist order with one $in
+def load_songs(db, song_ids):
+    song_ids = [ObjectId(song_id) for song_id in song_ids]
+    if not song_ids:
+        return []
+    found = {song["_id"]: song for song in db.song.find({"_id": {"$in": list(set(song_ids))}}, SONG_FIELDS)}
+    return [found[song_id] for song_id in song_ids if song_id in found]
+
+# sign=1 when a playlist is added to the user's library, -1 when it is removed
+def apply_playlist(db, user_id, songs, sign=1):
+    apply_playlists(db, user_id, [songs], sign)
+
+# Same for several playlists of one user (e.g. a bulk import), in a single $inc
+def apply_playlists(db, user_id, playlists_songs, sign=1):
+
+    track_count = total_time = 0
+    artists = Counter()
+    for songs in playlists_songs:
+        count, seconds, playlist_artists = playlist_totals(songs)
+        track_count += count
+        total_time += seconds
+        artists.update(playlist_artists)
+
+    increments = {
+        "playlist_count": sign * len(playlists_songs),
+        "track_count": sign * track_count,
+        "total_time": sign * total_time,
+    }
+    for name, count in artists.items():
+        increments[f"artists.{_artist_key(name)}"] = sign * count
+
+    db.user_stats.update_one(
+        {"_id": str(user_id)},
+        {"$inc": increments, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    if sign < 0 and artists:
+        prune_artists(db, user_id)
+
+# Drops artists whose count reached 0 (or below, after drift) so a user's document
+# doesn't keep every artist they ever imported. One pipeline update, so an increment
+# landing in between is never lost.
+def prune_artists(db, user_id):
+    db.user_stats.update_one(
+        {"_id": str(user_id)},
+        [{"$set": {"artists": {"$arrayToObject": {"$filter": {
+            "input": {"$objectToArray": {"$ifNull": ["$artists", {}]}},
+            "cond": {"$gt": ["$$this.v", 0]}
+        }}}}}]
+    )
+
+def format_stats(stats):
+    stats = stats or {}
+    artists = sorted(
+        ((_artist_name(key), count) for key, count in (stats.get("artists") or {}).items() if count > 0),
+        key=lambda item: (-item[1], item[0])
+    )
+    return {
+        "playlist_count": stats.get("playlist_count", 0),
+        "track_count": stats.get("track_count", 0),
+        "total_time": stats.get("total_time", 0),
+        "top_artists": [{"name": name, "tracks": count} for name, count in artists[:TOP_ARTISTS]],
+    }
+
+# Recompute one user's document from their playlists
+def rebuild_user(db, user_id):
+
+    user_id = str(user_id)
+    playlists = list(db.playlist.find({"User": user_id}, {"Songs": 1}))
+
+    songs_by_id = {}
+    all_ids = {ObjectId(song_id) for playlist in playlists for song_id in playlist.get("Songs", [])}
+    if all_ids:
+        songs_by_id = {song["_id"]: song for song in db.song.find({"_id": {"$in": list(all_ids)}}, SONG_FIELDS)}
+
+    track_count = total_time = 0
+    artists = Counter()
+    for playlist in playlists:
+        songs = [songs_by_id[ObjectId(song_id)] for song_id in playlist.get("Songs", []) if ObjectId(song_id) in songs_by_id]
+        count, seconds, playlist_artists = playlist_totals(songs)
+        track_count += count
+        total_time += seconds
+        artists.update(playlist_artists)
+
+    stats = {
+        "playlist_count": len(playlists),
+        "track_count": track_count,
+        "total_time": total_time,
+        "artists": {_artist_key(name): count for name, count in artists.items()},
+        "updated_at": datetime.utcnow(),
+    }
+    db.user_stats.replace_one({"_id": user_id}, stats, upsert=True)
+    return stats
+
+# Rebuild every user that owns a playlist or already has a stats document
+def rebuild_all(db):
+    user_ids = set(db.playlist.distinct("User")) | set(db.user_stats.distinct("_id"))
+    for user_id in sorted(user_ids):
+        rebuild_user(db, user_id)
+    return len(user_ids)
@@ -1,70 +1,109 @@
-import asyncio
+import json
 import logging
-from mumundo.backend.MongoHandler import init_db
+import queue
+import random
+from datetime import datetime
+from logging.handlers import QueueHandler
+from mumundo.backend.Metrics import LOG_RECORDS_DROPPED
 
-logs_collection = None
-client = None
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
 
-async def log_to_db(level, logger_name, message):
+# Thin wrapper over a stdlib logger. The level check runs before any other work,
+# messages use lazy %-style args (interpolated on the queue listener thread),
+# sample=<rate> keeps that fraction of a high-frequency message, and extra
+# keyword arguments become structured fields on the JSON record
+class MongoDBLogger:
 
-    global client
-    client = await init_db()
+    def __init__(self, name):
+        self.name = name
+        self.std_logger = logging.getLogger(name)
 
-    if client is not None:
-        try:
+    def _log(self, level, message, args, sample, fields):
+        if not self.std_logger.isEnabledFor(level):
+            return
+        if sample is not None and random.random() >= sample:
+            return
+        if sample is not None:
+            fields["sample_rate"] = sample
+        # stacklevel points module/line at the caller rather than this wrapper
+        self.std_logger.log(level, message, *args, extra={"fields": fields} if fields else None, stacklevel=3)
 
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+    def debug(self, message, *args, sample=None, **fields):
+        self._log(logging.DEBUG, message, args, sample, fields)
 
-            log_entry = {
-                "timestamp": timestamp,
-                "level": level,
-                "logger": logger_name,
-                "message": message
-            }
+    def info(self, message, *args, sample=None, **fields):
+        self._log(logging.INFO, message, args, sample, fields)
 
-            logs_db = client["logs"]
-            await logs_db.application_logs.insert_one(log_entry)
-        except Exception as e:
-            print(f"MongoDB logging error: {e}")
+    def warning(self, message, *args, sample=None, **fields):
+        self._log(logging.WARNING, message, args, sample, fields)
 
-class MongoDBLogger:
+    def error(self, message, *args, sample=None, **fields):
+        self._log(logging.ERROR, message, args, sample, fields)
 
-    def __init__(self, name):
-        self.name = name
-        self.std_logger = logging.getLogger(name)
+_loggers = {}
 
-    def info(self, message):
-        self.std_logger.info(message)
-        try:
-            loop = asyncio.get_event_loop()
-            loop.create_task(log_to_db("INFO", self.name, message))
-        except RuntimeError:
-            pass
+def get_logger(name):
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = MongoDBLogger(name)
+    return logger
 
-    def error(self, message):
-        self.std_logger.error(message)
-        try:
-            loop = asyncio.get_event_loop()
-            loop.create_task(log_to_db("ERROR", self.name, message))
-        except RuntimeError:
-            pass
+def _record_fields(record):
+    fields = {
+        "timestamp": datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S,%f")[:-3],
+        "level": record.levelname,
+        "logger": record.name,
+        "message": record.getMessage(),
+        "module": record.module,
+        "line": record.lineno,
+    }
+    fields.update(getattr(record, "fields", None) or {})
+    for key, value in vars(record).items():
+        if key not in _RESERVED and key != "fields":
+            fields[key] = value
+    if record.exc_text:
+        fields["exception"] = record.exc_text
+    return fields
 
-    def warning(self, message):
-        self.std_logger.warning(message)
-        try:
-            loop = asyncio.get_event_loop()
-            loop.create_task(log_to_db("WARNING", self.name, message))
-        except RuntimeError:
-            pass
+# One JSON object per line
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        return json.dumps(_record_fields(record), default=str)
+
+# Writes records to the logs database through its own listener-free client; only ever
+# runs on the queue listener thread
+class MongoLogHandler(logging.Handler):
 
-    def debug(self, message):
-        self.std_logger.debug(message)
+    def emit(self, record):
         try:
-            loop = asyncio.get_event_loop()
-            loop.create_task(log_to_db("DEBUG", self.name, message))
-        except RuntimeError:
-            pass
+            from mumundo.backend.MongoHandler import get_log_client
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            get_log_client()["logs"].application_logs.insert_one(_record_fields(record))
+        except Exception:
+            self.handleError(record)
 
-def get_logger(name):
-    return MongoDBLogger(name)
\ No newline at end of file
+# QueueHandler that defers formatting to the listener thread. The stdlib version
+# formats every message on the caller's thread before enqueueing it.
+class LazyQueueHandler(QueueHandler):
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Tracebacks hold frames, so render them now rather than on another thread
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+# For a bounded queue: a full queue drops the record (counted in LOG_RECORDS_DROPPED)
+# instead of blocking the caller or reporting an error per record
+class DroppingQueueHandler(LazyQueueHandler):
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
@@ -0,0 +1,221 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every metric created below registers itself here for the /metrics endpoint
+REGISTRY = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+# Minimal Prometheus-style metrics; label values are passed positionally so the
+# hot path is a tuple lookup and an add under an uncontended lock
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount=1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount=1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = float(value)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (non-cumulative, last slot is +Inf), sum, count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self):
+        with self._lock:
+            return {labels: ([*state[0]], state[1], state[2]) for labels, state in self._values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labels, (counts, total, count) in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Application metrics
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ("method",)
+)
+SPOTIFY_LATENCY = Histogram(
+    "spotify_request_duration_seconds", "Outbound Spotify API call latency", ("operation", "outcome")
+)
+MONGO_LATENCY = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "outcome")
+)
+SPOTIFY_THROTTLED_SECONDS = Counter(
+    "spotify_throttled_seconds_total", "Time Spotify calls spent queued by the rate limiter", ("priority",)
+)
+SPOTIFY_RETRIES = Counter(
+    "spotify_retries_total", "Spotify calls retried, by the status that caused the retry", ("status",)
+)
+SPOTIFY_TIMEOUTS = Counter(
+    "spotify_timeouts_total", "Spotify calls that overran their deadline, by where the time ran out (queue, upstream, backoff)",
+    ("operation", "stage")
+)
+SPOTIFY_CIRCUIT_OPEN = Gauge(
+    "spotify_circuit_open", "1 while the Spotify circuit breaker is open and calls fail fast"
+)
+SPOTIFY_CIRCUIT_REJECTED = Counter(
+    "spotify_circuit_rejected_total", "Spotify calls rejected without being sent because the circuit was open"
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "In-process cache lookups by cache and result", ("cache", "result")
+)
+ORPHANS_REMOVED = Counter(
+    "orphans_removed_total", "Documents or links removed by the orphan sweeper because their playlist is gone", ("collection",)
+)
+UPLOAD_BYTES_RECLAIMED = Counter(
+    "upload_bytes_reclaimed_total", "Bytes freed by deleting unreferenced profile picture uploads"
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Log records not shipped to MongoDB because its queue was full"
+)
+DEADLINES_EXCEEDED = Counter(
+    "request_deadlines_exceeded_total", "Requests answered 504 because their database work overran the deadline", ("operation",)
+)
+
+# ASGI middleware recording latency, status and in-flight requests per route
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec(method)
+
+            # Label by route template so path parameters don't explode cardinality
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            HTTP_LATENCY.observe(elapsed, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+
+# Context manager timing a single outbound Spotify call
+@contextmanager
+def track_spotify(operation):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        SPOTIFY_LATENCY.observe(time.perf_counter() - start, operation, outcome)
+
+# pymongo/Motor command listener, pass via MongoClient(event_listeners=[...])
+class MongoCommandMetrics(monitoring.CommandListener):
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1_000_000, event.command_name, "ok")
+
+    def failed(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1_000_000, event.command_name, "error")
@@ -0,0 +1,113 @@
+import asyncio
+import os
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from mumundo.backend.Logger import get_logger
+from mumundo.backend.Metrics import ORPHANS_REMOVED
+from mumundo.backend.jobs.batching import BATCH_SIZE, Throttle, iter_batches
+
+logger = get_logger("OrphanGC")
+
+# Deleting a playlist leaves its playlist_ratings and playlist_reports behind, and
+# users.playlists can keep ids of playlists that are gone. The sweeper finds these
+# orphans set-wise (distinct referenced ids, checked against playlist with one $in per
+# batch) and removes them in throttled batches.
+GC_INTERVAL_SECONDS = float(os.getenv("ORPHAN_GC_SECONDS", "86400"))
+
+# Collections whose documents point at a playlist through a playlist_id string
+CHILD_COLLECTIONS = ("playlist_ratings", "playlist_reports")
+
+# playlist_ratings is already indexed on playlist_id (see RatingCounts)
+def ensure_indexes(db):
+    db.playlist_reports.create_index("playlist_id")
+
+def _object_id(value):
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+# The subset of ids (as stored) that don't resolve to an existing playlist
+def missing_playlists(db, playlist_ids):
+    object_ids = {playlist_id: _object_id(playlist_id) for playlist_id in playlist_ids}
+    found = {playlist["_id"] for playlist in db.playlist.find(
+        {"_id": {"$in": [oid for oid in object_ids.values() if oid is not None]}}, {"_id": 1}
+    )}
+    return [playlist_id for playlist_id, oid in object_ids.items() if oid not in found]
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Deletes child documents of missing playlists. The distinct playlist_ids come from one
+# streamed $group, so each referenced playlist is checked once however many children it has.
+def sweep_children(db, collection, batch_size, throttle, delete=True):
+
+    referenced = (row["_id"] for row in db[collection].aggregate(
+        [{"$group": {"_id": "$playlist_id"}}], allowDiskUse=True
+    ))
+    removed = 0
+    for playlist_ids in _chunks(referenced, batch_size):
+        throttle.wait(1)
+        missing = missing_playlists(db, playlist_ids)
+        if not missing:
+            continue
+        if delete:
+            deleted = db[collection].delete_many({"playlist_id": {"$in": missing}}).deleted_count
+        else:
+            deleted = db[collection].count_documents({"playlist_id": {"$in": missing}})
+        # Charged after the fact: the batch's deletes delay the next batch
+        throttle.wait(deleted)
+        removed += deleted
+    return removed
+
+# Pulls ids of missing playlists from users.playlists, one $pull per affected user
+def sweep_user_links(db, batch_size, throttle, delete=True):
+
+    removed = 0
+    for users in iter_batches(db.users, {"playlists.0": {"$exists": True}}, {"playlists": 1}, batch_size):
+        throttle.wait(1)
+        missing = set(missing_playlists(db, {playlist_id for user in users for playlist_id in user["playlists"]}))
+
+        ops = []
+        for user in users:
+            stale = [playlist_id for playlist_id in set(user["playlists"]) if playlist_id in missing]
+            if stale:
+                ops.append(UpdateOne({"_id": user["_id"]}, {"$pull": {"playlists": {"$in": stale}}}))
+                removed += sum(1 for playlist_id in user["playlists"] if playlist_id in missing)
+        if ops and delete:
+            throttle.wait(len(ops))
+            db.users.bulk_write(ops, ordered=False)
+    return removed
+
+# One full sweep; returns how many orphans each collection had (and lost, unless dry_run)
+def sweep(db, batch_size=None, throttle=None, dry_run=False):
+
+    batch_size = batch_size or BATCH_SIZE
+    throttle = throttle or Throttle()
+    summary = {}
+    for collection in CHILD_COLLECTIONS:
+        summary[collection] = sweep_children(db, collection, batch_size, throttle, delete=not dry_run)
+    summary["users.playlists"] = sweep_user_links(db, batch_size, throttle, delete=not dry_run)
+
+    if not dry_run:
+        for collection, removed in summary.items():
+            ORPHANS_REMOVED.inc(collection, amount=removed)
+    summary["dry_run"] = dry_run
+    return summary
+
+async def run_periodic_sweep(db, interval=GC_INTERVAL_SECONDS):
+    while True:
+        try:
+            summary = await asyncio.to_thread(sweep, db)
+            logger.info("Orphan sweep finished: %s", summary)
+        except Exception as e:
+            logger.error("Orphan sweep failed: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from pymongo import UpdateMany
+from mumundo.backend import PlaylistVersion
+from mumundo.backend.Logger import get_logger
+
+logger = get_logger("OwnerSnapshot")
+
+# Playlists embed their owner's display fields as Owner: {"username", "profile_picture"}
+# so listing and detail reads don't join back to MainDB.users. update_profile fans
+# changes out; the checker repairs anything a failed fan-out left behind.
+CHECK_INTERVAL_SECONDS = float(os.getenv("OWNER_SNAPSHOT_CHECK_SECONDS", "3600"))
+
+def owner_snapshot(user):
+    if isinstance(user, dict):
+        return {"username": user.get("username", ""), "profile_picture": user.get("profile_picture") or "default.jpg"}
+    return {"username": user.username, "profile_picture": user.profile_picture or "default.jpg"}
+
+# Response shape used by the playlist routes ({"id", "username", "profilePicture"})
+def owner_info(playlist):
+    owner = playlist.get("Owner")
+    if not owner:
+        return {"id": str(playlist.get("User")), "username": "Unknown User", "profilePicture": "default.jpg"}
+    return {
+        "id": str(playlist.get("User")),
+        "username": owner.get("username", "Unknown User"),
+        "profilePicture": owner.get("profile_picture") or "default.jpg",
+    }
+
+# One update_many over the user's playlists; run as a background task after a profile change
+def fan_out(db, user_id, snapshot):
+    result = db.playlist.update_many({"User": str(user_id)}, PlaylistVersion.bump({"$set": {"Owner": snapshot}}))
+    logger.debug("Owner snapshot fan-out for %s updated %d playlists", user_id, result.modified_count)
+    return result.modified_count
+
+def _stale_filter(user_id, snapshot):
+    return {
+        "User": user_id,
+        "$or": [
+            {"Owner.username": {"$ne": snapshot["username"]}},
+            {"Owner.profile_picture": {"$ne": snapshot["profile_picture"]}},
+        ],
+    }
+
+# Walks users in _id order and rewrites any playlist whose snapshot differs from the
+# user document (or is missing). One unordered bulk_write of filtered UpdateMany per batch,
+# so playlists that are already correct are matched but never written.
+def check_consistency(db, users_db, batch_size=500, repair=True):
+
+    scanned = stale = 0
+    last_id = None
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        users = list(users_db.users.find(query, {"username": 1, "profile_picture": 1}).sort("_id", 1).limit(batch_size))
+        if not users:
+            return {"users_scanned": scanned, "playlists_stale": stale, "repaired": repair}
+
+        filters = [(_stale_filter(str(user["_id"]), owner_snapshot(user)), owner_snapshot(user)) for user in users]
+
+        if repair:
+            result = db.playlist.bulk_write(
+                [UpdateMany(stale_filter, PlaylistVersion.bump({"$set": {"Owner": snapshot}})) for stale_filter, snapshot in filters],
+                ordered=False
+            )
+            stale += result.modified_count
+        else:
+            stale += db.playlist.count_documents({"$or": [stale_filter for stale_filter, _ in filters]})
+
+        scanned += len(users)
+        last_id = users[-1]["_id"]
+
+async def run_periodic_check(db, users_db, interval=CHECK_INTERVAL_SECONDS):
+    while True:
+        try:
+            result = await asyncio.to_thread(check_consistency, db, users_db)
+            logger.info("Owner snapshot check finished: %s", result)
+        except Exception as e:
+            logger.error("Owner snapshot check failed: %s", e)
+        await asyncio.sleep(interval)
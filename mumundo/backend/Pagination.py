@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException
+
+# Keyset (cursor) pagination over one sort field with _id as the tie-breaker. A page
+# query continues strictly after the last row of the previous page, so every page is
+# an index range scan no matter how deep the client has paged, unlike skip().
+# Cursors are opaque to clients: urlsafe base64 of {"sort", "value", "id"}.
+
+HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort, value, last_id):
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    payload = json.dumps({"sort": sort, "value": value, "id": str(last_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, sort):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value = payload["value"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+        if payload["sort"] != sort:
+            raise ValueError("cursor belongs to another sort order")
+        return value, ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Filter for rows after (value, last_id). Missing values sort lowest in MongoDB, so they
+# come last in a descending walk and first in an ascending one.
+def after(field, value, last_id, descending):
+    op = "$lt" if descending else "$gt"
+    if value is None:
+        if descending:
+            return {field: None, "_id": {"$lt": last_id}}
+        return {"$or": [{field: None, "_id": {"$gt": last_id}}, {field: {"$ne": None}}]}
+
+    clauses = [{field: {op: value}}, {field: value, "_id": {op: last_id}}]
+    if descending:
+        clauses.append({field: None})
+    return {"$or": clauses}
+
+def sort_spec(field, descending):
+    direction = -1 if descending else 1
+    return [(field, direction), ("_id", direction)]
@@ -0,0 +1,26 @@
+from bson import ObjectId
+from mumundo.backend import LibraryStats, Similarity
+from mumundo.backend.Cache import cache
+
+# Playlist deletion shared by the owner's delete route and the admin delete of a reported
+# playlist. Besides the playlist itself this removes what was derived from it: its
+# similarity index entry, its id in the owner's playlists and its share of the owner's
+# library stats, and drops cached feed pages when it was public. Ratings and reports
+# are left to OrphanGC.
+
+# playlist is the stored document (with User, Songs and IsPublic). Returns False when
+# it was already gone, so a concurrent delete doesn't take it off the stats twice.
+async def delete_playlist(db, playlist):
+
+    if not db.playlist.delete_one({"_id": playlist["_id"]}).deleted_count:
+        return False
+
+    Similarity.remove_playlist(db, playlist["_id"])
+    if playlist.get("IsPublic"):
+        await cache.invalidate_namespace("feed")
+    db.users.update_one(
+        {"_id": ObjectId(playlist["User"])},
+        {"$pull": {"playlists": str(playlist["_id"])}}
+    )
+    LibraryStats.apply_playlist(db, playlist["User"], LibraryStats.load_songs(db, playlist.get("Songs", [])), sign=-1)
+    return True
@@ -0,0 +1,38 @@
+import hashlib
+from bson import ObjectId
+
+# Playlists carry a "version" counter that every write changing what the detail or
+# ratings routes return increments in the same update. Those routes send it as an ETag
+# and answer a matching If-None-Match with 304 after reading only this one field.
+# Song documents are not covered: catalogue edits (e.g. the ingest job) don't change
+# a playlist's version.
+
+# Adds the version increment to a pymongo update document
+def bump(update):
+    return {**update, "$inc": {**update.get("$inc", {}), "version": 1}}
+
+# Weak validator: the JSON is regenerated on every full read, only its content is stable.
+# variant separates representations that differ per caller (e.g. the caller's own rating).
+def etag(playlist_id, version, variant=None):
+    tag = f"{playlist_id}-{version or 0}"
+    if variant is not None:
+        tag += "-" + hashlib.sha1(str(variant).encode()).hexdigest()[:12]
+    return f'W/"{tag}"'
+
+def matches(request, tag):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == tag.removeprefix("W/") for candidate in candidates)
+
+# The playlist's current version, or None when it doesn't exist (db is a Motor database)
+async def load_version(db, playlist_id):
+    if not ObjectId.is_valid(playlist_id):
+        return None
+    playlist = await db.playlist.find_one({"_id": ObjectId(playlist_id)}, {"version": 1})
+    return None if playlist is None else playlist.get("version", 0)
+
+# Headers for both the full response and the 304; no-cache makes clients revalidate every time
+def headers(tag):
+    return {"ETag": tag, "Cache-Control": "private, no-cache"}
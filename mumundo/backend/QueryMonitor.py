@@ -0,0 +1,119 @@
+import contextvars
+import logging
+import os
+from contextlib import contextmanager
+from pymongo import monitoring
+
+# Plain stdlib logger: the Mongo-backed logger would itself issue commands
+logger = logging.getLogger(__name__)
+
+# Debug mode adds X-DB-Query-Count / X-DB-Time-Ms headers to every response
+DEBUG = os.getenv("MUMUNDO_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Per-request query budget, slow command threshold and whether breaches raise
+QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "50"))
+SLOW_COMMAND_MS = float(os.getenv("DB_SLOW_COMMAND_MS", "200"))
+STRICT = os.getenv("DB_QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+
+# Route template -> budget, for routes that legitimately need more (or fewer) queries
+ROUTE_BUDGETS = {}
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+class QueryStats:
+    __slots__ = ("count", "duration_ms", "commands")
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.commands = {}
+
+    def record(self, command_name, duration_ms):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.commands[command_name] = self.commands.get(command_name, 0) + 1
+
+# The stats object is shared by reference, so Motor's executor threads (which run
+# in a copy of the request context) still add to the request's totals
+_current_stats = contextvars.ContextVar("db_query_stats", default=None)
+
+def current_stats():
+    return _current_stats.get()
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+# Fails the enclosing block (e.g. a test) when more than max_queries run inside it
+@contextmanager
+def query_budget(max_queries):
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.count} queries exceeded budget of {max_queries}: {stats.commands}"
+        )
+
+def budget_for(route):
+    return ROUTE_BUDGETS.get(route, QUERY_BUDGET)
+
+# pymongo/Motor command listener, pass via MongoClient(event_listeners=[...])
+class QueryAccountingListener(monitoring.CommandListener):
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        duration_ms = event.duration_micros / 1000
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(event.command_name, duration_ms)
+
+        if duration_ms > SLOW_COMMAND_MS:
+            logger.warning(
+                "Slow MongoDB command %s on %s: %.1fms", event.command_name, event.database_name, duration_ms
+            )
+
+# ASGI middleware scoping query stats to each request
+class QueryAccountingMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message):
+                if DEBUG and message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.duration_ms:.2f}".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        budget = budget_for(route)
+        if stats.count > budget:
+            message = "%s %s ran %d queries (budget %d, %.1fms): %s"
+            args = (scope["method"], route, stats.count, budget, stats.duration_ms, stats.commands)
+            if STRICT:
+                raise QueryBudgetExceeded(message % args)
+            logger.warning(message, *args)
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from pymongo import UpdateOne
+from mumundo.backend import PlaylistVersion, Trending
+from mumundo.backend.Cache import cache
+from mumundo.backend.Logger import get_logger
+from mumundo.backend.jobs.batching import Throttle, iter_batches
+
+logger = get_logger("RatingCounts")
+
+# Playlist Likes/Dislikes are counters maintained by the rating routes, while
+# playlist_ratings holds one document per user vote. reconcile() recounts the votes
+# per playlist and rewrites any counters that drifted from them.
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("RATING_RECONCILE_SECONDS", "21600"))
+# Pause before rereading a drifted playlist to confirm the drift (see reconcile)
+CONFIRM_DELAY_SECONDS = float(os.getenv("RATING_RECONCILE_CONFIRM_SECONDS", "1"))
+
+PLAYLIST_FIELDS = {"Likes": 1, "Dislikes": 1, "Saves": 1, "created_at": 1, "version": 1}
+
+def ensure_indexes(db):
+    db.playlist_ratings.create_index([("playlist_id", 1), ("user_id", 1)])
+
+# {playlist_id string: (likes, dislikes)} for a batch of playlists, in one aggregation
+def count_votes(db, playlist_ids):
+    pipeline = [
+        {"$match": {"playlist_id": {"$in": [str(playlist_id) for playlist_id in playlist_ids]}}},
+        {"$group": {
+            "_id": "$playlist_id",
+            "likes": {"$sum": {"$cond": [{"$eq": ["$type", "like"]}, 1, 0]}},
+            "dislikes": {"$sum": {"$cond": [{"$eq": ["$type", "dislike"]}, 1, 0]}},
+        }},
+    ]
+    return {row["_id"]: (row["likes"], row["dislikes"]) for row in db.playlist_ratings.aggregate(pipeline)}
+
+# (votes - counters) for likes and dislikes, (0, 0) when the counters are right
+def _drift(playlist, votes):
+    likes, dislikes = votes.get(str(playlist["_id"]), (0, 0))
+    return likes - (playlist.get("Likes") or 0), dislikes - (playlist.get("Dislikes") or 0)
+
+# Walks playlists in _id batches, one vote aggregation and (when repairing) one unordered
+# bulk_write per batch. Returns how many playlists drifted and by how many votes in total.
+#
+# The rating routes write the vote first and $inc the counters after it, so a vote caught
+# between the two looks like drift that the route is about to fix itself. A drifted
+# playlist is therefore recounted and reread after CONFIRM_DELAY_SECONDS, and only
+# repaired when its version hasn't moved and the drift is the same both times; the
+# write is conditional on that version too. Only a route stalled between its two writes
+# for the whole confirm delay can still be counted twice.
+def reconcile(db, batch_size=None, repair=True, throttle=None, sleep=time.sleep):
+
+    throttle = throttle or Throttle()
+    report = {"playlists_scanned": 0, "playlists_drifted": 0, "likes_drift": 0, "dislikes_drift": 0,
+              "repaired": 0, "skipped": 0, "dry_run": not repair}
+
+    for playlists in iter_batches(db.playlist, None, PLAYLIST_FIELDS, batch_size):
+        votes = count_votes(db, [playlist["_id"] for playlist in playlists])
+        drifted = {}
+        for playlist in playlists:
+            drift = _drift(playlist, votes)
+            if drift != (0, 0):
+                drifted[playlist["_id"]] = (playlist.get("version"), drift)
+        report["playlists_scanned"] += len(playlists)
+        throttle.wait(1)
+        if not drifted:
+            continue
+
+        sleep(CONFIRM_DELAY_SECONDS)
+        throttle.wait(2)
+        # Recount first, so a route whose vote the recount saw has usually bumped the version by the reread
+        votes = count_votes(db, list(drifted))
+        current = list(db.playlist.find({"_id": {"$in": list(drifted)}}, PLAYLIST_FIELDS))
+
+        ops = []
+        for playlist in current:
+            version, drift = drifted[playlist["_id"]]
+            if playlist.get("version") != version or _drift(playlist, votes) != drift:
+                report["skipped"] += 1
+                continue
+
+            report["playlists_drifted"] += 1
+            report["likes_drift"] += abs(drift[0])
+            report["dislikes_drift"] += abs(drift[1])
+            fixed = {"Likes": (playlist.get("Likes") or 0) + drift[0], "Dislikes": (playlist.get("Dislikes") or 0) + drift[1]}
+            fixed["trending_score"] = Trending.score_playlist({**playlist, **fixed})
+            ops.append(UpdateOne(
+                {"_id": playlist["_id"], "version": playlist.get("version")},
+                PlaylistVersion.bump({"$set": fixed})
+            ))
+        # Deleted between the two reads
+        report["skipped"] += len(drifted) - len(current)
+
+        throttle.wait(len(ops))
+        if ops and repair:
+            report["repaired"] += db.playlist.bulk_write(ops, ordered=False).modified_count
+
+    return report
+
+# One pass off the event loop; logs the report and drops the cached feed pages it changed
+async def run_reconcile(db, repair=True):
+    try:
+        report = await asyncio.to_thread(reconcile, db, repair=repair)
+        logger.info("Rating counter reconciliation finished: %s", report)
+        if report["repaired"]:
+            await cache.invalidate_namespace("feed")
+        return report
+    except Exception as e:
+        logger.error("Rating counter reconciliation failed: %s", e)
+
+async def run_periodic_reconcile(db, interval=RECONCILE_INTERVAL_SECONDS):
+    while True:
+        await run_reconcile(db)
+        await asyncio.sleep(interval)
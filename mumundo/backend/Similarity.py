@@ -0,0 +1,122 @@
+import hashlib
+import random
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# MinHash signature length and LSH banding (BANDS * ROWS == NUM_PERM). With 16
+# bands of 4 rows, pairs at ~0.5 Jaccard similarity collide in some band ~65%
+# of the time and pairs at ~0.2 only ~2.5% of the time.
+NUM_PERM = 64
+BANDS = 16
+ROWS = 4
+
+_PRIME = (1 << 61) - 1
+
+# Fixed seed so signatures agree across workers and restarts
+_rng = random.Random(8675309)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def _song_hash(song_id):
+    return int.from_bytes(hashlib.blake2b(str(song_id).encode("utf-8"), digest_size=8).digest(), "big")
+
+def minhash_signature(song_ids):
+    hashes = {_song_hash(song_id) for song_id in song_ids}
+    if not hashes:
+        return []
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def lsh_buckets(signature):
+    if not signature:
+        return []
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(rows).encode("utf-8"), digest_size=8).hexdigest()
+        buckets.append(f"{band}:{digest}")
+    return buckets
+
+def estimate_similarity(signature_a, signature_b):
+    if not signature_a or not signature_b:
+        return 0.0
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / NUM_PERM
+
+# Index maintenance; documents live in SpotifyDB.playlist_lsh keyed by playlist _id
+def ensure_indexes(db):
+    db.playlist_lsh.create_index([("buckets", 1), ("IsPublic", 1)])
+
+def index_playlist(db, playlist_id, song_ids, is_public):
+    signature = minhash_signature(song_ids)
+    db.playlist_lsh.update_one(
+        {"_id": ObjectId(playlist_id)},
+        {"$set": {"signature": signature, "buckets": lsh_buckets(signature), "IsPublic": is_public}},
+        upsert=True
+    )
+    return signature
+
+# Same for many playlists at once, one unordered bulk write; entries are (playlist_id, song_ids, is_public)
+def index_playlists(db, entries):
+    operations = []
+    for playlist_id, song_ids, is_public in entries:
+        signature = minhash_signature(song_ids)
+        operations.append(UpdateOne(
+            {"_id": ObjectId(playlist_id)},
+            {"$set": {"signature": signature, "buckets": lsh_buckets(signature), "IsPublic": is_public}},
+            upsert=True
+        ))
+    if operations:
+        db.playlist_lsh.bulk_write(operations, ordered=False)
+
+def remove_playlist(db, playlist_id):
+    db.playlist_lsh.delete_one({"_id": ObjectId(playlist_id)})
+
+def set_visibility(db, playlist_id, is_public):
+    db.playlist_lsh.update_one({"_id": ObjectId(playlist_id)}, {"$set": {"IsPublic": is_public}})
+
+# Returns [(playlist_id, similarity)] best first, only looking at public playlists
+# that share at least one LSH bucket with the given one
+def find_similar(db, playlist_id, limit=10, min_similarity=0.0):
+
+    entry = db.playlist_lsh.find_one({"_id": ObjectId(playlist_id)})
+
+    if entry is None:
+        # Not indexed yet (e.g. imported before the index existed), index it now
+        playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)}, {"Songs": 1, "IsPublic": 1})
+        if not playlist:
+            return None
+        signature = index_playlist(db, playlist_id, playlist.get("Songs", []), playlist.get("IsPublic", False))
+        entry = {"signature": signature, "buckets": lsh_buckets(signature)}
+
+    if not entry["buckets"]:
+        return []
+
+    candidates = db.playlist_lsh.find(
+        {"buckets": {"$in": entry["buckets"]}, "IsPublic": True, "_id": {"$ne": ObjectId(playlist_id)}},
+        {"signature": 1}
+    )
+
+    scored = []
+    for candidate in candidates:
+        similarity = estimate_similarity(entry["signature"], candidate["signature"])
+        if similarity >= min_similarity:
+            scored.append((candidate["_id"], similarity))
+
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:limit]
+
+# Full rebuild for backfills; walks playlists in _id order in batches
+def rebuild_index(db, batch_size=500):
+
+    indexed = 0
+    last_id = None
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        batch = list(db.playlist.find(query, {"Songs": 1, "IsPublic": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return indexed
+
+        for playlist in batch:
+            index_playlist(db, playlist["_id"], playlist.get("Songs", []), playlist.get("IsPublic", False))
+        indexed += len(batch)
+        last_id = batch[-1]["_id"]
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from bson import ObjectId
+from mumundo.backend.Cache import cache
+from mumundo.backend.Metrics import CACHE_REQUESTS
+from mumundo.backend.MongoHandler import AsyncLazyDatabase, LazyDatabase
+
+# Bounded LRU of SpotifyDB.song documents keyed by ObjectId, shared by every request
+# in the process. Song metadata only changes through the write paths below, which
+# invalidate, so entries have no TTL.
+MAX_ENTRIES = int(os.getenv("SONG_CACHE_SIZE", "50000"))
+
+# get_many_async splits misses into $in queries of this many ids and runs them concurrently
+FETCH_CHUNK = int(os.getenv("SONG_FETCH_CHUNK", "500"))
+
+SONG_FIELDS = ("Title", "Artist", "Album", "Length", "spotify_id", "preview_url", "image_url")
+
+# Marks fields absent from the stored document, so .get(field, default) still works on hits
+_MISSING = object()
+
+# Fixed attribute layout instead of a per-entry dict; roughly a third of the size of
+# the document dict pymongo returns, so MAX_ENTRIES bounds memory predictably
+class _SongEntry:
+    __slots__ = SONG_FIELDS
+
+    def __init__(self, doc):
+        for field in SONG_FIELDS:
+            setattr(self, field, doc.get(field, _MISSING))
+
+    def to_doc(self, song_id):
+        doc = {"_id": song_id}
+        for field in SONG_FIELDS:
+            value = getattr(self, field)
+            if value is not _MISSING:
+                doc[field] = value
+        return doc
+
+class SongCache:
+
+    def __init__(self, db, async_db=None, max_entries=MAX_ENTRIES, fetch_chunk=FETCH_CHUNK):
+        self._db = db
+        self._async_db = async_db
+        self._max_entries = max_entries
+        self._fetch_chunk = max(1, fetch_chunk)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate/clear so a fetch racing a write doesn't cache the old document
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Returns {ObjectId: song document} for the ids that exist; misses are fetched with
+    # one $in query. Documents are fresh dicts, so callers may mutate them.
+    def get_many(self, song_ids):
+
+        found, missing, generation = self._lookup(song_ids)
+        if not missing:
+            return found
+
+        fetched = list(self._db.song.find({"_id": {"$in": missing}}, self._projection()))
+        return self._store(found, fetched, generation)
+
+    # Same through Motor, for async routes: misses are fetched in FETCH_CHUNK-sized $in
+    # queries that run concurrently, so neither the event loop nor a large playlist waits
+    # on one long sequential read
+    async def get_many_async(self, song_ids):
+
+        found, missing, generation = self._lookup(song_ids)
+        if not missing:
+            return found
+
+        chunks = [missing[i:i + self._fetch_chunk] for i in range(0, len(missing), self._fetch_chunk)]
+        results = await asyncio.gather(*(
+            self._async_db.song.find({"_id": {"$in": chunk}}, self._projection()).to_list(None)
+            for chunk in chunks
+        ))
+        return self._store(found, [doc for docs in results for doc in docs], generation)
+
+    def _projection(self):
+        return {field: 1 for field in SONG_FIELDS}
+
+    # Cached documents plus the ids still to fetch, and the generation the fetch started in
+    def _lookup(self, song_ids):
+
+        wanted = list(dict.fromkeys(ObjectId(song_id) for song_id in song_ids))
+        found = {}
+        missing = []
+
+        with self._lock:
+            generation = self._generation
+            for song_id in wanted:
+                entry = self._entries.get(song_id)
+                if entry is None:
+                    missing.append(song_id)
+                else:
+                    self._entries.move_to_end(song_id)
+                    found[song_id] = entry.to_doc(song_id)
+
+        if wanted:
+            CACHE_REQUESTS.inc("song", "hit", amount=len(wanted) - len(missing))
+        if missing:
+            CACHE_REQUESTS.inc("song", "miss", amount=len(missing))
+        return found, missing, generation
+
+    def _store(self, found, docs, generation):
+
+        fetched = [(doc["_id"], _SongEntry(doc)) for doc in docs]
+
+        with self._lock:
+            cacheable = generation == self._generation
+            for song_id, entry in fetched:
+                found[song_id] = entry.to_doc(song_id)
+                if cacheable:
+                    self._entries[song_id] = entry
+                    self._entries.move_to_end(song_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+        return found
+
+    def get(self, song_id):
+        return self.get_many([song_id]).get(ObjectId(song_id))
+
+    # Local only; use cache.invalidate("song", ...) to reach other workers too
+    def invalidate(self, *song_ids):
+        with self._lock:
+            self._generation += 1
+            for song_id in song_ids:
+                self._entries.pop(ObjectId(song_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+# Process-wide cache over SpotifyDB.song. Writers call cache.invalidate("song", *ids),
+# which reaches this cache on every worker.
+song_cache = SongCache(LazyDatabase("SpotifyDB"), AsyncLazyDatabase("SpotifyDB"))
+cache.on_invalidate("song", lambda song_ids: song_cache.clear() if song_ids is None else song_cache.invalidate(*song_ids))
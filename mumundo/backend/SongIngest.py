@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from mumundo.backend.Logger import get_logger
+from mumundo.backend.models.song import SongFields
+
+logger = get_logger("SongIngest")
+
+# Offline loading of track dumps (JSONL or CSV, one song per record) into SpotifyDB.song.
+# Files are read as a stream and upserted by spotify_id in unordered bulk_write batches.
+# After every batch the byte offset reached is written to a checkpoint file, so an
+# interrupted load resumes where it stopped instead of starting over.
+
+BATCH_SIZE = int(os.getenv("SONG_INGEST_BATCH", "1000"))
+
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl", ".csv": "csv"}
+
+# Unique, so two imports of the same track can't both insert it; songs without a
+# spotify_id are left out. Replaces the plain index older versions created. If
+# duplicates already exist the unique build fails and the plain index is kept.
+def ensure_indexes(db):
+    existing = db.song.index_information().get("spotify_id_1")
+    if existing and existing.get("unique"):
+        return
+    if existing:
+        db.song.drop_index("spotify_id_1")
+    try:
+        db.song.create_index("spotify_id", unique=True, partialFilterExpression={"spotify_id": {"$type": "string"}})
+    except DuplicateKeyError as e:
+        logger.warning("song.spotify_id has duplicates, keeping a non-unique index: %s", e)
+        db.song.create_index("spotify_id")
+
+def detect_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Can't tell the format of {path}, pass it explicitly (jsonl or csv)")
+    return fmt
+
+# Yields (record, offset after the record). Malformed lines yield a None record so they
+# are counted as invalid without stopping the load.
+def _jsonl_records(path, offset):
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        for raw in handle:
+            offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield (record if isinstance(record, dict) else None), offset
+
+def _csv_records(path, offset):
+    with open(path, "rb") as handle:
+        header = next(csv.reader([handle.readline().decode("utf-8-sig")]), None)
+        if not header:
+            return
+        position = [max(offset, handle.tell())]
+        handle.seek(position[0])
+
+        # The reader pulls exactly the lines of one record at a time (quoted fields can
+        # span lines), so the bytes consumed so far are that record's end offset
+        def lines():
+            for raw in handle:
+                position[0] += len(raw)
+                yield raw.decode("utf-8")
+
+        for row in csv.DictReader(lines(), fieldnames=header):
+            # Empty cells mean "not provided" rather than an empty string
+            yield {key: value for key, value in row.items() if key and value not in ("", None)}, position[0]
+
+def read_records(path, fmt=None, offset=0):
+    fmt = fmt or detect_format(path)
+    return _csv_records(path, offset) if fmt == "csv" else _jsonl_records(path, offset)
+
+# Validates a record against the Song schema; returns (spotify_id, fields given, defaults) or None
+def parse_record(record):
+    if record is None:
+        return None
+    try:
+        song = SongFields.model_validate(record)
+    except ValidationError:
+        return None
+    if not song.spotify_id:
+        return None
+
+    # Fields present in the record overwrite the stored song; schema defaults only fill
+    # in new songs, so a dump without e.g. preview_url doesn't wipe existing ones
+    given = song.model_dump(exclude_unset=True, exclude={"spotify_id"})
+    defaults = {key: value for key, value in song.model_dump(exclude={"spotify_id"}).items() if key not in given}
+    return song.spotify_id, given, defaults
+
+def load_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+# Written to a temp file and renamed, so a crash mid-write never leaves a torn checkpoint
+def save_checkpoint(checkpoint_path, state):
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, "w") as handle:
+        json.dump(state, handle)
+    os.replace(temp_path, checkpoint_path)
+
+def _write_batch(db, batch):
+    # batch is keyed by spotify_id, so a song repeated within one batch is a single upsert
+    # and unordered writes can't race each other into duplicates
+    result = db.song.bulk_write([
+        UpdateOne(
+            {"spotify_id": spotify_id},
+            {"$set": given, "$setOnInsert": defaults} if defaults else {"$set": given},
+            upsert=True
+        )
+        for spotify_id, (given, defaults) in batch.items()
+    ], ordered=False)
+    return result.upserted_count, result.modified_count
+
+# Loads one file, resuming from checkpoint_path when given. progress(stats) is called
+# after every batch. Returns the totals for this file, including any earlier runs.
+def ingest_file(db, path, fmt=None, batch_size=None, checkpoint_path=None, progress=None):
+
+    batch_size = batch_size or BATCH_SIZE
+    state = (load_checkpoint(checkpoint_path) if checkpoint_path else None) or {
+        "offset": 0, "records": 0, "invalid": 0, "upserted": 0, "modified": 0
+    }
+    state["resumed_from"] = state["records"]
+
+    batch = {}
+    pending = 0
+
+    def flush(offset):
+        nonlocal batch, pending
+        if batch:
+            upserted, modified = _write_batch(db, batch)
+            state["upserted"] += upserted
+            state["modified"] += modified
+        state["records"] += pending
+        state["offset"] = offset
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, state)
+        if progress:
+            progress(state)
+        batch, pending = {}, 0
+
+    offset = state["offset"]
+    for record, offset in read_records(path, fmt, state["offset"]):
+        pending += 1
+        parsed = parse_record(record)
+        if parsed is None:
+            state["invalid"] += 1
+        else:
+            spotify_id, given, defaults = parsed
+            batch[spotify_id] = (given, defaults)
+        if pending >= batch_size:
+            flush(offset)
+
+    if pending:
+        flush(offset)
+    return state
@@ -0,0 +1,348 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import random
+import time
+from fastapi import HTTPException
+from mumundo.backend.Metrics import (
+    SPOTIFY_CIRCUIT_OPEN, SPOTIFY_CIRCUIT_REJECTED, SPOTIFY_RETRIES, SPOTIFY_THROTTLED_SECONDS, SPOTIFY_TIMEOUTS, track_spotify
+)
+
+# Spotify API credentials (pls dont leak these are tied to me)
+SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
+SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
+
+# Spotify endpoints, overridable so benchmarks and tests can point at a local fake
+SPOTIFY_API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1/")
+SPOTIFY_TOKEN_URL = os.getenv("SPOTIFY_TOKEN_URL", "https://accounts.spotify.com/api/token")
+
+# Shared budget for every outbound Spotify call in the process
+SPOTIFY_RATE = float(os.getenv("SPOTIFY_RATE", "20"))               # sustained requests per second
+SPOTIFY_BURST = int(os.getenv("SPOTIFY_BURST", "40"))               # token bucket size
+SPOTIFY_MAX_CONCURRENCY = int(os.getenv("SPOTIFY_MAX_CONCURRENCY", "8"))
+SPOTIFY_MAX_RETRIES = int(os.getenv("SPOTIFY_MAX_RETRIES", "4"))
+
+# Connect/read timeout of each HTTP request spotipy makes
+SPOTIFY_TIMEOUT_SECONDS = float(os.getenv("SPOTIFY_TIMEOUT_SECONDS", "5"))
+# Budget of one spotify_call including queueing and retries, per priority (0 disables it)
+SPOTIFY_INTERACTIVE_DEADLINE_SECONDS = float(os.getenv("SPOTIFY_INTERACTIVE_DEADLINE_SECONDS", "10"))
+SPOTIFY_BACKGROUND_DEADLINE_SECONDS = float(os.getenv("SPOTIFY_BACKGROUND_DEADLINE_SECONDS", "60"))
+
+# Consecutive failures (5xx, connection errors, timeouts) that open the circuit, and how
+# long it stays open before one probe call is let through
+SPOTIFY_BREAKER_FAILURES = int(os.getenv("SPOTIFY_BREAKER_FAILURES", "5"))
+SPOTIFY_BREAKER_RESET_SECONDS = float(os.getenv("SPOTIFY_BREAKER_RESET_SECONDS", "30"))
+
+# Lower runs first; user-facing lookups jump ahead of queued import pages
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Exponential backoff for 5xx/connection errors, full jitter, capped
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+
+_client = None
+_client_config = None
+
+def spotify_configured():
+    return bool(SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET)
+
+# Shared client credentials client; spotipy is only imported on first use and the
+# access token is reused across requests instead of being fetched per import
+def get_spotify_client():
+
+    global _client, _client_config
+
+    config = (SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, SPOTIFY_API_URL, SPOTIFY_TOKEN_URL)
+    if _client is not None and _client_config == config:
+        return _client
+
+    import requests
+    import spotipy
+    from spotipy.cache_handler import MemoryCacheHandler
+    from spotipy.oauth2 import SpotifyClientCredentials
+
+    auth_manager = SpotifyClientCredentials(
+        client_id=SPOTIFY_CLIENT_ID,
+        client_secret=SPOTIFY_CLIENT_SECRET,
+        cache_handler=MemoryCacheHandler(),
+        requests_timeout=SPOTIFY_TIMEOUT_SECONDS
+    )
+    auth_manager.OAUTH_TOKEN_URL = SPOTIFY_TOKEN_URL
+
+    # Retries belong to the scheduler. spotipy's urllib3 Retry would sleep inside a
+    # worker thread and, once exhausted, raise a 429 without the Retry-After header,
+    # so it gets a plain session that never retries.
+    sp = spotipy.Spotify(
+        auth_manager=auth_manager,
+        requests_session=requests.Session(),
+        requests_timeout=SPOTIFY_TIMEOUT_SECONDS,
+        retries=0,
+        status_retries=0
+    )
+    sp.prefix = SPOTIFY_API_URL
+
+    _client, _client_config = sp, config
+    return sp
+
+def _retry_after_seconds(error):
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("Retry-After", 1)))
+    except (TypeError, ValueError):
+        return 1.0
+
+# Status that makes a call worth retrying, or None if the error is final
+def _retryable_status(error):
+    from requests.exceptions import ConnectionError, Timeout
+    from spotipy.exceptions import SpotifyException
+
+    if isinstance(error, SpotifyException):
+        if error.http_status == 429 or error.http_status >= 500:
+            return str(error.http_status)
+        return None
+    if isinstance(error, (ConnectionError, Timeout)):
+        return "connection"
+    return None
+
+# Stops calling Spotify while it is failing. After `failure_threshold` consecutive
+# failures the circuit opens and calls are rejected with a 503 straight away instead of
+# each waiting out its timeout; after `reset_seconds` a single probe call is let through
+# (half-open) and its outcome closes or reopens the circuit. Any answer from Spotify,
+# even a 404, counts as a success; 429s are the rate limiter's business and count as neither.
+class CircuitBreaker:
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=SPOTIFY_BREAKER_FAILURES, reset_seconds=SPOTIFY_BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def _set_state(self, state):
+        self.state = state
+        SPOTIFY_CIRCUIT_OPEN.set(1 if state == self.OPEN else 0)
+
+    def _reject(self, retry_after):
+        SPOTIFY_CIRCUIT_REJECTED.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Spotify is temporarily unavailable, please try again shortly",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    # Raises a 503 while the circuit is open; returns True when this call is the half-open probe
+    def before_call(self):
+
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_seconds - self._clock()
+            if remaining > 0:
+                self._reject(remaining)
+            self._set_state(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self._reject(self.reset_seconds)
+            self._probing = True
+            return True
+
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._probing = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            self._set_state(self.OPEN)
+
+    # A probe that ended without an outcome (e.g. the client went away) lets the next caller probe
+    def end_probe(self):
+        self._probing = False
+
+# Token bucket plus concurrency cap in front of every Spotify call. Waiters sit in
+# a heap ordered by (priority, arrival), so a search queued behind a large import
+# is the next call released. Runs on the event loop thread only.
+class SpotifyScheduler:
+
+    def __init__(self, rate=SPOTIFY_RATE, burst=SPOTIFY_BURST, max_concurrency=SPOTIFY_MAX_CONCURRENCY,
+                 max_retries=SPOTIFY_MAX_RETRIES, breaker=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        # A 429 pauses every caller, since Spotify's limit is per app rather than per call
+        self._paused_until = 0.0
+        self._timer = None
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _schedule_wakeup(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+
+        self._timer = None
+
+        while self._waiters and self._active < self.max_concurrency:
+
+            if self._waiters[0][2].done():
+                # Caller was cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                self._schedule_wakeup(self._paused_until - now)
+                return
+
+            self._refill(now)
+            if self._tokens < 1:
+                self._schedule_wakeup((1 - self._tokens) / self.rate)
+                return
+
+            _, _, future = heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self._active += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority):
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        start = time.monotonic()
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted as the caller got cancelled, hand it back
+                self._release()
+            raise
+        finally:
+            SPOTIFY_THROTTLED_SECONDS.inc(_PRIORITY_NAMES.get(priority, str(priority)),
+                                          amount=time.monotonic() - start)
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _pause(self, seconds):
+        # Jitter spreads the queued callers out again when the pause ends, and
+        # draining the bucket stops them all resuming as one burst
+        until = time.monotonic() + seconds + random.uniform(0, min(1.0, seconds * 0.1 + 0.05))
+        self._paused_until = max(self._paused_until, until)
+        self._tokens = 0.0
+
+    # Runs fn(*args, **kwargs) (a blocking spotipy call) in a worker thread once the
+    # limiter allows it. 429s honor Retry-After, 5xx and connection errors back off;
+    # when retries run out the caller gets a 503 with Retry-After instead of a 404/500.
+    # The whole call, queueing and retries included, must finish within `deadline`
+    # seconds (default per priority) or the caller gets a 504. Only time spent waiting on
+    # Spotify itself counts against the circuit breaker; running out of time in our own
+    # queue or a 429 pause says nothing about Spotify's health. The worker thread can't
+    # be cancelled and ends at spotipy's SPOTIFY_TIMEOUT_SECONDS.
+    async def call(self, operation, fn, *args, priority=BACKGROUND, deadline=None, **kwargs):
+
+        if deadline is None:
+            deadline = SPOTIFY_INTERACTIVE_DEADLINE_SECONDS if priority == INTERACTIVE else SPOTIFY_BACKGROUND_DEADLINE_SECONDS
+        expires = asyncio.get_running_loop().time() + deadline if deadline > 0 else None
+
+        probe = self.breaker.before_call()
+        try:
+            return await self._call(operation, fn, args, kwargs, priority, deadline, expires)
+        finally:
+            if probe:
+                self.breaker.end_probe()
+
+    def _timed_out(self, operation, deadline, stage):
+        SPOTIFY_TIMEOUTS.inc(operation, stage)
+        if stage == "upstream":
+            self.breaker.record_failure()
+        return HTTPException(status_code=504, detail=f"Spotify did not respond within {deadline:g}s")
+
+    async def _call(self, operation, fn, args, kwargs, priority, deadline, expires):
+
+        attempt = 0
+        while True:
+            try:
+                async with asyncio.timeout_at(expires):
+                    await self._acquire(priority)
+            except TimeoutError:
+                raise self._timed_out(operation, deadline, "queue")
+
+            try:
+                with track_spotify(operation):
+                    async with asyncio.timeout_at(expires):
+                        result = await asyncio.to_thread(fn, *args, **kwargs)
+                self.breaker.record_success()
+                return result
+            except TimeoutError:
+                raise self._timed_out(operation, deadline, "upstream")
+            except Exception as e:
+                status = _retryable_status(e)
+                if status is None:
+                    self.breaker.record_success()
+                    raise
+
+                SPOTIFY_RETRIES.inc(status)
+                if status == "429":
+                    delay = _retry_after_seconds(e)
+                    self._pause(delay)
+                else:
+                    delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                    self.breaker.record_failure()
+
+                attempt += 1
+                # An open circuit ends the retries too, so callers already in flight fail fast
+                if attempt > self.max_retries or self.breaker.state == CircuitBreaker.OPEN:
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Spotify is temporarily unavailable, please try again shortly",
+                        headers={"Retry-After": str(max(1, math.ceil(delay)))}
+                    )
+            finally:
+                self._release()
+
+            if status != "429":
+                # 429s wait in the queue on the shared pause instead. The failure that led
+                # here was already counted, so running out of time now is a "backoff" timeout.
+                try:
+                    async with asyncio.timeout_at(expires):
+                        await asyncio.sleep(delay)
+                except TimeoutError:
+                    raise self._timed_out(operation, deadline, "backoff")
+
+scheduler = SpotifyScheduler()
+
+# Shorthand used by the routes: await spotify_call("search", sp.search, q=..., priority=INTERACTIVE)
+async def spotify_call(operation, fn, *args, priority=BACKGROUND, deadline=None, **kwargs):
+    return await scheduler.call(operation, fn, *args, priority=priority, deadline=deadline, **kwargs)
@@ -0,0 +1,87 @@
+import importlib.abc
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+
+# Wraps a module loader so executing the module body is timed
+class _TimedLoader(importlib.abc.Loader):
+
+    def __init__(self, loader, name, record):
+        self._loader = loader
+        self._name = name
+        self._record = record
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._record(self._name, time.perf_counter() - start)
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+# Meta path finder that defers to the normal finders and times matching modules
+class _ImportTimingFinder(importlib.abc.MetaPathFinder):
+
+    def __init__(self, prefix, record):
+        self._prefix = prefix
+        self._record = record
+        self._resolving = set()
+
+    def find_spec(self, fullname, path, target=None):
+        if not fullname.startswith(self._prefix) or fullname in self._resolving:
+            return None
+
+        self._resolving.add(fullname)
+        try:
+            spec = importlib.util.find_spec(fullname)
+        finally:
+            self._resolving.discard(fullname)
+
+        if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, fullname, self._record)
+        return spec
+
+# Collects import times (inclusive of nested imports, like -X importtime's
+# cumulative column) and startup phase durations
+class StartupTimer:
+
+    def __init__(self):
+        self.imports = {}
+        self.phases = {}
+
+    def _record_import(self, name, seconds):
+        self.imports[name] = seconds
+
+    @contextmanager
+    def timing_imports(self, prefix):
+        finder = _ImportTimingFinder(prefix, self._record_import)
+        sys.meta_path.insert(0, finder)
+        try:
+            with self.phase("imports"):
+                yield
+        finally:
+            sys.meta_path.remove(finder)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def report(self):
+        return {
+            "imports_ms": {name: round(seconds * 1000, 3) for name, seconds in
+                           sorted(self.imports.items(), key=lambda item: -item[1])},
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+        }
+
+startup_timer = StartupTimer()
@@ -0,0 +1,103 @@
+import asyncio
+import math
+import os
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from mumundo.backend.Logger import get_logger
+
+logger = get_logger("Trending")
+
+# Votes halve in weight every HALF_LIFE_HOURS; a save counts as SAVE_WEIGHT likes
+HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "48"))
+SAVE_WEIGHT = 2.0
+RESCORE_INTERVAL_SECONDS = float(os.getenv("TRENDING_RESCORE_SECONDS", "900"))
+
+_EPOCH = datetime(2025, 1, 1)
+
+SCORE_FIELDS = {"Likes": 1, "Dislikes": 1, "Saves": 1, "created_at": 1, "trending_score": 1}
+
+# Exponential time decay expressed in log space: one half-life of age costs the
+# same as halving the votes. Anchoring on a fixed epoch instead of "now" keeps
+# scores comparable whenever they were computed, so an incremental update after
+# a rating and the batch rescore always agree on the ordering.
+def trending_score(likes, dislikes, saves, created_at):
+    votes = (likes or 0) - (dislikes or 0) + SAVE_WEIGHT * (saves or 0)
+    magnitude = math.copysign(math.log2(1 + abs(votes)), votes)
+    age_hours = ((created_at or _EPOCH) - _EPOCH).total_seconds() / 3600
+    return round(magnitude + age_hours / HALF_LIFE_HOURS, 6)
+
+def score_playlist(playlist):
+    return trending_score(
+        playlist.get("Likes", 0),
+        playlist.get("Dislikes", 0),
+        playlist.get("Saves", 0),
+        playlist.get("created_at"),
+    )
+
+def ensure_indexes(db):
+    db.playlist.create_index([("IsPublic", 1), ("trending_score", -1)])
+
+# Counters the score is computed from; a rescore only writes if they are unchanged
+COUNTER_FIELDS = ("Likes", "Dislikes", "Saves")
+RESCORE_ATTEMPTS = 3
+
+def _unchanged(playlist):
+    return {"_id": playlist["_id"], **{field: playlist.get(field) for field in COUNTER_FIELDS}}
+
+# Recompute one playlist's score after its counters changed. The write is conditional on
+# the counters that were read, so when two ratings rescore concurrently the one that read
+# older counters misses and rereads instead of overwriting the newer score.
+def rescore_playlist(db, playlist_id):
+    for _ in range(RESCORE_ATTEMPTS):
+        playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)}, SCORE_FIELDS)
+        if not playlist:
+            return
+        result = db.playlist.update_one(_unchanged(playlist), {"$set": {"trending_score": score_playlist(playlist)}})
+        if result.matched_count:
+            return
+
+# Same for async routes (db is a Motor database)
+async def rescore_playlist_async(db, playlist_id):
+    for _ in range(RESCORE_ATTEMPTS):
+        playlist = await db.playlist.find_one({"_id": ObjectId(playlist_id)}, SCORE_FIELDS)
+        if not playlist:
+            return
+        result = await db.playlist.update_one(_unchanged(playlist), {"$set": {"trending_score": score_playlist(playlist)}})
+        if result.matched_count:
+            return
+
+# Batch rescore in _id order, only writing scores that changed. Repairs drift from
+# missed incremental updates, counter fixes and changes to the scoring weights.
+def rescore_all(db, batch_size=1000):
+
+    scanned = updated = 0
+    last_id = None
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        batch = list(db.playlist.find(query, SCORE_FIELDS).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return {"scanned": scanned, "updated": updated}
+
+        operations = []
+        for playlist in batch:
+            score = score_playlist(playlist)
+            if playlist.get("trending_score") != score:
+                operations.append(UpdateOne({"_id": playlist["_id"]}, {"$set": {"trending_score": score}}))
+
+        if operations:
+            db.playlist.bulk_write(operations, ordered=False)
+
+        scanned += len(batch)
+        updated += len(operations)
+        last_id = batch[-1]["_id"]
+
+async def run_periodic_rescore(db, interval=RESCORE_INTERVAL_SECONDS):
+    while True:
+        try:
+            result = await asyncio.to_thread(rescore_all, db)
+            logger.info("Trending rescore finished: %s", result)
+        except Exception as e:
+            logger.error("Trending rescore failed: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+from mumundo.backend.Logger import get_logger
+from mumundo.backend.Metrics import UPLOAD_BYTES_RECLAIMED
+
+logger = get_logger("UploadSweeper")
+
+# update_profile stores every new picture under a fresh UUID name and leaves the old file
+# behind. The sweeper deletes upload files no user references any more, once they are
+# older than the grace period (which also covers a picture written just before the
+# profile update that references it).
+
+# The periodic sweep is opt-in: pointed at the wrong database every upload looks unreferenced
+SWEEP_INTERVAL_SECONDS = float(os.getenv("UPLOAD_SWEEP_SECONDS", "0"))
+GRACE_SECONDS = float(os.getenv("UPLOAD_GRACE_SECONDS", "86400"))
+
+# Served as the fallback picture, never referenced by name
+KEEP = {"default.jpg"}
+
+# Every profile_picture value in use, from one cursor that only returns that field
+def referenced_pictures(users_db):
+    cursor = users_db.users.find({"profile_picture": {"$type": "string"}}, {"_id": 0, "profile_picture": 1})
+    return {user["profile_picture"] for user in cursor.batch_size(5000)}
+
+def sweep(users_db, upload_dir, grace_seconds=None, dry_run=False):
+
+    grace_seconds = GRACE_SECONDS if grace_seconds is None else grace_seconds
+    referenced = referenced_pictures(users_db)
+    cutoff = time.time() - grace_seconds
+    summary = {"files_scanned": 0, "files_removed": 0, "bytes_reclaimed": 0, "dry_run": dry_run}
+
+    # scandir streams entries with their stat data cached, so no extra lookup per file
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False) or entry.name.startswith("."):
+                continue
+            summary["files_scanned"] += 1
+            if entry.name in referenced or entry.name in KEEP:
+                continue
+
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+            summary["files_removed"] += 1
+            summary["bytes_reclaimed"] += stat.st_size
+
+    if not dry_run:
+        UPLOAD_BYTES_RECLAIMED.inc(amount=summary["bytes_reclaimed"])
+    return summary
+
+async def run_periodic_sweep(users_db, upload_dir, interval=SWEEP_INTERVAL_SECONDS):
+    while True:
+        try:
+            summary = await asyncio.to_thread(sweep, users_db, upload_dir)
+            logger.info("Upload sweep finished: %s", summary)
+        except Exception as e:
+            logger.error("Upload sweep failed: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,51 @@
+import os
+import time
+
+# Shared pieces for the maintenance jobs that walk whole collections: _id-range batch
+# cursors and an ops/sec throttle, so a large backfill never saturates the database.
+
+BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "500"))
+OPS_PER_SECOND = float(os.getenv("JOB_OPS_PER_SECOND", "1000"))
+
+# Yields lists of up to batch_size documents in _id order, starting after start_after.
+# Every batch is its own short query ({"_id": {"$gt": last}} on the _id index), so no
+# cursor is held open across throttling pauses and a run can resume from any _id.
+def iter_batches(collection, query=None, projection=None, batch_size=None, start_after=None):
+
+    batch_size = batch_size or BATCH_SIZE
+    last_id = start_after
+    while True:
+        page_query = dict(query or {})
+        if last_id is not None:
+            page_query = {"$and": [page_query, {"_id": {"$gt": last_id}}]} if page_query else {"_id": {"$gt": last_id}}
+
+        batch = list(collection.find(page_query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return
+        yield batch
+
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1]["_id"]
+
+# Paces work to ops_per_second on average; 0 or None disables it. Callers wait before
+# each unit of work with the number of operations it's about to issue.
+class Throttle:
+
+    def __init__(self, ops_per_second=None, clock=time.monotonic, sleep=time.sleep):
+        ops_per_second = OPS_PER_SECOND if ops_per_second is None else ops_per_second
+        self.interval = 1.0 / ops_per_second if ops_per_second > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = clock()
+        self.waited = 0.0
+
+    def wait(self, ops=1):
+        if not self.interval or ops <= 0:
+            return
+        now = self._clock()
+        if self._next > now:
+            self._sleep(self._next - now)
+            self.waited += self._next - now
+            now = self._next
+        self._next = max(self._next, now) + ops * self.interval
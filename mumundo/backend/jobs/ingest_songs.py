@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import os
+import time
+from dotenv import find_dotenv, load_dotenv
+
+# Bulk-loads JSONL/CSV track dumps into SpotifyDB.song, upserting by spotify_id
+#   python -m mumundo.backend.jobs.ingest_songs tracks.jsonl [more.csv ...] [--batch-size N] [--restart]
+# Each file keeps a <file>.checkpoint next to it while loading; rerunning after an
+# interruption resumes from it, and it is removed once the file is fully loaded.
+
+REPORT_SECONDS = 5
+
+async def _invalidate_song_cache():
+    from mumundo.backend.Cache import cache
+
+    # Tells running servers (through Redis, when configured) to drop cached songs
+    await cache.invalidate_namespace("song")
+    await cache.close()
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mumundo.backend.jobs.ingest_songs",
+        description="Stream track dumps into the song collection",
+    )
+    parser.add_argument("paths", nargs="+", metavar="FILE", help="JSONL or CSV files, one song per record")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Input format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, help="Songs per bulk_write (default: SONG_INGEST_BATCH or 1000)")
+    parser.add_argument("--restart", action="store_true", help="Ignore existing checkpoints and load from the start")
+    args = parser.parse_args(argv)
+
+    load_dotenv(find_dotenv(usecwd=True) or find_dotenv())
+
+    from mumundo.backend import SongIngest
+    from mumundo.backend.MongoHandler import LazyDatabase
+
+    db = LazyDatabase("SpotifyDB")
+    SongIngest.ensure_indexes(db)
+    changed = 0
+
+    for path in args.paths:
+        checkpoint_path = path + ".checkpoint"
+        if args.restart and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        elif os.path.exists(checkpoint_path):
+            print(f"{path}: resuming from {checkpoint_path}")
+
+        start = time.perf_counter()
+        last_report = start
+
+        def report(state, final=False):
+            nonlocal last_report
+            now = time.perf_counter()
+            if not final and now - last_report < REPORT_SECONDS:
+                return
+            last_report = now
+            loaded = state["records"] - state["resumed_from"]
+            rate = loaded / (now - start) if now > start else 0.0
+            print(f"{path}: {state['records']} records ({rate:,.0f}/s), {state['upserted']} new, "
+                  f"{state['modified']} updated, {state['invalid']} invalid")
+
+        state = SongIngest.ingest_file(
+            db, path, args.format, args.batch_size, checkpoint_path=checkpoint_path, progress=report
+        )
+        report(state, final=True)
+        changed += state["upserted"] + state["modified"]
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    if changed:
+        asyncio.run(_invalidate_song_cache())
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
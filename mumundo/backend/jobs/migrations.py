@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from dotenv import find_dotenv, load_dotenv
+from pymongo import UpdateOne
+
+# Settings are read at import time, so the .env file has to be loaded before the imports below
+load_dotenv(find_dotenv(usecwd=True) or find_dotenv())
+
+from mumundo.backend import PlaylistVersion, Trending
+from mumundo.backend.MongoHandler import LazyDatabase
+from mumundo.backend.jobs.batching import Throttle, iter_batches
+from mumundo.backend.models.song import SongFields
+
+# Data migrations and backfills over SpotifyDB, run in _id-range batches with unordered
+# bulk_writes paced by an ops/sec throttle. Progress (the last _id done) is stored in
+# SpotifyDB.migrations after every batch, so rerunning an interrupted migration resumes it.
+#   python -m mumundo.backend.jobs.migrations                      # list migrations and their status
+#   python -m mumundo.backend.jobs.migrations NAME [NAME ...] [--dry-run] [--restart]
+#       [--batch-size N] [--ops-per-second N]
+# A migration is a function from one batch of documents to the pymongo write operations
+# that fix them; it's given the database so it can join a whole batch with one $in.
+
+MIGRATIONS = {}
+
+class Migration:
+
+    def __init__(self, name, collection, description, batch_ops, query=None, projection=None, invalidates=None):
+        self.name = name
+        self.collection = collection
+        self.description = description
+        self.batch_ops = batch_ops
+        self.query = query
+        self.projection = projection
+        # Cache namespace dropped after the migration changed something
+        self.invalidates = invalidates
+
+def migration(name, collection, description, query=None, projection=None, invalidates=None):
+    def register(batch_ops):
+        MIGRATIONS[name] = Migration(name, collection, description, batch_ops, query, projection, invalidates)
+        return batch_ops
+    return register
+
+def _object_id(value):
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+@migration("playlist_total_time", "playlist", "Recompute Total_Time from the lengths of the playlist's songs",
+           projection={"Songs": 1, "Total_Time": 1}, invalidates="feed")
+def recompute_total_time(db, playlists):
+
+    song_ids = {_object_id(song_id) for playlist in playlists for song_id in playlist.get("Songs", [])}
+    song_ids.discard(None)
+    lengths = {song["_id"]: song.get("Length") or 0 for song in db.song.find({"_id": {"$in": list(song_ids)}}, {"Length": 1})}
+
+    ops = []
+    for playlist in playlists:
+        total_time = sum(lengths.get(_object_id(song_id), 0) for song_id in playlist.get("Songs", []))
+        if playlist.get("Total_Time") != total_time:
+            # Matching the Songs that were summed leaves a playlist edited since the read for the next run
+            ops.append(UpdateOne(
+                {"_id": playlist["_id"], "Songs": playlist.get("Songs")},
+                PlaylistVersion.bump({"$set": {"Total_Time": total_time}})
+            ))
+    return ops
+
+@migration("playlist_song_ids", "playlist", "Store string entries in Songs as ObjectIds",
+           query={"Songs": {"$type": "string"}}, projection={"Songs": 1})
+def normalize_song_ids(db, playlists):
+
+    ops = []
+    for playlist in playlists:
+        songs = playlist.get("Songs", [])
+        converted = [song_id if isinstance(song_id, ObjectId) else _object_id(song_id) or song_id for song_id in songs]
+        if converted != songs:
+            # Matching the old array means a playlist edited since the read is left for the next run
+            ops.append(UpdateOne({"_id": playlist["_id"], "Songs": songs}, PlaylistVersion.bump({"$set": {"Songs": converted}})))
+    return ops
+
+@migration("playlist_track_count", "playlist", "Store track_count so list views never read the Songs array",
+           query={"track_count": {"$exists": False}}, projection={"Songs": 1}, invalidates="feed")
+def backfill_track_count(db, playlists):
+    return [
+        UpdateOne(
+            {"_id": playlist["_id"], "Songs": playlist.get("Songs")},
+            PlaylistVersion.bump({"$set": {"track_count": len(playlist.get("Songs") or [])}})
+        )
+        for playlist in playlists
+    ]
+
+PLAYLIST_DEFAULTS = {"Likes": 0, "Dislikes": 0, "Saves": 0, "IsPublic": False}
+
+@migration("playlist_defaults", "playlist", "Backfill rating counters, visibility, created_at and trending_score",
+           projection={"Likes": 1, "Dislikes": 1, "Saves": 1, "IsPublic": 1, "created_at": 1, "trending_score": 1},
+           invalidates="feed")
+def backfill_playlist_defaults(db, playlists):
+
+    ops = []
+    for playlist in playlists:
+        missing = {field: value for field, value in PLAYLIST_DEFAULTS.items() if field not in playlist}
+        if "created_at" not in playlist:
+            # The ObjectId's timestamp is the insert time; stored naive UTC like datetime.utcnow()
+            missing["created_at"] = playlist["_id"].generation_time.replace(tzinfo=None)
+        if "trending_score" not in playlist:
+            missing["trending_score"] = Trending.score_playlist({**playlist, **missing})
+        if missing:
+            # Only fills fields that are still absent, so a concurrent rating isn't overwritten
+            absent = {field: {"$exists": False} for field in missing}
+            ops.append(UpdateOne({"_id": playlist["_id"], **absent}, PlaylistVersion.bump({"$set": missing})))
+    return ops
+
+# Every optional Song field with its schema default (spotify_id has no meaningful default)
+SONG_DEFAULTS = {
+    name: field.default for name, field in SongFields.model_fields.items()
+    if not field.is_required() and name != "spotify_id"
+}
+
+@migration("song_defaults", "song", "Backfill optional Song fields missing from older documents",
+           projection={field: 1 for field in SONG_DEFAULTS}, invalidates="song")
+def backfill_song_defaults(db, songs):
+
+    ops = []
+    for song in songs:
+        missing = {field: value for field, value in SONG_DEFAULTS.items() if field not in song}
+        if missing:
+            absent = {field: {"$exists": False} for field in missing}
+            ops.append(UpdateOne({"_id": song["_id"], **absent}, {"$set": missing}))
+    return ops
+
+def load_progress(db, name):
+    return db.migrations.find_one({"_id": name})
+
+# Runs one migration to completion, or resumes it. A dry run reads and builds the
+# operations but writes nothing, not even progress. Each batch costs one throttle op
+# for the read plus one per write. Returns the run's progress document.
+def run_migration(db, migration, batch_size=None, ops_per_second=None, dry_run=False, restart=False,
+                  progress=None, throttle=None):
+
+    throttle = throttle or Throttle(ops_per_second)
+    state = None if restart else load_progress(db, migration.name)
+    if state and state.get("done"):
+        return state
+
+    state = state or {"_id": migration.name, "last_id": None, "scanned": 0, "ops": 0, "modified": 0,
+                      "done": False, "started_at": datetime.utcnow()}
+    collection = db[migration.collection]
+
+    for batch in iter_batches(collection, migration.query, migration.projection, batch_size, state["last_id"]):
+        ops = migration.batch_ops(db, batch)
+        throttle.wait(1 + len(ops))
+
+        if ops and not dry_run:
+            state["modified"] += collection.bulk_write(ops, ordered=False).modified_count
+        state["scanned"] += len(batch)
+        state["ops"] += len(ops)
+        state["last_id"] = batch[-1]["_id"]
+        state["updated_at"] = datetime.utcnow()
+        if not dry_run:
+            db.migrations.replace_one({"_id": migration.name}, state, upsert=True)
+        if progress:
+            progress(state)
+
+    state["done"] = True
+    if not dry_run:
+        db.migrations.replace_one({"_id": migration.name}, state, upsert=True)
+    return state
+
+async def _invalidate(namespaces):
+    from mumundo.backend.Cache import cache
+
+    for namespace in namespaces:
+        await cache.invalidate_namespace(namespace)
+    await cache.close()
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mumundo.backend.jobs.migrations",
+        description="Run resumable, throttled data migrations",
+    )
+    parser.add_argument("names", nargs="*", metavar="NAME", help="Migrations to run, in order (default: list them)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start from the first document")
+    parser.add_argument("--batch-size", type=int, help="Documents per batch (default: JOB_BATCH_SIZE or 500)")
+    parser.add_argument("--ops-per-second", type=float, help="Throttle (default: JOB_OPS_PER_SECOND or 1000, 0 disables)")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in MIGRATIONS]
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(unknown)}")
+
+    db = LazyDatabase("SpotifyDB")
+
+    if not args.names:
+        for migration in MIGRATIONS.values():
+            state = load_progress(db, migration.name)
+            status = "done" if state and state.get("done") else "in progress" if state else "not run"
+            print(f"{migration.name:<22} {status:<12} {migration.description}")
+        return 0
+
+    throttle = Throttle(args.ops_per_second)
+    invalidate = set()
+    for name in args.names:
+        migration = MIGRATIONS[name]
+        previous = None if args.restart else load_progress(db, name)
+        if previous and previous.get("done"):
+            print(f"{name}: already done, pass --restart to run it again")
+            continue
+
+        start = time.perf_counter()
+        state = run_migration(db, migration, args.batch_size, dry_run=args.dry_run, restart=args.restart, throttle=throttle)
+
+        verb = "would update" if args.dry_run else "updated"
+        print(f"{name}: scanned {state['scanned']}, {verb} {state['ops'] if args.dry_run else state['modified']} "
+              f"in {time.perf_counter() - start:.1f}s")
+        if not args.dry_run and state["modified"] and migration.invalidates:
+            invalidate.add(migration.invalidates)
+
+    if invalidate:
+        asyncio.run(_invalidate(sorted(invalidate)))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,37 @@
+import argparse
+import time
+from dotenv import find_dotenv, load_dotenv
+
+# Recomputes SpotifyDB.user_stats from the playlists, for drift in the $inc-maintained totals
+#   python -m mumundo.backend.jobs.rebuild_stats [--user USER_ID ...]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mumundo.backend.jobs.rebuild_stats",
+        description="Rebuild per-user library statistics from the playlists",
+    )
+    parser.add_argument("--user", action="append", dest="users", metavar="USER_ID",
+                        help="Only rebuild these users (repeatable, default: everyone)")
+    args = parser.parse_args(argv)
+
+    load_dotenv(find_dotenv(usecwd=True) or find_dotenv())
+
+    from mumundo.backend import LibraryStats
+    from mumundo.backend.MongoHandler import LazyDatabase
+
+    db = LazyDatabase("SpotifyDB")
+    start = time.perf_counter()
+
+    if args.users:
+        for user_id in args.users:
+            LibraryStats.rebuild_user(db, user_id)
+        rebuilt = len(args.users)
+    else:
+        rebuilt = LibraryStats.rebuild_all(db)
+
+    print(f"Rebuilt stats for {rebuilt} user(s) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
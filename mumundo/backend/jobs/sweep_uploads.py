@@ -0,0 +1,33 @@
+import argparse
+from dotenv import find_dotenv, load_dotenv
+
+# Deletes profile picture uploads that no user references any more
+#   python -m mumundo.backend.jobs.sweep_uploads [--dry-run] [--grace-hours N] [--dir PATH]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mumundo.backend.jobs.sweep_uploads",
+        description="Remove unreferenced profile picture uploads",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    parser.add_argument("--grace-hours", type=float, help="Keep files younger than this (default: UPLOAD_GRACE_SECONDS or 24h)")
+    parser.add_argument("--dir", help="Upload directory (default: the one the API serves)")
+    args = parser.parse_args(argv)
+
+    load_dotenv(find_dotenv(usecwd=True) or find_dotenv())
+
+    from mumundo.backend import UploadSweeper
+    from mumundo.backend.MongoHandler import LazyDatabase
+    from mumundo.backend.routes.profile import UPLOAD_DIR
+
+    grace_seconds = args.grace_hours * 3600 if args.grace_hours is not None else None
+    summary = UploadSweeper.sweep(LazyDatabase("MainDB"), args.dir or UPLOAD_DIR, grace_seconds, dry_run=args.dry_run)
+
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {summary['files_removed']} of {summary['files_scanned']} file(s), "
+          f"{summary['bytes_reclaimed'] / 1024 / 1024:.1f} MB reclaimed")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,18 +1,25 @@
 from beanie import Document
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
-class Song(Document):
+# Song fields on their own, so records can be validated without an initialized Beanie
+# (e.g. by the offline ingest job)
+class SongFields(BaseModel):
     Title: str
     Artist: str
+    # The names joined into Artist, kept separately since a name can contain ", "
+    Artists: Optional[List[str]] = None
     Album: str = ""
     Length: int
 
     spotify_id: Optional[str] = None
     preview_url: Optional[str] = None
+    image_url: Optional[str] = None
+
+class Song(Document, SongFields):
 
     class Settings:
         name = "songs"
 
 class SongRequest(BaseModel):
-    spotify_id: str
\ No newline at end of file
+    spotify_id: str
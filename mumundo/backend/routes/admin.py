@@ -1,29 +1,21 @@
-import os
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from bson import ObjectId
 from typing import List
 from datetime import datetime
-from pymongo import MongoClient
-from mumundo.backend.CoreAuth import get_current_user
-from dotenv import load_dotenv
+from mumundo.backend.CoreAuth import get_current_admin
+from mumundo.backend.MongoHandler import LazyDatabase
+from mumundo.backend import OwnerSnapshot, PlaylistDelete, RatingCounts
 
-load_dotenv()
-
-# Load env variables
-MONGODB_URI = os.getenv("MONGODB_URI")
-client = MongoClient(MONGODB_URI)
-db = client.AdminDB
+# MongoDB handle, connected on first use
+db = LazyDatabase("AdminDB")
+playlist_db = LazyDatabase("SpotifyDB")
 
 admin_router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 # GET route for reports on playlists
 @admin_router.get("/reports")
-async def get_reports(current_user = Depends(get_current_user)):
-    # Check if user is admin
-    if not hasattr(current_user, "is_admin") or not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-
+async def get_reports(current_user = Depends(get_current_admin)):
     # Get all reports with playlist and user info
     reports = list(db.playlist_reports.find().sort("created_at", -1))
 
@@ -35,7 +27,7 @@ async def get_reports(current_user = Depends(get_current_user)):
     # Iterate through reports and fetch playlist and user info from MongoDB
     for report in reports:
 
-        playlist = db.playlist.find_one({"_id": ObjectId(report["playlist_id"])})
+        playlist = playlist_db.playlist.find_one({"_id": ObjectId(report["playlist_id"])})
         user = db.users.find_one({"_id": ObjectId(report["user_id"])})
 
         if playlist and user:
@@ -43,6 +35,7 @@ async def get_reports(current_user = Depends(get_current_user)):
                 "id": str(report["_id"]),
                 "playlist_id": report["playlist_id"],
                 "playlist_name": playlist["Title"],
+                "owner": OwnerSnapshot.owner_info(playlist),
                 "user_id": report["user_id"],
                 "username": user["username"],
                 "reason": report["reason"],
@@ -54,11 +47,7 @@ async def get_reports(current_user = Depends(get_current_user)):
 
 # POST route to dismiss a report
 @admin_router.post("/reports/{report_id}/dismiss")
-async def dismiss_report(report_id: str, current_user = Depends(get_current_user)):
-    # Check if user is admin
-    if not hasattr(current_user, "is_admin") or not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-
+async def dismiss_report(report_id: str, current_user = Depends(get_current_admin)):
     # Update report status
     result = db.playlist_reports.update_one(
         {"_id": ObjectId(report_id)},
@@ -72,28 +61,21 @@ async def dismiss_report(report_id: str, current_user = Depends(get_current_user
 
 # POST route to delete a reported playlist
 @admin_router.post("/reports/{report_id}/delete")
-async def delete_reported_playlist(report_id: str, current_user = Depends(get_current_user)):
-
-    if not hasattr(current_user, "is_admin") or not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
+async def delete_reported_playlist(report_id: str, current_user = Depends(get_current_admin)):
 
     report = db.playlist_reports.find_one({"_id": ObjectId(report_id)})
 
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    playlist = db.playlist.find_one({"_id": ObjectId(report["playlist_id"])})
+    # Playlists live in SpotifyDB; deleting goes through the same cleanup as the owner's
+    # delete (similarity index, the owner's playlists and library stats, feed cache)
+    playlist = playlist_db.playlist.find_one({"_id": ObjectId(report["playlist_id"])})
 
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
 
-    db.playlist.delete_one({"_id": ObjectId(report["playlist_id"])})
-
-    # Remove playlist from the offending user's playlists
-    db.users.update_one(
-        {"_id": ObjectId(playlist["User"])},
-        {"$pull": {"playlists": str(report["playlist_id"])}}
-    )
+    await PlaylistDelete.delete_playlist(playlist_db, playlist)
 
     # Update report status
     db.playlist_reports.update_one(
@@ -101,4 +83,13 @@ async def delete_reported_playlist(report_id: str, current_user = Depends(get_cu
         {"$set": {"status": "reviewed", "reviewed_by": str(current_user.id), "reviewed_at": datetime.utcnow()}}
     )
 
-    return {"message": "Reported playlist deleted"}
\ No newline at end of file
+    return {"message": "Reported playlist deleted"}
+
+# POST route to recount playlist Likes/Dislikes from playlist_ratings and fix any drift.
+# It walks the whole collection, so it runs after the response; the report is logged.
+@admin_router.post("/ratings/reconcile", status_code=202)
+async def reconcile_ratings(background_tasks: BackgroundTasks, dry_run: bool = False, current_user = Depends(get_current_admin)):
+
+    background_tasks.add_task(RatingCounts.run_reconcile, playlist_db, repair=not dry_run)
+
+    return {"message": "Rating reconciliation started", "dry_run": dry_run}
@@ -1,74 +1,44 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
-import requests
 import os
-from dotenv import load_dotenv
-from pymongo import MongoClient
+from mumundo.backend.Cache import cache
 from mumundo.backend.models.song import Song
-from mumundo.backend.CoreAuth import get_current_user
+from mumundo.backend.MongoHandler import LazyDatabase
+from mumundo.backend.SpotifyClient import INTERACTIVE, get_spotify_client, spotify_call, spotify_configured
 
-
-load_dotenv()
-
-# Load env variables
-MONGODB_URI = os.getenv("MONGODB_URI")
-client = MongoClient(MONGODB_URI)
-db = client.MusicDB
-
-
-# Spotify API credentials
-SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
-SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
+# MongoDB handle, connected on first use
+db = LazyDatabase("MusicDB")
 
 music_router = APIRouter()
 
-async def get_spotify_token():
+# Spotify search results barely change, so identical queries are answered from the cache
+SEARCH_CACHE_SECONDS = float(os.getenv("SEARCH_CACHE_SECONDS", "300"))
 
-    auth_response = requests.post(
-        "https://accounts.spotify.com/api/token",
-        data={
-            "grant_type": "client_credentials",
-            "client_id": SPOTIFY_CLIENT_ID,
-            "client_secret": SPOTIFY_CLIENT_SECRET,
-        }
-    )
-
-    if auth_response.status_code != 200:
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to get Spotify token"
-        )
-
-    auth_data = auth_response.json()
-    return auth_data["access_token"]
+# Spotify calls go through the shared client and scheduler (token reuse, rate limit, retries)
+def get_spotify():
+    if not spotify_configured():
+        raise HTTPException(status_code=500, detail="Spotify API credentials not configured")
+    return get_spotify_client()
 
 # Song request model
 class SongRequest(BaseModel):
     spotify_id: str
 
 @music_router.get("/search")
-async def search_spotify(query: str, request: Request):
-
-    current_user = await get_current_user(request)
-
-    if current_user:
+async def search_spotify(query: str):
 
-        spotify = get_spotify_client(str(current_user.id))
-        if spotify:
+    # Search is interactive, so it's released ahead of queued import pages
+    cache_key = " ".join(query.lower().split())
+    cached = await cache.get("search", cache_key)
+    if cached is not None:
+        return cached
 
-            results = spotify.search(q=query, type="track", limit=10)
-            items = results.get("tracks", {}).get("items", [])
+    sp = get_spotify()
+    results = await spotify_call("search", sp.search, q=query, type="track", limit=10, priority=INTERACTIVE)
+    items = results.get("tracks", {}).get("items", [])
 
-    else:
-
-        token = await get_spotify_token()
-        headers = {"Authorization": f"Bearer {token}"}
-        params = {"q": query, "type": "track", "limit": 10}
-        response = requests.get("https://api.spotify.com/v1/search", headers=headers, params=params)
-        items = response.json().get("tracks", {}).get("items", [])
-
-    return [{
+    songs = [{
         "spotify_id": i["id"],
         "Title": i["name"],
         "Artist": ", ".join([artist["name"] for artist in i["artists"]]),
@@ -78,22 +48,22 @@ async def search_spotify(query: str, request: Request):
         "image_url": i["album"]["images"][0]["url"] if i["album"]["images"] else None
     } for i in items]
 
-@music_router.post("/", response_model=Song)
-async def add_music(request: SongRequest):
+    if SEARCH_CACHE_SECONDS > 0:
+        await cache.set("search", cache_key, songs, ttl=SEARCH_CACHE_SECONDS)
 
-    token = await get_spotify_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    return songs
 
-    response = requests.get(
-        f"https://api.spotify.com/v1/tracks/{request.spotify_id}",
-        headers=headers
-    )
+@music_router.post("/", response_model=Song)
+async def add_music(request: SongRequest):
 
-    if response.status_code != 200:
+    sp = get_spotify()
+    try:
+        track = await spotify_call("track", sp.track, request.spotify_id, priority=INTERACTIVE)
+    except HTTPException:
+        raise
+    except Exception:
         raise HTTPException(404, "Song not found on Spotify.")
 
-    track = response.json()
-
     existing_song = await Song.find_one({"spotify_id": track["id"]})
 
     if existing_song:
@@ -102,6 +72,7 @@ async def add_music(request: SongRequest):
     song = Song(
         Title=track["name"],
         Artist=", ".join([i["name"] for i in track["artists"]]),
+        Artists=[i["name"] for i in track["artists"]],
         Album=track["album"]["name"],
         Length=track["duration_ms"] // 1000,
         spotify_id=track["id"],
@@ -1,24 +1,26 @@
-from aiohttp.web_fileresponse import FileResponse
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
-from pymongo import MongoClient
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, File, UploadFile, Form
+from fastapi.responses import FileResponse, StreamingResponse
 from beanie import PydanticObjectId
 import os
 import shutil
 from mumundo.backend.Logger import get_logger
+import asyncio
 import uuid
-from mumundo.backend.models.user import User
-from mumundo.backend.CoreAuth import get_current_user
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-
-# Load environment variables
-load_dotenv()
+from typing import Optional
+from mumundo.backend.Cache import cache
+from mumundo.backend.CoreAuth import Principal, get_current_user, invalidate_principal
+from mumundo.backend import Export, Fields, LibraryStats
+from mumundo.backend.MongoHandler import LazyDatabase, get_client
+from mumundo.backend import OwnerSnapshot, UploadSweeper
 
 # Logger initialization
 logger = get_logger("UserProfile")
 
 # Init MongoDB client
+# Playlists live in SpotifyDB and carry a snapshot of their owner's profile
+playlist_db = LazyDatabase("SpotifyDB")
+users_db = LazyDatabase("MainDB")
 
 # Router entry point
 profile_router = APIRouter(prefix="/user", tags=["user"])
@@ -26,23 +28,39 @@ profile_router = APIRouter(prefix="/user", tags=["user"])
 UPLOAD_DIR = os.path.join(os.getcwd(), "backend", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-async def init_db():
-    # Initialize the database connection
-    MONGODB_URI = os.getenv("MONGODB_URI")
+# Response fields of get_profile (for ?fields=). The user document is already loaded by
+# get_current_user (and usually cached), so these only trim the response.
+PROFILE_FIELDS = {
+    name: () for name in ("id", "email", "username", "profile_picture", "created_at", "bio", "is_admin", "profile_picture_url")
+}
+
+# Background maintenance for profile data, started with the app
+def start_profile_jobs():
+    tasks = []
+    if UploadSweeper.SWEEP_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(UploadSweeper.run_periodic_sweep(users_db, UPLOAD_DIR)))
+    return tasks
 
-    client = AsyncIOMotorClient(MONGODB_URI)
-    db = client.MainDB
-    return db
+# Rewrites the owner snapshot on the user's playlists, then drops the feed pages showing the old one
+async def refresh_owner_snapshot(user_id, snapshot):
+    await asyncio.to_thread(OwnerSnapshot.fan_out, playlist_db, user_id, snapshot)
+    await cache.invalidate_namespace("feed")
+
+async def init_db():
+    # Reuse the shared client instead of opening a new one per request
+    return get_client().MainDB
 
 # GET route to fetch user profile
 @profile_router.get("/profile")
-async def get_profile(user: User = Depends(get_current_user)):
+async def get_profile(fields: Optional[str] = None, user: Principal = Depends(get_current_user)):
 
-    logger.error("get_profile")
+    logger.debug("get_profile", sample=0.01)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    user_dict = user.dict()
+    requested = Fields.parse(fields, PROFILE_FIELDS)
+
+    user_dict = user.model_dump()
     user_dict.pop("hashed_password", None)
 
      #create the full URL for the profile picture
@@ -51,15 +69,16 @@ async def get_profile(user: User = Depends(get_current_user)):
     #add the profile picture URL to the response data
     user_dict["profile_picture_url"] = profile_picture_url
 
-    return user_dict
+    return Fields.trim(user_dict, requested)
 
 # POST route to update user profile
 @profile_router.patch("/profile")
 async def update_profile(
+        background_tasks: BackgroundTasks,
         username: str = Form(...),
         bio: str = Form(""),
         profile_picture: UploadFile = File(None),
-        user: User = Depends(get_current_user)
+        user: Principal = Depends(get_current_user)
     ):
 
     if not user:
@@ -84,7 +103,7 @@ async def update_profile(
         update_data["profile_picture"] = unique_filename
 
     db = await init_db()
-    result = db.users.update_one(
+    result = await db.users.update_one(
         {"_id": PydanticObjectId(user.id)},
         {"$set": update_data}
     )
@@ -92,8 +111,29 @@ async def update_profile(
     if result.modified_count == 0:
         raise HTTPException(status_code=400, detail="Update failed")
 
+    await invalidate_principal(user.email)
+
+    # Refresh the owner snapshot on the user's playlists after the response is sent
+    snapshot = OwnerSnapshot.owner_snapshot({
+        "username": username,
+        "profile_picture": update_data.get("profile_picture", user.profile_picture),
+    })
+    if snapshot != OwnerSnapshot.owner_snapshot(user):
+        background_tasks.add_task(refresh_owner_snapshot, str(user.id), snapshot)
+
     return {"message": "Profile updated successfully"}
 
+# GET route to fetch library totals (playlists, tracks, listening time, top artists)
+@profile_router.get("/stats")
+async def get_user_stats(user: Principal = Depends(get_current_user)):
+
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    # Maintained incrementally on import/delete, so this is a single document read
+    stats = await get_client().SpotifyDB.user_stats.find_one({"_id": str(user.id)})
+    return LibraryStats.format_stats(stats)
+
 # GET route to fetch user profile picture
 @profile_router.get("/profile-picture/{user_id}")
 async def get_profile_picture(user_id: str):
@@ -119,14 +159,29 @@ async def get_profile_picture(user_id: str):
 
     return FileResponse(picture_path)
 
+# GET route to stream every track in the user's playlists as NDJSON (default) or CSV
+@profile_router.get("/library/export")
+async def export_library(format: str = "ndjson", user: Principal = Depends(get_current_user)):
+
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if format not in Export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    return StreamingResponse(
+        Export.serialize(Export.library_rows(playlist_db, user.id), format),
+        media_type=Export.MEDIA_TYPES[format],
+        headers=Export.attachment_headers(f"{user.username} library", format)
+    )
+
 # GET route to fetch user selected public playlists
 @profile_router.get("/selected-playlists")
-async def get_user_selected_playlists(user: User = Depends(get_current_user)):
+async def get_user_selected_playlists(user: Principal = Depends(get_current_user)):
     db = await init_db()
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    user_data = db.users.find_one({"_id": PydanticObjectId(user.id)})
+    user_data = await db.users.find_one({"_id": PydanticObjectId(user.id)})
 
     if not user_data or "spotify_selected_playlists" not in user_data:
         return []
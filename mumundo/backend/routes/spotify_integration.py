@@ -1,32 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from pymongo import MongoClient
+from typing import List, Optional
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
 import os
 import re
 from datetime import datetime
-from dotenv import load_dotenv
-from mumundo.backend.CoreAuth import get_current_user
+from mumundo.backend.Cache import cache
+from mumundo.backend.CoreAuth import get_current_user, is_admin
 from mumundo.backend.Logger import get_logger
-
-# Load environment variables
-load_dotenv()
+from mumundo.backend.MongoHandler import AsyncLazyDatabase, LazyDatabase
+from mumundo.backend import Compression, Deadline, Export, Fields, LibraryStats, OrphanGC, OwnerSnapshot, Pagination, PlaylistDelete, PlaylistVersion, RatingCounts, Similarity, SongIngest, Trending
+from mumundo.backend.SongCache import song_cache
+from mumundo.backend.SpotifyClient import get_spotify_client, spotify_call, spotify_configured
 
 # Logger initialization
 logger = get_logger("SpotifyIntegration")
 
-# Init MongoDB client
-MONGODB_URI = os.getenv("MONGODB_URI")
-client = MongoClient(MONGODB_URI)
-db = client.SpotifyDB
-Userdb = client.MainDB
+# MongoDB handles, connected on first use
+db = LazyDatabase("SpotifyDB")
+Userdb = LazyDatabase("MainDB")
+# Motor handle for the read-heavy routes that await (and overlap) their queries
+async_db = AsyncLazyDatabase("SpotifyDB")
 
-# Spotify API credentials (pls dont leak these are tied to me)
-SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
-SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
+# Public feed pages are cached this long; writes that change a page invalidate the "feed" namespace
+FEED_CACHE_SECONDS = float(os.getenv("FEED_CACHE_SECONDS", "30"))
 
 # Router entry point
 
@@ -41,6 +42,10 @@ class SpotifyImportRequest(BaseModel):
     playlistUrl: str
     isPublic: bool = False
 
+class SpotifyBulkImportRequest(BaseModel):
+    playlistUrls: List[str]
+    isPublic: bool = False
+
 class UserInfo(BaseModel):
     id: str
     username: str
@@ -53,168 +58,366 @@ class PlaylistDisplay(BaseModel):
     trackCount: int
     user: UserInfo
 
-playlist_router = APIRouter(prefix="/playlists", tags=["playlist"])
-# POST route to import Spotify playlists to user account
-@playlist_router.post("/import-spotify")
-async def import_spotify_playlist(
-        request: SpotifyImportRequest,
-        current_user = Depends(get_current_user)
-    ):
+class SimilarPlaylistDisplay(PlaylistDisplay):
+    similarity: float
+
+# Response fields of the list and detail routes and the playlist fields each is built from (for ?fields=)
+USER_PLAYLIST_FIELDS = {
+    "id": (),
+    "name": ("Title",),
+    "imageUrl": ("image_url",),
+    "trackCount": ("track_count",),
+    "isPublic": ("IsPublic",),
+}
+
+# Sort orders of a user's playlist list: query value -> (playlist field, descending)
+USER_PLAYLIST_SORTS = {"created_at": ("created_at", True), "name": ("Title", False)}
+MAX_PAGE_SIZE = 200
+
+# Fields the list views render; Songs is left out, trackCount comes from the stored track_count
+LIST_FIELDS = {"Title": 1, "User": 1, "Owner": 1, "image_url": 1, "track_count": 1}
+
+PLAYLIST_DETAIL_FIELDS = {
+    "id": (),
+    "name": ("Title",),
+    "description": ("Description",),
+    "imageUrl": ("image_url",),
+    "trackCount": ("Songs",),
+    "tracks": ("Songs",),
+    "user": ("User", "Owner"),
+    "total_time": ("Total_Time",),
+    "is_public": ("IsPublic",),
+    "created_at": ("created_at",),
+    "likes": ("Likes",),
+    "dislikes": ("Dislikes",),
+}
+
+# Indexes backing the playlist read paths, created once at startup
+def ensure_playlist_indexes():
+    # Keyset pagination of a user's playlists, one index per sort order
+    db.playlist.create_index([("User", 1), ("created_at", -1), ("_id", -1)])
+    db.playlist.create_index([("User", 1), ("Title", 1), ("_id", 1)])
+    Similarity.ensure_indexes(db)
+    Trending.ensure_indexes(db)
+    SongIngest.ensure_indexes(db)
+    RatingCounts.ensure_indexes(db)
+    OrphanGC.ensure_indexes(db)
+
+# Playlists imported before track_count was stored get it counted server-side in one
+# aggregation, so their Songs arrays still never leave the database
+def fill_track_counts(playlists):
+    legacy = [playlist["_id"] for playlist in playlists if "track_count" not in playlist]
+    if legacy:
+        counts = {row["_id"]: row["track_count"] for row in db.playlist.aggregate([
+            {"$match": {"_id": {"$in": legacy}}},
+            {"$project": {"track_count": {"$size": {"$ifNull": ["$Songs", []]}}}},
+        ])}
+        for playlist in playlists:
+            if "track_count" not in playlist:
+                playlist["track_count"] = counts.get(playlist["_id"], 0)
+    return playlists
+
+# Background maintenance for the playlist collections, started with the app
+def start_playlist_jobs():
+    tasks = []
+    if Trending.RESCORE_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(Trending.run_periodic_rescore(db)))
+    if OwnerSnapshot.CHECK_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(OwnerSnapshot.run_periodic_check(db, Userdb)))
+    if RatingCounts.RECONCILE_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(RatingCounts.run_periodic_reconcile(db)))
+    if OrphanGC.GC_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(OrphanGC.run_periodic_sweep(db)))
+    return tasks
 
-    # Basic checks for creds and valid url
-    if not SPOTIFY_CLIENT_ID or not SPOTIFY_CLIENT_SECRET:
-        raise HTTPException(status_code=500, detail="Spotify API credentials not configured")
+playlist_router = APIRouter(prefix="/playlists", tags=["playlist"])
 
-    if "spotify.com/playlist/" not in request.playlistUrl:
-        raise HTTPException(status_code=400, detail="Invalid Spotify playlist URL")
+# Import helpers shared by the single and bulk import routes
 
-    playlist_id = request.playlistUrl.split('playlist/')[-1].split('?')[0]
+def parse_playlist_url(url):
+    if "spotify.com/playlist/" not in url:
+        return None
+    return url.split('playlist/')[-1].split('?')[0]
 
-    sp = spotipy.Spotify(
-        auth_manager=SpotifyClientCredentials(
-            client_id=SPOTIFY_CLIENT_ID,
-            client_secret=SPOTIFY_CLIENT_SECRET
-        )
-    )
+# Playlist metadata plus every track item; imports are background priority in the Spotify scheduler
+async def fetch_spotify_playlist(sp, spotify_playlist_id):
 
     try:
-        playlist = sp.playlist(playlist_id)
+        playlist = await spotify_call("playlist", sp.playlist, spotify_playlist_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Playlist not found: {str(e)}")
 
     tracks = []
-    results = sp.playlist_tracks(playlist_id)
+    results = await spotify_call("playlist_tracks", sp.playlist_tracks, spotify_playlist_id)
     tracks.extend(results["items"])
 
     while results["next"]:
-        results = sp.next(results)
+        results = await spotify_call("playlist_tracks", sp.next, results)
         tracks.extend(results["items"])
 
-    # Clean up the playlist name to avoid invalid characters
-    clean_name = re.sub(r'[\\/*?:"<>|]', "", playlist["name"])
+    # Removed tracks come back as null and local files have no Spotify id
+    return playlist, [item["track"] for item in tracks if item["track"] and item["track"].get("id")]
+
+def song_from_track(track):
+
+    album_name = ""
+    album_image = ""
+    if "album" in track:
+        album_name = track["album"]["name"]
+        if track["album"]["images"] and len(track["album"]["images"]) > 0:
+            album_image = track["album"]["images"][0]["url"]
+
+    return {
+        "Title": track["name"],
+        "Artist": ", ".join([artist["name"] for artist in track["artists"]]),
+        "Artists": [artist["name"] for artist in track["artists"]],
+        "Album": album_name,
+        "Length": track["duration_ms"] // 1000,
+        "spotify_id": track["id"],
+        "preview_url": track.get("preview_url"),
+        "image_url": album_image
+    }
+
+SONG_LOOKUP_BATCH = 1000
+
+def find_songs(spotify_ids):
+    songs = {}
+    for start in range(0, len(spotify_ids), SONG_LOOKUP_BATCH):
+        batch = spotify_ids[start:start + SONG_LOOKUP_BATCH]
+        for song in db.song.find({"spotify_id": {"$in": batch}}):
+            songs.setdefault(song["spotify_id"], song)
+    return songs
+
+# One deduplicated pass over every track being imported: existing songs are found
+# with batched $in lookups and the rest are upserted by spotify_id in one unordered
+# bulk_write. spotify_id is unique, so a concurrent import of the same track matches
+# the song it inserted instead of adding a duplicate. Blocking, run it in a thread.
+# Returns (songs by spotify_id, ids of newly inserted songs).
+def resolve_songs(tracks):
+
+    unique_tracks = {}
+    for track in tracks:
+        unique_tracks.setdefault(track["id"], track)
+
+    songs = find_songs(list(unique_tracks))
+    missing = [spotify_id for spotify_id in unique_tracks if spotify_id not in songs]
+    if not missing:
+        return songs, []
+
+    operations = []
+    for spotify_id in missing:
+        song = song_from_track(unique_tracks[spotify_id])
+        del song["spotify_id"]
+        operations.append(UpdateOne({"spotify_id": spotify_id}, {"$setOnInsert": song}, upsert=True))
+    try:
+        new_song_ids = list(db.song.bulk_write(operations, ordered=False).upserted_ids.values())
+    except BulkWriteError as e:
+        # Two concurrent upserts of one new track: one inserts, the other hits the unique index
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        new_song_ids = [upserted["_id"] for upserted in e.details["upserted"]]
+
+    songs.update(find_songs(missing))
+    return songs, new_song_ids
+
+def build_playlist(spotify_playlist, tracks, songs, current_user, is_public):
 
     image_url = ""
-    if playlist["images"] and len(playlist["images"]) > 0:
-        image_url = playlist["images"][0]["url"]
+    if spotify_playlist["images"] and len(spotify_playlist["images"]) > 0:
+        image_url = spotify_playlist["images"][0]["url"]
+
+    playlist_songs = [songs[track["id"]] for track in tracks]
 
     new_playlist = {
-        "Title": clean_name,
+        # Clean up the playlist name to avoid invalid characters
+        "Title": re.sub(r'[\\/*?:"<>|]', "", spotify_playlist["name"]),
         "User": str(current_user.id),
-        "Songs": [],
-        "spotify_id": playlist["id"],
-        "IsPublic": request.isPublic,
+        "Owner": OwnerSnapshot.owner_snapshot(current_user),
+        "Songs": [ObjectId(song["_id"]) for song in playlist_songs],
+        "spotify_id": spotify_playlist["id"],
+        "IsPublic": is_public,
         "created_at": datetime.utcnow(),
         "image_url": image_url,
         "Likes": 0,
         "Dislikes": 0,
         "Saves": 0,
-        "Total_Time": 0
+        "Total_Time": sum(song["Length"] for song in playlist_songs),
+        "track_count": len(playlist_songs),
+        "version": 1
     }
+    new_playlist["trending_score"] = Trending.score_playlist(new_playlist)
+    return new_playlist, playlist_songs
 
-    playlist_result = db.playlist.insert_one(new_playlist)
-    playlist_id = playlist_result.inserted_id
-
-    track_count = 0
-    total_time = 0
+# Writes the playlists with one insert_many and updates everything derived from them:
+# one bulk write to the similarity index and one $inc to the owner's library stats.
+# Blocking, run it in a thread.
+def write_playlists(playlists, current_user):
 
-    for track_item in tracks:
-        if not track_item["track"]:
-            continue
+    playlist_ids = db.playlist.insert_many([playlist for playlist, _ in playlists]).inserted_ids
 
-        track = track_item["track"]
+    db.users.update_one(
+        {"_id": ObjectId(current_user.id)},
+        {"$push": {"playlists": {"$each": [str(playlist_id) for playlist_id in playlist_ids]}}}
+    )
 
-        existing_song = db.song.find_one({"spotify_id": track["id"]})
+    Similarity.index_playlists(db, [
+        (playlist_id, playlist["Songs"], playlist["IsPublic"]) for (playlist, _), playlist_id in zip(playlists, playlist_ids)
+    ])
+    LibraryStats.apply_playlists(db, current_user.id, [playlist_songs for _, playlist_songs in playlists])
 
-        if not existing_song:
-            artists = ", ".join([artist["name"] for artist in track["artists"]])
+    return playlist_ids
 
-            album_name = ""
-            album_image = ""
-            if "album" in track:
-                album_name = track["album"]["name"]
-                if track["album"]["images"] and len(track["album"]["images"]) > 0:
-                    album_image = track["album"]["images"][0]["url"]
+async def save_playlists(playlists, current_user, new_song_ids):
 
-            new_song = {
-                "Title": track["name"],
-                "Artist": artists,
-                "Album": album_name,
-                "Length": track["duration_ms"] // 1000,
-                "spotify_id": track["id"],
-                "preview_url": track.get("preview_url"),
-                "image_url": album_image
-            }
+    playlist_ids = await asyncio.to_thread(write_playlists, playlists, current_user)
 
-            song_result = db.song.insert_one(new_song)
-            song_id = song_result.inserted_id
+    # One invalidation message for the whole import rather than one per song
+    if new_song_ids:
+        await cache.invalidate("song", *new_song_ids)
+    if any(playlist["IsPublic"] for playlist, _ in playlists):
+        await cache.invalidate_namespace("feed")
 
-            db.playlist.update_one(
-                {"_id": playlist_id},
-                {"$push": {"Songs": ObjectId(song_id)}}
-            )
+    return playlist_ids
 
-            total_time += new_song["Length"]
-        else:
-            db.playlist.update_one(
-                {"_id": playlist_id},
-                {"$push": {"Songs": ObjectId(existing_song["_id"])}}
-            )
+# POST route to import Spotify playlists to user account
+@playlist_router.post("/import-spotify")
+async def import_spotify_playlist(
+        request: SpotifyImportRequest,
+        current_user = Depends(get_current_user)
+    ):
 
-            total_time += existing_song["Length"]
+    # Basic checks for creds and valid url
+    if not spotify_configured():
+        raise HTTPException(status_code=500, detail="Spotify API credentials not configured")
 
-        track_count += 1
+    spotify_playlist_id = parse_playlist_url(request.playlistUrl)
+    if spotify_playlist_id is None:
+        raise HTTPException(status_code=400, detail="Invalid Spotify playlist URL")
 
-    db.playlist.update_one(
-        {"_id": playlist_id},
-        {"$set": {"Total_Time": total_time}}
-    )
+    sp = get_spotify_client()
+    spotify_playlist, tracks = await fetch_spotify_playlist(sp, spotify_playlist_id)
 
-    db.users.update_one(
-        {"_id": ObjectId(current_user.id)},
-        {"$push": {"playlists": str(playlist_id)}}
-    )
+    songs, new_song_ids = await asyncio.to_thread(resolve_songs, tracks)
+    new_playlist, playlist_songs = build_playlist(spotify_playlist, tracks, songs, current_user, request.isPublic)
+    playlist_id, = await save_playlists([(new_playlist, playlist_songs)], current_user, new_song_ids)
 
     return {
         "message": "Playlist imported successfully",
         "playlist_id": str(playlist_id),
-        "title": clean_name,
-        "track_count": track_count,
+        "title": new_playlist["Title"],
+        "track_count": len(playlist_songs),
         "is_public": request.isPublic,
-        "image_url": image_url
+        "image_url": new_playlist["image_url"]
+    }
+
+MAX_BULK_IMPORT = 50
+
+# POST route to import many Spotify playlists at once. Playlists are fetched
+# concurrently (the Spotify scheduler still caps the request rate), songs shared
+# between them are resolved once, and all playlists are written together.
+@playlist_router.post("/import-spotify/bulk")
+async def bulk_import_spotify_playlists(
+        request: SpotifyBulkImportRequest,
+        current_user = Depends(get_current_user)
+    ):
+
+    if not spotify_configured():
+        raise HTTPException(status_code=500, detail="Spotify API credentials not configured")
+
+    if not request.playlistUrls:
+        raise HTTPException(status_code=400, detail="No playlist URLs given")
+    if len(request.playlistUrls) > MAX_BULK_IMPORT:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IMPORT} playlists per request")
+
+    sp = get_spotify_client()
+    urls = list(dict.fromkeys(request.playlistUrls))
+    spotify_ids = [parse_playlist_url(url) for url in urls]
+
+    fetched = await asyncio.gather(
+        *(fetch_spotify_playlist(sp, spotify_id) for spotify_id in spotify_ids if spotify_id),
+        return_exceptions=True
+    )
+    fetched = iter(fetched)
+
+    results = []
+    imported = []
+    for url, spotify_id in zip(urls, spotify_ids):
+        if spotify_id is None:
+            results.append({"url": url, "error": "Invalid Spotify playlist URL"})
+            continue
+        outcome = next(fetched)
+        if isinstance(outcome, HTTPException):
+            results.append({"url": url, "error": outcome.detail})
+        elif isinstance(outcome, Exception):
+            results.append({"url": url, "error": str(outcome)})
+        else:
+            imported.append((url, outcome))
+            results.append(None)
+
+    if imported:
+        songs, new_song_ids = await asyncio.to_thread(
+            resolve_songs, [track for _, (_, tracks) in imported for track in tracks]
+        )
+        playlists = [
+            build_playlist(spotify_playlist, tracks, songs, current_user, request.isPublic)
+            for _, (spotify_playlist, tracks) in imported
+        ]
+        playlist_ids = iter(await save_playlists(playlists, current_user, new_song_ids))
+        playlists = iter(playlists)
+
+        for index, result in enumerate(results):
+            if result is None:
+                playlist, playlist_songs = next(playlists)
+                results[index] = {
+                    "url": urls[index],
+                    "playlist_id": str(next(playlist_ids)),
+                    "title": playlist["Title"],
+                    "track_count": len(playlist_songs)
+                }
+
+    return {
+        "message": f"Imported {len(imported)} of {len(urls)} playlists",
+        "is_public": request.isPublic,
+        "results": results
     }
 
 # GET route to fetch public playlists
 @playlist_router.get("/public", response_model=List[PlaylistDisplay])
-async def get_public_playlists():
-
-    public_playlists = list(db.playlist.find({"IsPublic": True}))
+async def get_public_playlists(request: Request, sort: Optional[str] = None, limit: int = 50):
+
+    # Cached pages hold the rendered JSON plus its gzip/brotli variants
+    cache_key = f"{sort}:{limit}" if sort else "all"
+    cached = await cache.get("feed", cache_key)
+    if cached is not None:
+        return Compression.negotiated_response(request, cached)
+
+    if sort == "trending":
+        # Index-ordered read on (IsPublic, trending_score)
+        limit = max(1, min(limit, 100))
+        public_playlists = list(
+            db.playlist.find({"IsPublic": True}, LIST_FIELDS).sort("trending_score", -1).limit(limit)
+        )
+    elif sort is None:
+        public_playlists = list(db.playlist.find({"IsPublic": True}, LIST_FIELDS))
+    else:
+        raise HTTPException(status_code=400, detail="sort must be 'trending'")
 
     if not public_playlists:
         return []
 
+    fill_track_counts(public_playlists)
     response_playlists = []
 
-    # BUG FIX: Something wrong with da profile pic displaying :(
+    # Owner details come from the snapshot embedded on each playlist
     for playlist in public_playlists:
 
-        user_id = playlist.get("User")
-        user = Userdb.users.find_one({"_id": ObjectId(user_id)})
-        if user:
-            user_info = UserInfo(
-                id=str(user["_id"]),
-                username=user["username"],
-                profilePicture=user.get("profile_picture", "default.jpg")
-            )
-        else:
-            user_info = UserInfo(
-                id=str(user_id),
-                username="Unknown User",
-                profilePicture="default.jpg"
-            )
+        user_info = UserInfo(**OwnerSnapshot.owner_info(playlist))
 
         image_url = playlist.get("image_url", "")
 
-        track_count = len(playlist.get("Songs", []))
+        track_count = playlist["track_count"]
 
         response_playlists.append(
             PlaylistDisplay(
@@ -223,32 +426,72 @@ async def get_public_playlists():
                 imageUrl=image_url,
                 trackCount=track_count,
                 user=user_info
-            )
+            ).model_dump()
         )
 
-    return response_playlists
+    if FEED_CACHE_SECONDS <= 0:
+        return response_playlists
+
+    variants = await Compression.encode_variants(JSONResponse(response_playlists).body)
+    await cache.set("feed", cache_key, variants, ttl=FEED_CACHE_SECONDS)
+    return Compression.negotiated_response(request, variants)
 
 # GET route to fetch playlists for the current user
 @playlist_router.get("/user")
-async def get_user_playlists(current_user = Depends(get_current_user)):
+async def get_user_playlists(
+        response: Response,
+        fields: Optional[str] = None,
+        sort: str = "created_at",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        current_user = Depends(get_current_user)
+    ):
+
+    requested = Fields.parse(fields, USER_PLAYLIST_FIELDS)
+    if sort not in USER_PLAYLIST_SORTS:
+        raise HTTPException(status_code=400, detail="sort must be 'created_at' or 'name'")
+    sort_field, descending = USER_PLAYLIST_SORTS[sort]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    # Keyset page: continues after the cursor's (sort value, _id), the next cursor goes in a header
+    query = {"User": str(current_user.id)}
+    if cursor:
+        value, last_id = Pagination.decode_cursor(cursor, sort)
+        query = {"$and": [query, Pagination.after(sort_field, value, last_id, descending)]}
+
+    projection = Fields.projection(requested, USER_PLAYLIST_FIELDS) or {
+        field: 1 for sources in USER_PLAYLIST_FIELDS.values() for field in sources
+    }
+    projection[sort_field] = 1
+
     try:
 
-        # Find all playlists for the current user
-        user_playlists = list(db.playlist.find({"User": str(current_user.id)}))
+        # One extra row tells whether another page follows
+        user_playlists = list(
+            db.playlist.find(query, projection).sort(Pagination.sort_spec(sort_field, descending)).limit(limit + 1)
+        )
+
+        if len(user_playlists) > limit:
+            user_playlists = user_playlists[:limit]
+            last = user_playlists[-1]
+            response.headers[Pagination.HEADER] = Pagination.encode_cursor(sort, last.get(sort_field), last["_id"])
 
         if not user_playlists:
             return []
 
+        if Fields.wanted(requested, "trackCount"):
+            fill_track_counts(user_playlists)
+
         formatted_playlists = []
 
         for playlist in user_playlists:
-            formatted_playlists.append({
+            formatted_playlists.append(Fields.trim({
                 "id": str(playlist["_id"]),
-                "name": playlist["Title"],
+                "name": playlist.get("Title"),
                 "imageUrl": playlist.get("image_url", ""),
-                "trackCount": len(playlist.get("Songs", [])),
+                "trackCount": playlist.get("track_count", 0),
                 "isPublic": playlist.get("IsPublic", False)
-            })
+            }, requested))
 
         return formatted_playlists
 
@@ -259,39 +502,44 @@ async def get_user_playlists(current_user = Depends(get_current_user)):
         )
 
 # GET route to fetch playlist details
+# The deadline covers every read of the request; its 504 is raised outside the handler's 404 fallback
 @playlist_router.get("/{playlist_id}")
-async def get_playlist_detail(playlist_id: str):
+@Deadline.deadline("playlist_detail")
+async def get_playlist_detail(playlist_id: str, request: Request, response: Response, fields: Optional[str] = None):
+
+    requested = Fields.parse(fields, PLAYLIST_DETAIL_FIELDS)
+
+    # Revalidation only reads the version, never the songs. Each field selection is its own representation.
+    if request.headers.get("if-none-match"):
+        version = await PlaylistVersion.load_version(async_db, playlist_id)
+        tag = PlaylistVersion.etag(playlist_id, version, Fields.key(requested))
+        if version is not None and PlaylistVersion.matches(request, tag):
+            return Response(status_code=304, headers=PlaylistVersion.headers(tag))
 
     try:
-        playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)})
+        projection = Fields.projection(requested, PLAYLIST_DETAIL_FIELDS)
+        playlist = await async_db.playlist.find_one(
+            {"_id": ObjectId(playlist_id)}, None if projection is None else {**projection, "version": 1}
+        )
 
         if not playlist:
             raise HTTPException(status_code=404, detail="Playlist not found")
 
-        user_id = playlist.get("User")
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        response.headers.update(PlaylistVersion.headers(
+            PlaylistVersion.etag(playlist_id, playlist.get("version"), Fields.key(requested))
+        ))
 
-        if user:
-            user_info = {
-                "id": str(user["_id"]),
-                "username": user["username"],
-                "profilePicture": user.get("profile_picture", "default.jpg")
-            }
-        else:
-            user_info = {
-                "id": str(user_id),
-                "username": "Unknown User",
-                "profilePicture": "default.jpg"
-            }
+        user_info = OwnerSnapshot.owner_info(playlist)
 
         # Get songs
         songs_data = []
         song_ids = [ObjectId(song_id) for song_id in playlist.get("Songs", [])]
 
-        if song_ids:
-            songs = list(db.song.find({"_id": {"$in": song_ids}}))
+        if song_ids and Fields.wanted(requested, "tracks"):
+            # Popular songs are served from the shared cache, misses are fetched concurrently in $in chunks
+            songs = await song_cache.get_many_async(song_ids)
 
-            for song in songs:
+            for song in (songs[song_id] for song_id in song_ids if song_id in songs):
                 songs_data.append({
                     "id": str(song["_id"]),
                     "name": song["Title"],
@@ -316,9 +564,9 @@ async def get_playlist_detail(playlist_id: str):
         formatted_time = " ".join(time_parts)
 
         # Return formatted playlist
-        return {
+        return Fields.trim({
             "id": str(playlist["_id"]),
-            "name": playlist["Title"],
+            "name": playlist.get("Title"),
             "description": playlist.get("Description", ""),
             "imageUrl": playlist.get("image_url", ""),
             "trackCount": len(song_ids),
@@ -329,11 +577,86 @@ async def get_playlist_detail(playlist_id: str):
             "created_at": playlist.get("created_at", "").isoformat() if playlist.get("created_at") else None,
             "likes": playlist.get("Likes", 0),
             "dislikes": playlist.get("Dislikes", 0)
-        }
+        }, requested)
 
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Error fetching playlist: {str(e)}")
 
+# GET route to stream a playlist's tracks as NDJSON (default) or CSV
+@playlist_router.get("/{playlist_id}/export")
+async def export_playlist(
+        playlist_id: str,
+        format: str = "ndjson",
+        current_user = Depends(get_current_user)
+    ):
+
+    if format not in Export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    if not ObjectId.is_valid(playlist_id):
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)}, {"Title": 1, "User": 1, "IsPublic": 1})
+    if not playlist:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    # Private playlists can only be exported by their owner or an admin (checked last,
+    # it costs a read)
+    is_owner = playlist["User"] == str(current_user.id)
+    if not (playlist.get("IsPublic") or is_owner or await is_admin(current_user)):
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+    batches = Export.playlist_rows(db, playlist["_id"], playlist.get("Title", ""))
+    return StreamingResponse(
+        Export.serialize(batches, format),
+        media_type=Export.MEDIA_TYPES[format],
+        headers=Export.attachment_headers(playlist.get("Title", ""), format)
+    )
+
+# GET route to fetch public playlists similar to a playlist (MinHash/LSH over song sets)
+@playlist_router.get("/{playlist_id}/similar", response_model=List[SimilarPlaylistDisplay])
+async def get_similar_playlists(playlist_id: str, limit: int = 10):
+
+    if not ObjectId.is_valid(playlist_id):
+        raise HTTPException(status_code=404, detail="Playlist not found")
+
+    limit = max(1, min(limit, 50))
+    matches = Similarity.find_similar(db, playlist_id, limit=limit)
+
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    if not matches:
+        return []
+
+    playlists = {
+        playlist["_id"]: playlist
+        for playlist in db.playlist.find(
+            {"_id": {"$in": [match_id for match_id, _ in matches]}},
+            LIST_FIELDS
+        )
+    }
+    fill_track_counts(list(playlists.values()))
+
+    response_playlists = []
+    for match_id, similarity in matches:
+        playlist = playlists.get(match_id)
+        if not playlist:
+            # Deleted elsewhere without going through delete_playlist, drop the stale entry
+            Similarity.remove_playlist(db, match_id)
+            continue
+
+        response_playlists.append(
+            SimilarPlaylistDisplay(
+                id=str(playlist["_id"]),
+                name=playlist["Title"],
+                imageUrl=playlist.get("image_url", ""),
+                trackCount=playlist["track_count"],
+                user=UserInfo(**OwnerSnapshot.owner_info(playlist)),
+                similarity=similarity
+            )
+        )
+
+    return response_playlists
+
 # PATCH route to update playlist visibility
 @playlist_router.patch("/{playlist_id}/visibility")
 async def update_playlist_visibility(
@@ -361,8 +684,10 @@ async def update_playlist_visibility(
 
         db.playlist.update_one(
             {"_id": ObjectId(playlist_id)},
-            {"$set": {"IsPublic": is_public}}
+            PlaylistVersion.bump({"$set": {"IsPublic": is_public}})
         )
+        Similarity.set_visibility(db, playlist_id, is_public)
+        await cache.invalidate_namespace("feed")
 
         return {"message": "Playlist visibility updated", "isPublic": is_public}
 
@@ -384,19 +709,14 @@ async def delete_playlist(
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
 
-    # Check if user is owner or admin
+    # Check if user is owner or admin (only non-owners pay for the admin read)
     is_owner = playlist["User"] == str(current_user.id)
-    is_admin = hasattr(current_user, "is_admin") and current_user.is_admin
 
-    if not (is_owner or is_admin):
+    if not (is_owner or await is_admin(current_user)):
         raise HTTPException(status_code=403, detail="Permission denied")
 
-    # Delete playlist
-    db.playlist.delete_one({"_id": ObjectId(playlist_id)})
-    db.users.update_one(
-        {"_id": ObjectId(playlist["User"])},
-        {"$pull": {"playlists": str(playlist_id)}}
-    )
+    # Delete playlist and everything derived from it
+    await PlaylistDelete.delete_playlist(db, playlist)
 
     return {"message": "Playlist deleted successfully"}
 
@@ -411,56 +731,51 @@ async def rate_playlist(
     if rating.type not in ["like", "dislike"]:
         raise HTTPException(status_code=400, detail="Rating must be 'like' or 'dislike'")
 
-    playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)})
+    # The playlist and the caller's existing rating are independent reads
+    async with Deadline.deadline("rate_playlist"):
+        playlist, existing_rating = await asyncio.gather(
+            async_db.playlist.find_one({"_id": ObjectId(playlist_id)}, {"_id": 1}),
+            async_db.playlist_ratings.find_one({
+                "playlist_id": str(playlist_id),
+                "user_id": str(current_user.id)
+            })
+        )
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
 
-    # Check for existing rating
-    existing_rating = db.playlist_ratings.find_one({
-        "playlist_id": str(playlist_id),
-        "user_id": str(current_user.id)
-    })
+    # Writes stay outside the deadline: cancelling between them would leave the counters
+    # out of step with the ratings (RatingCounts.reconcile would repair it, but later).
+    # The rating is written before the version bump, so a get_ratings that sees the new
+    # version (and ETag) also sees the new rating.
+    update_field = "Likes" if rating.type == "like" else "Dislikes"
 
     if existing_rating:
         # Update existing rating
         if existing_rating["type"] != rating.type:
-            # Update counts in playlist
-            update_fields = {}
-            if existing_rating["type"] == "like":
-                update_fields["Likes"] = playlist["Likes"] - 1
-            else:
-                update_fields["Dislikes"] = playlist["Dislikes"] - 1
-
-            if rating.type == "like":
-                update_fields["Likes"] = playlist["Likes"] + 1
-            else:
-                update_fields["Dislikes"] = playlist["Dislikes"] + 1
-
-            db.playlist.update_one(
-                {"_id": ObjectId(playlist_id)},
-                {"$set": update_fields}
-            )
-
-            # Update rating
-            db.playlist_ratings.update_one(
+            previous_field = "Likes" if existing_rating["type"] == "like" else "Dislikes"
+            await async_db.playlist_ratings.update_one(
                 {"_id": existing_rating["_id"]},
                 {"$set": {"type": rating.type, "updated_at": datetime.utcnow()}}
             )
+            await async_db.playlist.update_one(
+                {"_id": ObjectId(playlist_id)},
+                PlaylistVersion.bump({"$inc": {previous_field: -1, update_field: 1}})
+            )
+            await Trending.rescore_playlist_async(async_db, playlist_id)
 
         return {"message": "Rating updated", "type": rating.type}
     else:
-        db.playlist_ratings.insert_one({
+        await async_db.playlist_ratings.insert_one({
             "playlist_id": str(playlist_id),
             "user_id": str(current_user.id),
             "type": rating.type,
             "created_at": datetime.utcnow()
         })
-
-        update_field = "Likes" if rating.type == "like" else "Dislikes"
-        db.playlist.update_one(
+        await async_db.playlist.update_one(
             {"_id": ObjectId(playlist_id)},
-            {"$inc": {update_field: 1}}
+            PlaylistVersion.bump({"$inc": {update_field: 1}})
         )
+        await Trending.rescore_playlist_async(async_db, playlist_id)
 
         return {"message": "Rating added", "type": rating.type}
 
@@ -471,26 +786,28 @@ async def delete_rating(
         current_user = Depends(get_current_user)
     ):
 
-    playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)})
+    async with Deadline.deadline("delete_rating"):
+        playlist, existing_rating = await asyncio.gather(
+            async_db.playlist.find_one({"_id": ObjectId(playlist_id)}, {"_id": 1}),
+            async_db.playlist_ratings.find_one({
+                "playlist_id": str(playlist_id),
+                "user_id": str(current_user.id)
+            })
+        )
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
-
-    # Find existing rating
-    existing_rating = db.playlist_ratings.find_one({
-        "playlist_id": str(playlist_id),
-        "user_id": str(current_user.id)
-    })
-
     if not existing_rating:
         raise HTTPException(status_code=404, detail="No rating found")
 
-    update_field = "Likes" if existing_rating["type"] == "like" else "Dislikes"
-    db.playlist.update_one(
-        {"_id": ObjectId(playlist_id)},
-        {"$inc": {update_field: -1}}
-    )
-
-    db.playlist_ratings.delete_one({"_id": existing_rating["_id"]})
+    # The rating goes first: once the version changes, get_ratings must already see it gone
+    result = await async_db.playlist_ratings.delete_one({"_id": existing_rating["_id"]})
+    if result.deleted_count:
+        update_field = "Likes" if existing_rating["type"] == "like" else "Dislikes"
+        await async_db.playlist.update_one(
+            {"_id": ObjectId(playlist_id)},
+            PlaylistVersion.bump({"$inc": {update_field: -1}})
+        )
+        await Trending.rescore_playlist_async(async_db, playlist_id)
 
     return {"message": "Rating removed"}
 
@@ -498,18 +815,30 @@ async def delete_rating(
 @playlist_router.get("/{playlist_id}/ratings")
 async def get_ratings(
         playlist_id: str,
+        request: Request,
+        response: Response,
         current_user = Depends(get_current_user)
     ):
 
-    playlist = db.playlist.find_one({"_id": ObjectId(playlist_id)})
+    # The counters and the caller's rating are read together; a revalidation costs the
+    # same single round trip as a full read
+    async with Deadline.deadline("playlist_ratings"):
+        playlist, user_rating = await asyncio.gather(
+            async_db.playlist.find_one({"_id": ObjectId(playlist_id)}, {"Likes": 1, "Dislikes": 1, "version": 1}),
+            async_db.playlist_ratings.find_one({
+                "playlist_id": str(playlist_id),
+                "user_id": str(current_user.id)
+            })
+        )
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
 
-    # Get user's rating
-    user_rating = db.playlist_ratings.find_one({
-        "playlist_id": str(playlist_id),
-        "user_id": str(current_user.id)
-    })
+    # The caller's own rating is part of the body, so the tag varies per user
+    tag = PlaylistVersion.etag(playlist_id, playlist.get("version"), current_user.id)
+    if PlaylistVersion.matches(request, tag):
+        return Response(status_code=304, headers=PlaylistVersion.headers(tag))
+
+    response.headers.update(PlaylistVersion.headers(tag))
 
     rating_type = user_rating["type"] if user_rating else None
 
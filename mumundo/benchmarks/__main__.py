@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from mumundo.benchmarks.harness import (
+    PROFILES,
+    SCENARIOS,
+    find_regressions,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mumundo.benchmarks",
+        description="Offline latency/throughput benchmarks for the Mumundo API",
+    )
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="full")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Overwrite the baseline with this run's results")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative regression before failing (default: 0.25)")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON results")
+    args = parser.parse_args(argv)
+
+    unknown = sorted(set(args.scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = asyncio.run(run_benchmarks(args.scenarios or None, args.profile))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'scenario':<18}{'n':>6}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'req/s':>12}")
+        for r in results.values():
+            print(f"{r['scenario']:<18}{r['iterations']:>6}{r['p50_ms']:>12}"
+                  f"{r['p95_ms']:>12}{r['p99_ms']:>12}{r['throughput_rps']:>12}")
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, load_baseline(args.baseline), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
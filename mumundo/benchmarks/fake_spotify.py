@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAGE_LIMIT = 100
+
+# Minimal stand-in for the Spotify Web API, enough for spotipy's client
+# credentials flow, playlist import, search and track lookups
+class FakeSpotifyServer:
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.playlists = {}
+        self.requests = 0
+        self.rate_limited = 0
+        self._throttle_remaining = 0
+        self._retry_after = 1
+        self._delay_seconds = 0.0
+        self._delay_remaining = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        return f"{self.base_url}/v1/"
+
+    @property
+    def token_url(self):
+        return f"{self.base_url}/api/token"
+
+    # Playlists created with the same track_prefix share their tracks
+    def add_playlist(self, playlist_id, track_count, name=None, track_prefix=None):
+        self.playlists[playlist_id] = {
+            "name": name or f"Playlist {playlist_id}",
+            "track_count": track_count,
+            "track_prefix": track_prefix or playlist_id,
+        }
+
+    # Answer the next `count` API requests with 429 and a Retry-After header
+    def throttle(self, count, retry_after=1):
+        with self._lock:
+            self._throttle_remaining = count
+            self._retry_after = retry_after
+
+    # Hold the next `count` API requests (every one when count is None) for `seconds`
+    # before answering, like a slow or hung upstream; delay(0) clears it
+    def delay(self, seconds, count=None):
+        with self._lock:
+            self._delay_seconds = seconds
+            self._delay_remaining = count
+
+    def _take_delay(self):
+        with self._lock:
+            if self._delay_seconds <= 0 or self._delay_remaining == 0:
+                return 0.0
+            if self._delay_remaining is not None:
+                self._delay_remaining -= 1
+            return self._delay_seconds
+
+    def _take_throttle(self):
+        with self._lock:
+            if self._throttle_remaining <= 0:
+                return None
+            self._throttle_remaining -= 1
+            self.rate_limited += 1
+            return self._retry_after
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Response builders
+
+    def track(self, track_id):
+        seed = zlib.crc32(track_id.encode("utf-8"))
+        return {
+            "id": track_id,
+            "name": f"Track {track_id}",
+            "duration_ms": 180000 + (seed % 60) * 1000,
+            "preview_url": None,
+            "artists": [{"name": f"Artist {seed % 500}"}],
+            "album": {
+                "name": f"Album {seed % 2000}",
+                "images": [{"url": f"https://img.example/{track_id}.jpg"}],
+            },
+        }
+
+    def tracks_page(self, playlist_id, offset, limit):
+        total = self.playlists[playlist_id]["track_count"]
+        prefix = self.playlists[playlist_id]["track_prefix"]
+        end = min(offset + limit, total)
+        items = [{"track": self.track(f"{prefix}t{i}")} for i in range(offset, end)]
+        next_url = None
+        if end < total:
+            next_url = f"{self.api_url}playlists/{playlist_id}/tracks?offset={end}&limit={limit}"
+        return {"items": items, "next": next_url, "total": total, "offset": offset, "limit": limit}
+
+    def playlist(self, playlist_id):
+        data = self.playlists[playlist_id]
+        return {
+            "id": playlist_id,
+            "name": data["name"],
+            "images": [{"url": f"https://img.example/{playlist_id}.jpg"}],
+            "tracks": self.tracks_page(playlist_id, 0, PAGE_LIMIT),
+        }
+
+    def search(self, query, limit):
+        seed = zlib.crc32(query.encode("utf-8")) % 1000
+        return {"tracks": {"items": [self.track(f"search{seed}x{i}") for i in range(limit)]}}
+
+
+def _make_handler(server):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _not_found(self):
+            self._send(404, {"error": {"status": 404, "message": "Not found."}})
+
+        def do_POST(self):
+            server.requests += 1
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            if urlparse(self.path).path != "/api/token":
+                return self._not_found()
+            self._send(200, {"access_token": "fake-token", "token_type": "Bearer", "expires_in": 3600})
+
+        def do_GET(self):
+            server.requests += 1
+            delay = server._take_delay()
+            if delay:
+                time.sleep(delay)
+
+            retry_after = server._take_throttle()
+            if retry_after is not None:
+                return self._send(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                                  {"Retry-After": str(retry_after)})
+
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = [p for p in url.path.split("/") if p]
+
+            if parts[:2] == ["v1", "playlists"] and len(parts) >= 3:
+                playlist_id = parts[2]
+                if playlist_id not in server.playlists:
+                    return self._not_found()
+                if len(parts) == 3:
+                    return self._send(200, server.playlist(playlist_id))
+                if parts[3] == "tracks":
+                    offset = int(query.get("offset", ["0"])[0])
+                    limit = int(query.get("limit", [str(PAGE_LIMIT)])[0])
+                    return self._send(200, server.tracks_page(playlist_id, offset, limit))
+
+            if parts[:2] == ["v1", "tracks"] and len(parts) == 3:
+                return self._send(200, server.track(parts[2]))
+
+            if parts == ["v1", "search"]:
+                limit = int(query.get("limit", ["10"])[0])
+                return self._send(200, server.search(query.get("q", [""])[0], limit))
+
+            self._not_found()
+
+    return Handler
@@ -0,0 +1,465 @@
+import asyncio
+import contextvars
+import functools
+import json
+import math
+import time
+from datetime import datetime
+
+import httpx
+import mongomock
+import mongomock_motor
+from bson import ObjectId
+
+from mumundo.benchmarks.fake_spotify import FakeSpotifyServer
+
+BENCH_PASSWORD = "benchpass"
+
+# Iterations/concurrency per scenario; "quick" is what the test suite runs
+PROFILES = {
+    "full": {
+        "login": (20, 4),
+        "import_100": (10, 1),
+        "import_1k": (5, 1),
+        "import_10k": (1, 1),
+        "public_feed": (200, 10),
+        "playlist_detail": (200, 10),
+        "rating_burst": (200, 50),
+        "detail_rtt": (100, 10),
+        "ratings_rtt": (100, 10),
+        "spotify_outage": (100, 10),
+    },
+    "quick": {
+        "login": (2, 1),
+        "import_100": (2, 1),
+        "import_1k": (1, 1),
+        "import_10k": (1, 1),
+        "public_feed": (10, 5),
+        "playlist_detail": (10, 5),
+        "rating_burst": (20, 10),
+        "detail_rtt": (10, 5),
+        "ratings_rtt": (10, 5),
+        "spotify_outage": (10, 5),
+    },
+}
+
+# Simulated round trip added to every MongoDB operation in the *_rtt scenarios
+MONGO_RTT_SECONDS = 0.005
+
+# Methods that cost a round trip. Sync (pymongo) calls sleep the calling thread, as a real
+# blocking driver would; async (Motor) calls await. Nested calls (find_one -> find, or the
+# sync collection a Motor wrapper delegates to) are only charged once.
+SYNC_ROUND_TRIPS = (
+    "find", "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write", "aggregate", "count_documents", "find_one_and_update",
+)
+ASYNC_ROUND_TRIPS = (
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write", "count_documents", "find_one_and_update",
+)
+_in_round_trip = contextvars.ContextVar("in_round_trip", default=False)
+
+# How long the fake Spotify holds each request in the spotify_outage scenario
+OUTAGE_DELAY_SECONDS = 2.0
+
+SCENARIOS = list(PROFILES["full"])
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(name, latencies, wall_time):
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "iterations": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "throughput_rps": round(len(ordered) / wall_time, 3) if wall_time else 0.0,
+    }
+
+
+# `concurrency` clients take turns over the iterations, each sending its next request as
+# soon as the previous one returns.
+# A request's latency runs from when its client was ready to send it, so time spent queued
+# behind a handler that blocks the event loop is counted as well.
+async def measure(name, operation, iterations, concurrency):
+
+    latencies = []
+
+    async def client(first):
+        ready = started
+        for i in range(first, iterations, concurrency):
+            await operation(i)
+            done = time.perf_counter()
+            latencies.append(done - ready)
+            ready = done
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(first) for first in range(min(concurrency, iterations))))
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+def _sync_round_trip(method, rtt):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if _in_round_trip.get():
+            return method(*args, **kwargs)
+        time.sleep(rtt)
+        token = _in_round_trip.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _in_round_trip.reset(token)
+    return wrapper
+
+
+def _async_round_trip(method, rtt):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        if _in_round_trip.get():
+            return await method(*args, **kwargs)
+        await asyncio.sleep(rtt)
+        token = _in_round_trip.set(True)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _in_round_trip.reset(token)
+    return wrapper
+
+
+# Motor's find()/aggregate() only build a cursor; the round trip is paid when it is read
+def _free_call(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        token = _in_round_trip.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _in_round_trip.reset(token)
+    return wrapper
+
+
+# Drives the real FastAPI app in-process against mongomock and a fake Spotify server
+class BenchmarkEnvironment:
+
+    def __init__(self, mongo_rtt=0.0):
+        self.spotify = FakeSpotifyServer()
+        self.mongo = mongomock.MongoClient()
+        self.mongo_rtt = mongo_rtt
+        self.client = None
+        self.tokens = []
+        self._patches = []
+
+    def _patch(self, module, name, value):
+        self._patches.append((module, name, getattr(module, name)))
+        setattr(module, name, value)
+
+    async def __aenter__(self):
+        from mumundo.backend import MongoHandler, SpotifyClient
+
+        self.spotify.start()
+
+        # pymongo 4.12 passes sort= to bulk update/replace ops, which mongomock 4.3 predates
+        for method in ("add_update", "add_replace"):
+            original = getattr(mongomock.collection.BulkOperationBuilder, method)
+            def without_sort(builder, *args, _original=original, sort=None, **kwargs):
+                return _original(builder, *args, **kwargs)
+            self._patch(mongomock.collection.BulkOperationBuilder, method, without_sort)
+
+        motor = mongomock_motor.AsyncMongoMockClient(mock_mongo_client=self.mongo)
+        self._patch(MongoHandler, "client", motor)
+        self._patch(MongoHandler, "sync_client", self.mongo)
+        self._patch(MongoHandler, "log_client", self.mongo)
+        self._patch(MongoHandler, "_beanie_client", None)
+        await MongoHandler.init_db()
+
+        self._patch(SpotifyClient, "SPOTIFY_CLIENT_ID", "bench-client")
+        self._patch(SpotifyClient, "SPOTIFY_CLIENT_SECRET", "bench-secret")
+        self._patch(SpotifyClient, "SPOTIFY_API_URL", self.spotify.api_url)
+        self._patch(SpotifyClient, "SPOTIFY_TOKEN_URL", self.spotify.token_url)
+        # Measure the app, not the production rate limit
+        self._patch(SpotifyClient, "scheduler", SpotifyClient.SpotifyScheduler(rate=1e6, burst=1000, max_concurrency=64))
+
+        # Process-wide caches would otherwise carry documents between scenarios
+        from mumundo.backend.Cache import cache
+        from mumundo.backend.SongCache import song_cache
+        cache.clear()
+        song_cache.clear()
+
+        from mumundo.main import app
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            timeout=None,
+        )
+        return self
+
+    # Adds mongo_rtt to every database operation from here on (seeding stays fast)
+    def simulate_rtt(self):
+        for name in SYNC_ROUND_TRIPS:
+            self._patch(mongomock.Collection, name, _sync_round_trip(getattr(mongomock.Collection, name), self.mongo_rtt))
+
+        collection = mongomock_motor.AsyncMongoMockCollection
+        for name in ASYNC_ROUND_TRIPS:
+            self._patch(collection, name, _async_round_trip(getattr(collection, name), self.mongo_rtt))
+        for name in ("find", "aggregate"):
+            self._patch(collection, name, _free_call(getattr(collection, name)))
+        for cursor in (mongomock_motor.AsyncCursor, mongomock_motor.AsyncLatentCommandCursor):
+            self._patch(cursor, "to_list", _async_round_trip(cursor.to_list, self.mongo_rtt))
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        self.spotify.stop()
+        for module, name, value in reversed(self._patches):
+            setattr(module, name, value)
+
+    @property
+    def db(self):
+        return self.mongo.SpotifyDB
+
+    async def create_users(self, count):
+        from mumundo.backend.CoreAuth import create_access_token, get_password_hash
+        from mumundo.backend.models.user import User
+
+        hashed = get_password_hash(BENCH_PASSWORD)
+        for i in range(len(self.tokens), count):
+            email = f"bench{i}@example.com"
+            await User(email=email, username=f"bench{i}", hashed_password=hashed).insert()
+            self.tokens.append(create_access_token({"sub": email}))
+
+    def auth(self, i=0):
+        return {"Authorization": f"Bearer {self.tokens[i]}"}
+
+    def seed_playlist(self, owner_id, track_count, is_public=True):
+        songs = [
+            {
+                "Title": f"Seed {i}",
+                "Artist": f"Artist {i % 50}",
+                "Album": f"Album {i % 20}",
+                "Length": 200,
+                "spotify_id": f"seed{i}",
+                "preview_url": None,
+                "image_url": "",
+            }
+            for i in range(track_count)
+        ]
+        song_ids = self.db.song.insert_many(songs).inserted_ids if songs else []
+        return self.db.playlist.insert_one({
+            "Title": f"Seeded {track_count}",
+            "User": str(owner_id),
+            "Songs": [ObjectId(song_id) for song_id in song_ids],
+            "spotify_id": f"seeded{track_count}",
+            "IsPublic": is_public,
+            "created_at": datetime.utcnow(),
+            "image_url": "",
+            "Likes": 0,
+            "Dislikes": 0,
+            "Saves": 0,
+            "Total_Time": 200 * track_count,
+        }).inserted_id
+
+    async def owner_id(self, i=0):
+        from mumundo.backend.models.user import User
+        user = await User.find_one(User.email == f"bench{i}@example.com")
+        return user.id
+
+
+async def bench_login(env, iterations, concurrency):
+    await env.create_users(1)
+
+    async def op(i):
+        response = await env.client.post(
+            "/api/auth/login",
+            json={"email": "bench0@example.com", "password": BENCH_PASSWORD},
+        )
+        assert response.status_code == 200, response.text
+
+    return await measure("login", op, iterations, concurrency)
+
+
+def bench_import(name, track_count):
+
+    async def run(env, iterations, concurrency):
+        await env.create_users(1)
+        for i in range(iterations):
+            env.spotify.add_playlist(f"{name.replace('_', '')}n{i}", track_count)
+
+        async def op(i):
+            url = f"https://open.spotify.com/playlist/{name.replace('_', '')}n{i}"
+            response = await env.client.post(
+                "/api/playlists/import-spotify",
+                json={"playlistUrl": url, "isPublic": True},
+                headers=env.auth(),
+            )
+            assert response.status_code == 200, response.text
+            assert response.json()["track_count"] == track_count
+
+        return await measure(name, op, iterations, concurrency)
+
+    return run
+
+
+async def bench_public_feed(env, iterations, concurrency):
+    await env.create_users(10)
+    for i in range(10):
+        owner = await env.owner_id(i)
+        for _ in range(20):
+            env.seed_playlist(owner, 50)
+
+    async def op(i):
+        response = await env.client.get("/api/playlists/public")
+        assert response.status_code == 200, response.text
+
+    return await measure("public_feed", op, iterations, concurrency)
+
+
+async def bench_playlist_detail(env, iterations, concurrency):
+    await env.create_users(1)
+    playlist_id = env.seed_playlist(await env.owner_id(0), 1000)
+
+    async def op(i):
+        response = await env.client.get(f"/api/playlists/{playlist_id}")
+        assert response.status_code == 200, response.text
+
+    return await measure("playlist_detail", op, iterations, concurrency)
+
+
+async def bench_rating_burst(env, iterations, concurrency):
+    await env.create_users(concurrency)
+    playlist_id = env.seed_playlist(await env.owner_id(0), 10)
+
+    async def op(i):
+        rating = "like" if (i // concurrency) % 2 == 0 else "dislike"
+        response = await env.client.post(
+            f"/api/playlists/{playlist_id}/ratings",
+            json={"type": rating},
+            headers=env.auth(i % concurrency),
+        )
+        assert response.status_code == 200, response.text
+
+    return await measure("rating_burst", op, iterations, concurrency)
+
+
+# Cold detail reads (the song cache is emptied before each one) with a round trip on every database call
+async def bench_detail_rtt(env, iterations, concurrency):
+    from mumundo.backend.SongCache import song_cache
+
+    await env.create_users(1)
+    playlist_id = env.seed_playlist(await env.owner_id(0), 200)
+    env.simulate_rtt()
+
+    async def op(i):
+        song_cache.clear()
+        response = await env.client.get(f"/api/playlists/{playlist_id}")
+        assert response.status_code == 200, response.text
+
+    return await measure("detail_rtt", op, iterations, concurrency)
+
+
+# Each iteration rates a playlist and reads its ratings back, with a round trip on every database call
+async def bench_ratings_rtt(env, iterations, concurrency):
+    await env.create_users(concurrency)
+    playlist_id = env.seed_playlist(await env.owner_id(0), 10)
+    for i in range(concurrency):
+        # Warm the principal cache so the round trips measured are the handlers' own
+        await env.client.get(f"/api/playlists/{playlist_id}/ratings", headers=env.auth(i))
+    env.simulate_rtt()
+
+    async def op(i):
+        rating = "like" if (i // concurrency) % 2 == 0 else "dislike"
+        response = await env.client.post(
+            f"/api/playlists/{playlist_id}/ratings",
+            json={"type": rating},
+            headers=env.auth(i % concurrency),
+        )
+        assert response.status_code == 200, response.text
+        response = await env.client.get(f"/api/playlists/{playlist_id}/ratings", headers=env.auth(i % concurrency))
+        assert response.status_code == 200, response.text
+
+    return await measure("ratings_rtt", op, iterations, concurrency)
+
+
+# Imports while Spotify hangs for OUTAGE_DELAY_SECONDS on every request. Latency is bounded
+# by the call deadline until the circuit breaker opens, after which imports fail fast.
+async def bench_spotify_outage(env, iterations, concurrency):
+    from mumundo.backend import SpotifyClient
+
+    await env.create_users(1)
+    for i in range(iterations):
+        env.spotify.add_playlist(f"outage{i}", 10)
+    env._patch(SpotifyClient, "SPOTIFY_BACKGROUND_DEADLINE_SECONDS", 0.5)
+    env.spotify.delay(OUTAGE_DELAY_SECONDS)
+
+    async def op(i):
+        response = await env.client.post(
+            "/api/playlists/import-spotify",
+            json={"playlistUrl": f"https://open.spotify.com/playlist/outage{i}"},
+            headers=env.auth(),
+        )
+        assert response.status_code in (503, 504), response.text
+
+    return await measure("spotify_outage", op, iterations, concurrency)
+
+
+BENCHMARKS = {
+    "login": bench_login,
+    "import_100": bench_import("import_100", 100),
+    "import_1k": bench_import("import_1k", 1000),
+    "import_10k": bench_import("import_10k", 10000),
+    "public_feed": bench_public_feed,
+    "playlist_detail": bench_playlist_detail,
+    "rating_burst": bench_rating_burst,
+    "detail_rtt": bench_detail_rtt,
+    "ratings_rtt": bench_ratings_rtt,
+    "spotify_outage": bench_spotify_outage,
+}
+
+
+async def run_benchmarks(scenarios=None, profile="full"):
+
+    results = {}
+    for name in scenarios or SCENARIOS:
+        iterations, concurrency = PROFILES[profile][name]
+        # Fresh databases per scenario so earlier seeding can't skew later numbers
+        async with BenchmarkEnvironment(mongo_rtt=MONGO_RTT_SECONDS if name.endswith("_rtt") else 0.0) as env:
+            results[name] = await BENCHMARKS[name](env, iterations, concurrency)
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def find_regressions(results, baseline, threshold):
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms"
+            )
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']}/s vs baseline {previous['throughput_rps']}/s"
+            )
+
+    return regressions
@@ -27,8 +27,17 @@ const UserPlaylistsSection: React.FC = () => {
                 axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
             }
 
-            const response = await axios.get('/api/playlists/user');
-            setPlaylists(response.data);
+            // The list is paginated; follow X-Next-Cursor until the last page
+            const allPlaylists: Playlist[] = [];
+            let cursor: string | undefined;
+            do {
+                const response = await axios.get('/api/playlists/user', {
+                    params: {limit: 200, ...(cursor ? {cursor} : {})}
+                });
+                allPlaylists.push(...response.data);
+                cursor = response.headers['x-next-cursor'];
+            } while (cursor);
+            setPlaylists(allPlaylists);
             setIsLoading(false);
         } catch (err) {
             console.error('Error fetching user playlists:', err);
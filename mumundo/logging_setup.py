@@ -1,12 +1,74 @@
-from logging import INFO, StreamHandler, basicConfig
-from logging.handlers import TimedRotatingFileHandler
+import atexit
+import logging
+import os
+import queue
+from logging import INFO, StreamHandler, getLogger
+from logging.handlers import QueueListener, TimedRotatingFileHandler
+from mumundo.backend.Logger import DroppingQueueHandler, JsonFormatter, LazyQueueHandler, MongoLogHandler
+
+# Records waiting for the MongoDB handler; beyond this they are dropped
+MONGO_LOG_QUEUE_SIZE = int(os.getenv("LOG_MONGO_QUEUE_SIZE", "10000"))
+
+_listeners = []
+
+
+def _parse_levels(spec):
+    # "Authenticator=WARNING,SpotifyIntegration=DEBUG" -> {"Authenticator": "WARNING", ...}
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
 
 
 def setup_logging():
+    # Request handlers only enqueue records; formatting and all I/O happen on listener
+    # threads. Console and rotating file share one listener; MongoDB gets its own behind
+    # a bounded queue, so a slow or unreachable database drops log records instead of
+    # stalling the other handlers or growing the queue without limit.
+    if _listeners:
+        return _listeners
+
+    os.makedirs("./logs", exist_ok=True)
+    formatter = JsonFormatter()
+
     file_log = TimedRotatingFileHandler("./logs/app.log", when="d", interval=1)
     console_log = StreamHandler()
-    basicConfig(
-        level=INFO,
-        format="%(asctime)s %(levelname).4s %(name)s:%(lineno)d %(message)s",
-        handlers=[file_log, console_log],
-    )
+    for handler in (file_log, console_log):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handlers = [LazyQueueHandler(log_queue)]
+    _listeners.append(QueueListener(log_queue, file_log, console_log, respect_handler_level=True))
+
+    if os.getenv("LOG_TO_MONGO", "1").lower() in ("1", "true", "yes"):
+        mongo_queue = queue.Queue(maxsize=MONGO_LOG_QUEUE_SIZE)
+        queue_handlers.append(DroppingQueueHandler(mongo_queue))
+        _listeners.append(QueueListener(mongo_queue, MongoLogHandler(), respect_handler_level=True))
+
+    levels = logging.getLevelNamesMapping()
+    unknown = []
+    root = getLogger()
+    root.handlers = queue_handlers
+    root_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    if root_level not in levels:
+        unknown.append(("LOG_LEVEL", root_level))
+    root.setLevel(levels.get(root_level, INFO))
+    for name, level in _parse_levels(os.getenv("LOG_LEVELS", "")).items():
+        if level in levels:
+            getLogger(name).setLevel(levels[level])
+        else:
+            unknown.append((name, level))
+
+    for listener in _listeners:
+        listener.start()
+    atexit.register(shutdown_logging)
+
+    for name, level in unknown:
+        getLogger(__name__).warning("Unknown log level %r for %s, ignored (LOG_LEVEL falls back to INFO)", level, name)
+    return _listeners
+
+
+def shutdown_logging():
+    while _listeners:
+        _listeners.pop().stop()
@@ -1,20 +1,36 @@
-from dotenv import load_dotenv
-from fastapi import FastAPI
+from dotenv import find_dotenv, load_dotenv
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 
-load_dotenv(dotenv_path=".env")
+from mumundo.backend.Startup import startup_timer
 
-from mumundo.backend.models.user import User
-from mumundo.backend.MongoHandler import init_db
-from mumundo.backend.Logger import get_logger
+# Load environment variables once, before any module reads its settings
+with startup_timer.phase("load_dotenv"):
+    load_dotenv(find_dotenv(usecwd=True) or find_dotenv())
 
-from mumundo.backend.CoreAuth import auth_router
-from mumundo.backend.routes.admin import admin_router
-from mumundo.backend.routes.spotify_integration import playlist_router
-# from mumundo.backend.routes.music import music_router
-from mumundo.backend.routes.profile import profile_router
+with startup_timer.timing_imports("mumundo."):
+    from mumundo.backend.models.user import User
+    from mumundo.backend.MongoHandler import init_db
+    from mumundo.backend.Cache import cache
+    from mumundo.backend.Compression import CompressionMiddleware
+    from mumundo.backend.Logger import get_logger
+    from mumundo.backend.Metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+    from mumundo.backend.QueryMonitor import QueryAccountingMiddleware
+
+    from mumundo.backend.CoreAuth import auth_router
+    from mumundo.backend.routes.admin import admin_router
+    from mumundo.backend.routes.spotify_integration import ensure_playlist_indexes, playlist_router, start_playlist_jobs
+    # from mumundo.backend.routes.music import music_router
+    from mumundo.backend.routes.profile import profile_router, start_profile_jobs
+    from mumundo.logging_setup import setup_logging, shutdown_logging
+
+# Long-running maintenance tasks started with the app and cancelled on shutdown
+background_tasks = []
+
+# Seeding the dummy account costs a lookup and a bcrypt hash on every start, so it's opt-in
+SEED_DUMMY_USER = os.getenv("SEED_DUMMY_USER", "").lower() in ("1", "true", "yes")
 
 logger = get_logger("MainServer")
 app = FastAPI(title="Mumundo API")
@@ -25,17 +41,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryAccountingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router)
 app.include_router(admin_router, prefix="/api")
 #app.include_router(music_router, prefix="/music", tags=["music"])
 app.include_router(profile_router, prefix="/api")
 app.include_router(playlist_router, prefix="/api", tags=["playlists"])
-@app.on_event("startup")
-async def startup_event():
-
-    await init_db()
+async def seed_dummy_user():
 
     try:
 
@@ -56,6 +73,37 @@ async def startup_event():
     except Exception as e:
         print(f"Error creating dummy user: {e}")
 
+@app.on_event("startup")
+async def startup_event():
+
+    setup_logging()
+
+    with startup_timer.phase("init_db"):
+        await init_db()
+
+    with startup_timer.phase("ensure_indexes"):
+        ensure_playlist_indexes()
+
+    background_tasks.extend(start_playlist_jobs())
+    background_tasks.extend(start_profile_jobs())
+
+    with startup_timer.phase("cache"):
+        await cache.start()
+
+    if SEED_DUMMY_USER:
+        with startup_timer.phase("seed_dummy_user"):
+            await seed_dummy_user()
+
+    logger.info("Startup timing: %s", startup_timer.report())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    await cache.close()
+    shutdown_logging()
+
 
 UPLOAD_DIR = os.path.join(os.getcwd(), "backend", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -65,3 +113,7 @@ app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Mumundo API! Visit /music to see the data! Enjoy!"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
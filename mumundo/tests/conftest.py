@@ -1,4 +1,6 @@
+import pytest
 import pytest_asyncio
+import mongomock
 import mongomock_motor
 from beanie import init_beanie
 from mumundo.backend.models.user import User
@@ -11,3 +13,44 @@ async def test_db():
     await init_beanie(database=db, document_models=[User])
     
     yield db
+
+@pytest_asyncio.fixture(scope="function")
+async def mock_mongo(monkeypatch):
+    # Point the shared sync/async clients at one in-memory mongomock store
+    from mumundo.backend import MongoHandler
+
+    # pymongo 4.12 passes sort= to bulk update/replace ops, which mongomock 4.3 predates
+    for method in ("add_update", "add_replace"):
+        original = getattr(mongomock.collection.BulkOperationBuilder, method)
+        def without_sort(self, *args, _original=original, sort=None, **kwargs):
+            return _original(self, *args, **kwargs)
+        monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, method, without_sort)
+
+    sync = mongomock.MongoClient()
+    monkeypatch.setattr(MongoHandler, "client", mongomock_motor.AsyncMongoMockClient(mock_mongo_client=sync))
+    monkeypatch.setattr(MongoHandler, "sync_client", sync)
+    monkeypatch.setattr(MongoHandler, "log_client", sync)
+    monkeypatch.setattr(MongoHandler, "_beanie_client", None)
+    await MongoHandler.init_db()
+
+    # Process-wide caches would otherwise carry documents between tests
+    from mumundo.backend.Cache import cache
+    from mumundo.backend.SongCache import song_cache
+    cache.clear()
+    song_cache.clear()
+
+    yield sync
+
+@pytest.fixture
+def fake_spotify(monkeypatch):
+    # Local Spotify stand-in with an unthrottled scheduler in front of it
+    from mumundo.backend import SpotifyClient
+    from mumundo.benchmarks.fake_spotify import FakeSpotifyServer
+
+    with FakeSpotifyServer() as server:
+        monkeypatch.setattr(SpotifyClient, "SPOTIFY_CLIENT_ID", "test-client")
+        monkeypatch.setattr(SpotifyClient, "SPOTIFY_CLIENT_SECRET", "test-secret")
+        monkeypatch.setattr(SpotifyClient, "SPOTIFY_API_URL", server.api_url)
+        monkeypatch.setattr(SpotifyClient, "SPOTIFY_TOKEN_URL", server.token_url)
+        monkeypatch.setattr(SpotifyClient, "scheduler", SpotifyClient.SpotifyScheduler(rate=1000, burst=100))
+        yield server
@@ -0,0 +1,157 @@
+import fnmatch
+import socketserver
+import threading
+import time
+
+# Minimal RESP2 server covering what backend/Cache.py uses: GET/SET (PX/EX), DEL,
+# SCAN, PUBLISH/SUBSCRIBE, plus the handshake commands redis-py sends on connect
+class FakeRedisServer:
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.data = {}
+        self.commands = []
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def publish(self, channel, message):
+        with self._lock:
+            handlers = list(self._subscribers.get(channel, ()))
+        for handler in handlers:
+            handler.push([b"message", channel, message])
+        return len(handlers)
+
+    def subscribe(self, channel, handler):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(handler)
+            return sum(handler in subscribers for subscribers in self._subscribers.values())
+
+    def unsubscribe_all(self, handler):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                subscribers.discard(handler)
+
+class _Error(str):
+    pass
+
+def _encode(value):
+    if isinstance(value, _Error):
+        return b"-" + value.encode() + b"\r\n"
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+    return b"$%d\r\n" % len(value) + value + b"\r\n"
+
+def _make_handler(server):
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def setup(self):
+            super().setup()
+            self._write_lock = threading.Lock()
+
+        def push(self, value):
+            with self._write_lock:
+                self.wfile.write(_encode(value))
+                self.wfile.flush()
+
+        def _read_command(self):
+            line = self.rfile.readline()
+            if not line:
+                return None
+            count = int(line[1:])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            return args
+
+        def handle(self):
+            try:
+                while True:
+                    args = self._read_command()
+                    if args is None:
+                        return
+                    self.push(self._execute(args[0].upper().decode(), args[1:]))
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                server.unsubscribe_all(self)
+
+        def _execute(self, command, args):
+            server.commands.append(command)
+
+            if command == "PING":
+                return "PONG"
+            if command in ("CLIENT", "SELECT"):
+                return "OK"
+            if command == "GET":
+                with server._lock:
+                    return server._get(args[0])
+            if command == "SET":
+                expires_at = None
+                options = [a.upper() for a in args[2:]]
+                if b"PX" in options:
+                    expires_at = time.monotonic() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires_at = time.monotonic() + int(args[2 + options.index(b"EX") + 1])
+                with server._lock:
+                    server.data[args[0]] = (args[1], expires_at)
+                return "OK"
+            if command == "DEL":
+                with server._lock:
+                    return sum(server.data.pop(key, None) is not None for key in args)
+            if command == "SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+                with server._lock:
+                    keys = [key for key in list(server.data) if server._get(key) is not None
+                            and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return [b"0", keys]
+            if command == "PUBLISH":
+                return server.publish(args[0], args[1])
+            if command == "SUBSCRIBE":
+                # One confirmation per channel; the last is returned as the reply
+                for channel in args[:-1]:
+                    self.push([b"subscribe", channel, server.subscribe(channel, self)])
+                return [b"subscribe", args[-1], server.subscribe(args[-1], self)]
+
+            return _Error(f"ERR unknown command '{command}'")
+
+    return Handler
@@ -0,0 +1,21 @@
+import pytest
+from mumundo.benchmarks.harness import find_regressions, run_benchmarks
+
+@pytest.mark.asyncio
+async def test_benchmarks_report_latency_percentiles():
+    results = await run_benchmarks(["import_100", "rating_burst", "ratings_rtt"], profile="quick")
+
+    for name in ("import_100", "rating_burst", "ratings_rtt"):
+        result = results[name]
+        assert result["iterations"] > 0
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["throughput_rps"] > 0
+
+def test_regressions_flagged_past_threshold():
+    baseline = {"public_feed": {"p95_ms": 10.0, "throughput_rps": 100.0}}
+
+    within = {"public_feed": {"p95_ms": 11.0, "throughput_rps": 95.0}}
+    assert find_regressions(within, baseline, threshold=0.25) == []
+
+    slower = {"public_feed": {"p95_ms": 20.0, "throughput_rps": 50.0}}
+    assert len(find_regressions(slower, baseline, threshold=0.25)) == 2
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_bulk_import_dedupes_songs_across_playlists(mock_mongo, fake_spotify):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="migrator", profile_picture="default.jpg", is_admin=False)
+
+    fake_spotify.add_playlist("shared1", 150, track_prefix="common")
+    fake_spotify.add_playlist("shared2", 120, track_prefix="common")
+    fake_spotify.add_playlist("solo", 5)
+
+    urls = [f"https://open.spotify.com/playlist/{name}?si=x" for name in ("shared1", "shared2", "solo", "missing")]
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/playlists/import-spotify/bulk",
+                                         json={"playlistUrls": urls + ["not a url"], "isPublic": True})
+            single = await client.post("/api/playlists/import-spotify", json={"playlistUrl": urls[2]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r.get("track_count") for r in results[:3]] == [150, 120, 5]
+    assert "error" in results[3] and results[4]["error"] == "Invalid Spotify playlist URL"
+
+    # 150 shared tracks + 5 solo tracks, each stored once, and re-importing reuses them
+    assert db.song.count_documents({}) == 155
+    assert single.status_code == 200 and single.json()["track_count"] == 5
+    assert db.song.count_documents({}) == 155
+
+    first = db.playlist.find_one({"_id": ObjectId(results[0]["playlist_id"])})
+    second = db.playlist.find_one({"_id": ObjectId(results[1]["playlist_id"])})
+    assert second["Songs"] == first["Songs"][:120]
+    assert first["Owner"]["username"] == "migrator"
+    assert first["Total_Time"] == sum(s["Length"] for s in db.song.find({"_id": {"$in": first["Songs"]}}))
+
+@pytest.mark.asyncio
+async def test_import_reuses_a_song_inserted_after_its_lookup(mock_mongo, fake_spotify, monkeypatch):
+    from mumundo.backend.routes import spotify_integration
+
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="racer", profile_picture="default.jpg", is_admin=False)
+    fake_spotify.add_playlist("racy", 3)
+    # An existing plain index is replaced by the unique one
+    db.song.create_index("spotify_id")
+    spotify_integration.SongIngest.ensure_indexes(db)
+    assert db.song.index_information()["spotify_id_1"]["unique"]
+
+    # Another import inserts every track between this import's lookup and its upsert
+    find_songs = spotify_integration.find_songs
+    lookups = []
+    def late_lookup(spotify_ids):
+        lookups.append(spotify_ids)
+        if len(lookups) == 1:
+            db.song.insert_many([{"Title": "theirs", "Artist": "x", "Length": 1, "spotify_id": spotify_id} for spotify_id in spotify_ids])
+            return {}
+        return find_songs(spotify_ids)
+    monkeypatch.setattr(spotify_integration, "find_songs", late_lookup)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/api/playlists/import-spotify", json={"playlistUrl": "https://open.spotify.com/playlist/racy"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert db.song.count_documents({}) == 3
+    playlist = db.playlist.find_one({"_id": ObjectId(response.json()["playlist_id"])})
+    assert {song["Title"] for song in db.song.find({"_id": {"$in": playlist["Songs"]}})} == {"theirs"}
+    assert db.user_stats.find_one({"_id": str(user.id)})["playlist_count"] == 1
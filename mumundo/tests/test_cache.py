@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from mumundo.backend.Cache import MemoryCache, RedisCache
+from mumundo.tests.fake_redis import FakeRedisServer
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_memory_cache_round_trips_values_and_expires():
+    cache = MemoryCache(max_entries=2)
+    song_id = ObjectId()
+
+    await cache.set("song", song_id, {"_id": song_id, "Title": "A"})
+    cached = await cache.get("song", song_id)
+    assert cached == {"_id": song_id, "Title": "A"}
+    cached["Title"] = "mutated"
+    assert (await cache.get("song", song_id))["Title"] == "A"
+
+    await cache.set("feed", "all", [1], ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await cache.get("feed", "all") is None
+
+@pytest.mark.asyncio
+async def test_write_on_one_worker_invalidates_every_worker():
+    with FakeRedisServer() as server:
+        worker_a, worker_b = RedisCache(server.url), RedisCache(server.url)
+        dropped = []
+        worker_b.on_invalidate("song", dropped.append)
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            # B reads A's entry through Redis and keeps a local copy
+            await worker_a.set("feed", "all", ["page"], ttl=30)
+            await worker_a.set("principal", "a@example.com", {"username": "a"}, ttl=30)
+            assert await worker_b.get("feed", "all") == ["page"]
+            assert await worker_b.get("principal", "a@example.com") == {"username": "a"}
+
+            await worker_a.invalidate("principal", "a@example.com")
+            await wait_for(lambda: ("principal", "a@example.com") not in worker_b._entries)
+            assert await worker_b.get("principal", "a@example.com") is None
+
+            await worker_a.invalidate_namespace("feed")
+            await wait_for(lambda: ("feed", "all") not in worker_b._entries)
+            assert await worker_b.get("feed", "all") is None
+
+            await worker_a.invalidate("song", "s1", "s2")
+            await wait_for(lambda: dropped == [["s1", "s2"]])
+        finally:
+            await worker_a.close()
+            await worker_b.close()
@@ -0,0 +1,63 @@
+import threading
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import Compression
+from mumundo.main import app
+
+def test_negotiation_respects_quality_values():
+    assert Compression.negotiate("gzip, deflate") == "gzip"
+    assert Compression.negotiate("gzip;q=0, identity") is None
+    assert Compression.negotiate("") is None
+    assert Compression.negotiate("*") in Compression.available_encodings()
+
+@pytest.mark.asyncio
+async def test_feed_is_compressed_and_cached_with_precompressed_variants(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    db.playlist.insert_many([
+        {"Title": f"Playlist {i}", "User": str(ObjectId()), "Songs": [], "IsPublic": True, "image_url": ""}
+        for i in range(40)
+    ])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/api/playlists/public", headers={"Accept-Encoding": "gzip"})
+        # Served from the cache even though the collection changed
+        db.playlist.delete_many({})
+        second = await client.get("/api/playlists/public", headers={"Accept-Encoding": "gzip"})
+        plain = await client.get("/api/playlists/public", headers={"Accept-Encoding": "identity"})
+        small = await client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert int(first.headers["content-length"]) < len(first.content)
+    assert len(first.json()) == 40
+    assert second.headers["content-encoding"] == "gzip"
+    assert second.json() == first.json()
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == first.json()
+    assert "content-encoding" not in small.headers
+
+@pytest.mark.asyncio
+async def test_middleware_compresses_large_bodies_off_loop(monkeypatch):
+    monkeypatch.setattr(Compression, "THREAD_SIZE", 10)
+    threads = []
+    original = Compression.compress
+    def compress(*args):
+        threads.append(threading.get_ident())
+        return original(*args)
+    monkeypatch.setattr(Compression, "compress", compress)
+    body = b'{"items": [' + b", ".join(b'"item"' for _ in range(1000)) + b"]}"
+
+    async def large(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    transport = httpx.ASGITransport(app=Compression.CompressionMiddleware(large))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(body)
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == body
+    assert threads and threads[0] != threading.get_ident()
@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import mongomock_motor
+import pytest
+from bson import ObjectId
+from mumundo.backend import Deadline
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.backend.Metrics import DEADLINES_EXCEEDED
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_ratings_reads_overlap_within_deadline_and_time_out_past_it(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="rater", profile_picture="default.jpg", is_admin=False)
+    playlist_id = str(db.playlist.insert_one({"Title": "Mix", "User": str(ObjectId()), "Likes": 2, "Dislikes": 0}).inserted_id)
+    db.playlist_ratings.insert_one({"playlist_id": playlist_id, "user_id": str(user.id), "type": "like"})
+
+    # Every Motor find_one takes 100ms; run one after the other the two reads would need 200ms
+    find_one = mongomock_motor.AsyncMongoMockCollection.find_one
+    async def slow_find_one(self, *args, **kwargs):
+        await asyncio.sleep(0.1)
+        return await find_one(self, *args, **kwargs)
+    monkeypatch.setattr(mongomock_motor.AsyncMongoMockCollection, "find_one", slow_find_one)
+    monkeypatch.setattr(Deadline, "REQUEST_DEADLINE_SECONDS", 0.17)
+    DEADLINES_EXCEEDED.clear()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            ratings = await client.get(f"/api/playlists/{playlist_id}/ratings")
+            detail = await client.get(f"/api/playlists/{playlist_id}")
+            monkeypatch.setattr(Deadline, "REQUEST_DEADLINE_SECONDS", 0.05)
+            timed_out = await client.get(f"/api/playlists/{playlist_id}/ratings")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert ratings.status_code == 200 and ratings.json() == {"likes": 2, "dislikes": 0, "user_rating": "like"}
+    assert detail.status_code == 200 and detail.json()["likes"] == 2
+    assert timed_out.status_code == 504
+    assert DEADLINES_EXCEEDED.collect() == {("playlist_ratings",): 1.0}
@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import Export
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_exports_stream_tracks_in_order(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), email="exporter@example.com", username="exporter", is_admin=False)
+    monkeypatch.setattr(Export, "BATCH_SIZE", 3)
+
+    song_ids = db.song.insert_many(
+        [{"Title": f"Song {i}", "Artist": "A", "Album": "B", "Length": i, "spotify_id": f"sp{i}"} for i in range(7)]
+    ).inserted_ids
+    first = db.playlist.insert_one(
+        {"Title": "Mix", "User": str(user.id), "Songs": list(reversed(song_ids)), "IsPublic": False}
+    ).inserted_id
+    db.playlist.insert_one({"Title": "Repeat", "User": str(user.id), "Songs": [song_ids[0]] * 2, "IsPublic": False})
+    other = db.playlist.insert_one({"Title": "Theirs", "User": str(ObjectId()), "Songs": song_ids, "IsPublic": False}).inserted_id
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            playlist = await client.get(f"/api/playlists/{first}/export")
+            library = await client.get("/api/user/library/export", params={"format": "csv"})
+            forbidden = await client.get(f"/api/playlists/{other}/export")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert playlist.status_code == 200
+    assert playlist.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in playlist.text.splitlines()]
+    assert [row["title"] for row in rows] == [f"Song {i}" for i in reversed(range(7))]
+    assert [row["position"] for row in rows] == list(range(7))
+
+    assert library.headers["content-disposition"] == 'attachment; filename="exporter library.csv"'
+    library_rows = list(csv.DictReader(io.StringIO(library.text)))
+    assert [row["playlist"] for row in library_rows] == ["Mix"] * 7 + ["Repeat"] * 2
+
+    assert forbidden.status_code == 403
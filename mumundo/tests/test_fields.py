@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import Fields
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.backend.SongCache import song_cache
+from mumundo.backend.routes.spotify_integration import PLAYLIST_DETAIL_FIELDS
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_fields_trim_playlist_responses(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="u", profile_picture="default.jpg", is_admin=False)
+    song_id = db.song.insert_one({"Title": "t", "Artist": "a", "Album": "b", "Length": 60}).inserted_id
+    playlist_id = str(db.playlist.insert_one({
+        "Title": "Mix", "User": str(user.id), "Songs": [song_id], "IsPublic": True, "image_url": "img", "Likes": 3
+    }).inserted_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            listing = await client.get("/api/playlists/user?fields=id,name,imageUrl")
+            full = await client.get(f"/api/playlists/{playlist_id}")
+
+            async def no_song_reads(song_ids):
+                raise AssertionError("tracks were not requested")
+            monkeypatch.setattr(song_cache, "get_many_async", no_song_reads)
+            sparse = await client.get(f"/api/playlists/{playlist_id}?fields=name,likes,trackCount")
+            unknown = await client.get("/api/playlists/user?fields=id,Songs")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert listing.json() == [{"id": playlist_id, "name": "Mix", "imageUrl": "img"}]
+    assert sparse.json() == {"name": "Mix", "likes": 3, "trackCount": 1}
+    assert sparse.headers["etag"] != full.headers["etag"]
+    assert unknown.status_code == 400 and "Songs" in unknown.json()["detail"]
+    assert Fields.projection({"user", "likes"}, PLAYLIST_DETAIL_FIELDS) == {"_id": 1, "User": 1, "Owner": 1, "Likes": 1}
@@ -0,0 +1,52 @@
+import json
+import pytest
+from mumundo.backend import SongIngest
+from mumundo.backend.jobs import ingest_songs
+
+class Interrupted(Exception):
+    pass
+
+def test_interrupted_jsonl_load_resumes_from_checkpoint(mock_mongo, tmp_path):
+    db = mock_mongo.SpotifyDB
+    db.song.insert_one({"Title": "Old", "Artist": "A", "Album": "Kept", "Length": 1, "spotify_id": "sp0", "preview_url": "p"})
+
+    dump = tmp_path / "tracks.jsonl"
+    lines = [json.dumps({"Title": f"Song {i}", "Artist": "A", "Length": str(i), "spotify_id": f"sp{i}"}) for i in range(10)]
+    lines[4] = '{"Title": "no id", "Artist": "A", "Length": 1}'
+    lines[6] = "not json"
+    dump.write_text("\n".join(lines) + "\n")
+    checkpoint = str(dump) + ".checkpoint"
+
+    def crash_after_first_batch(state):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        SongIngest.ingest_file(db, str(dump), batch_size=3, checkpoint_path=checkpoint, progress=crash_after_first_batch)
+    assert SongIngest.load_checkpoint(checkpoint)["records"] == 3
+
+    state = SongIngest.ingest_file(db, str(dump), batch_size=3, checkpoint_path=checkpoint)
+
+    assert state["records"] == 10 and state["resumed_from"] == 3 and state["invalid"] == 2
+    assert db.song.count_documents({}) == 8
+    # Fields missing from the dump keep their stored values; given ones are overwritten
+    existing = db.song.find_one({"spotify_id": "sp0"})
+    assert (existing["Title"], existing["Album"], existing["preview_url"]) == ("Song 0", "Kept", "p")
+    assert db.song.find_one({"spotify_id": "sp9"})["Length"] == 9
+
+def test_cli_loads_csv_and_removes_checkpoint(mock_mongo, tmp_path, capsys):
+    dump = tmp_path / "tracks.csv"
+    dump.write_text(
+        "Title,Artist,Album,Length,spotify_id,preview_url\n"
+        'Plain,A,B,100,sp1,\n'
+        '"Multi\nline, title",A,,200,sp2,http://preview\n'
+        'Bad,A,B,notanumber,sp3,\n'
+    )
+
+    assert ingest_songs.main([str(dump), "--batch-size", "2"]) == 0
+
+    songs = {song["spotify_id"]: song for song in mock_mongo.SpotifyDB.song.find()}
+    assert set(songs) == {"sp1", "sp2"}
+    assert songs["sp2"]["Title"] == "Multi\nline, title" and songs["sp2"]["Album"] == ""
+    assert songs["sp1"]["preview_url"] is None
+    assert not (tmp_path / "tracks.csv.checkpoint").exists()
+    assert "3 records" in capsys.readouterr().out
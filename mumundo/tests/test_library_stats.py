@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import LibraryStats
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_incremental_stats_match_rebuild(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), is_admin=False)
+
+    songs = [
+        {"_id": ObjectId(), "Artist": "Daft Punk", "Length": 300},
+        {"_id": ObjectId(), "Artist": "Daft Punk, Pharrell Williams", "Length": 250},
+        {"_id": ObjectId(), "Artist": "Mr. Oizo", "Length": 200},
+    ]
+    db.song.insert_many(songs)
+
+    def import_playlist(playlist_songs):
+        playlist_id = db.playlist.insert_one(
+            {"Title": "p", "User": str(user.id), "Songs": [s["_id"] for s in playlist_songs]}
+        ).inserted_id
+        LibraryStats.apply_playlist(db, user.id, playlist_songs)
+        return playlist_id
+
+    import_playlist(songs)
+    second = import_playlist([songs[0], songs[0]])
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.delete(f"/api/playlists/{second}")).status_code == 200
+            response = await client.get("/api/user/stats")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "playlist_count": 1,
+        "track_count": 3,
+        "total_time": 750,
+        "top_artists": [
+            {"name": "Daft Punk", "tracks": 2},
+            {"name": "Mr. Oizo", "tracks": 1},
+            {"name": "Pharrell Williams", "tracks": 1},
+        ],
+    }
+
+    incremental = LibraryStats.format_stats(db.user_stats.find_one({"_id": str(user.id)}))
+    LibraryStats.rebuild_all(db)
+    assert LibraryStats.format_stats(db.user_stats.find_one({"_id": str(user.id)})) == incremental
+
+def test_artist_lists_and_pruning(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    user_id = str(ObjectId())
+    tyler = {"_id": ObjectId(), "Artist": "Tyler, The Creator, Kali Uchis", "Artists": ["Tyler, The Creator", "Kali Uchis"], "Length": 200}
+    legacy = {"_id": ObjectId(), "Artist": "Daft Punk, Pharrell Williams", "Length": 250}
+
+    LibraryStats.apply_playlist(db, user_id, [tyler, legacy])
+    LibraryStats.apply_playlist(db, user_id, [tyler])
+    assert db.user_stats.find_one({"_id": user_id})["artists"] == {
+        "Tyler, The Creator": 2, "Kali Uchis": 2, "Daft Punk": 1, "Pharrell Williams": 1
+    }
+
+    # Artists that drop to zero are removed rather than kept at 0
+    LibraryStats.apply_playlist(db, user_id, [legacy], sign=-1)
+    assert db.user_stats.find_one({"_id": user_id})["artists"] == {"Tyler, The Creator": 2, "Kali Uchis": 2}
@@ -0,0 +1,119 @@
+import json
+import logging
+import queue
+from mumundo.backend.Logger import JsonFormatter, LazyQueueHandler, get_logger
+
+class Exploding:
+    def __str__(self):
+        raise AssertionError("message was formatted")
+
+def test_disabled_level_does_no_work():
+    logger = get_logger("test.gated")
+    logger.std_logger.setLevel(logging.WARNING)
+
+    # Neither formatting nor enqueueing happens below the configured level
+    logger.info("value: %s", Exploding())
+    logger.debug("value: %s", Exploding())
+
+def test_queue_handler_defers_formatting_and_emits_json():
+    log_queue = queue.SimpleQueue()
+    std_logger = logging.getLogger("test.structured")
+    std_logger.propagate = False
+    std_logger.handlers = [LazyQueueHandler(log_queue)]
+    std_logger.setLevel(logging.INFO)
+
+    get_logger("test.structured").info("Login attempt for email: %s", "a@example.com", route="/login")
+
+    record = log_queue.get_nowait()
+    assert record.msg == "Login attempt for email: %s"
+    assert record.args == ("a@example.com",)
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "Login attempt for email: a@example.com"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "test.structured"
+    assert payload["route"] == "/login"
+    assert payload["module"] == "test_logger"
+
+def test_sampling_drops_messages():
+    log_queue = queue.SimpleQueue()
+    std_logger = logging.getLogger("test.sampled")
+    std_logger.propagate = False
+    std_logger.handlers = [LazyQueueHandler(log_queue)]
+    std_logger.setLevel(logging.DEBUG)
+    logger = get_logger("test.sampled")
+
+    for _ in range(100):
+        logger.debug("hot path", sample=0.0)
+    assert log_queue.empty()
+
+    logger.debug("hot path", sample=1.0)
+    assert json.loads(JsonFormatter().format(log_queue.get_nowait()))["sample_rate"] == 1.0
+
+def test_slow_log_insert_does_not_log_again(monkeypatch):
+    import pymongo
+    from types import SimpleNamespace
+    from mumundo.backend import MongoHandler, QueryMonitor
+    from mumundo.backend.Logger import MongoLogHandler
+
+    inserts = []
+
+    # Stand-in client whose every insert is reported as slow to the client's command listeners
+    class SlowClient:
+        def __init__(self, uri=None, event_listeners=(), **options):
+            self.listeners = event_listeners
+            self.logs = SimpleNamespace(application_logs=SimpleNamespace(insert_one=self.insert_one))
+
+        def __getitem__(self, name):
+            return self.logs
+
+        def insert_one(self, document):
+            inserts.append(document)
+            event = SimpleNamespace(command_name="insert", database_name="logs", duration_micros=5_000_000)
+            for listener in self.listeners:
+                listener.succeeded(event)
+
+    monkeypatch.setattr(pymongo, "MongoClient", SlowClient)
+    monkeypatch.setattr(MongoHandler, "log_client", None)
+    monkeypatch.setattr(MongoHandler, "sync_client", None)
+
+    # Log records, including the slow-command warning, go straight to the Mongo handler
+    handler = MongoLogHandler()
+    monitor_logger = logging.getLogger(QueryMonitor.__name__)
+    monkeypatch.setattr(monitor_logger, "handlers", [handler])
+    monkeypatch.setattr(monitor_logger, "propagate", False)
+
+    # The shared clients do report the slow insert; the log handler's client must not
+    SlowClient(**MongoHandler._client_options()).insert_one({})
+    assert len(inserts) == 2
+
+    inserts.clear()
+    handler.emit(logging.LogRecord("test.slow", logging.WARNING, __file__, 1, "database is slow", (), None))
+    assert len(inserts) == 1 and inserts[0]["message"] == "database is slow"
+
+def test_unknown_level_falls_back_and_full_mongo_queue_drops(monkeypatch, tmp_path):
+    from mumundo import logging_setup
+    from mumundo.backend.Logger import DroppingQueueHandler
+    from mumundo.backend.Metrics import LOG_RECORDS_DROPPED
+
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", list(root.handlers))
+    monkeypatch.setattr(root, "level", root.level)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LOG_LEVEL", "verbose")
+    monkeypatch.setenv("LOG_LEVELS", "test.levels=LOUD")
+    monkeypatch.setenv("LOG_TO_MONGO", "0")
+
+    try:
+        logging_setup.setup_logging()
+        assert root.level == logging.INFO
+        assert logging.getLogger("test.levels").level == logging.NOTSET
+    finally:
+        logging_setup.shutdown_logging()
+
+    LOG_RECORDS_DROPPED.clear()
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(logging.LogRecord("test.drop", logging.INFO, __file__, 1, "hello", (), None))
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.collect() == {(): 2.0}
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from mumundo.backend.Metrics import Histogram, MongoCommandMetrics, MONGO_LATENCY, REGISTRY
+from mumundo.main import app
+
+def test_metrics_endpoint_reports_route_latency():
+    client = TestClient(app)
+    client.get("/")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"}' in body
+    assert 'http_requests_in_progress{method="GET"}' in body
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test histogram", ("op",), buckets=(0.1, 1.0))
+    REGISTRY.remove(histogram)
+
+    histogram.observe(0.05, "find")
+    histogram.observe(0.5, "find")
+    histogram.observe(5, "find")
+
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{op="find",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{op="find",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{op="find",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{op="find"} 3' in lines
+
+def test_mongo_listener_records_command_latency():
+    MongoCommandMetrics().succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+
+    (counts, total, count) = MONGO_LATENCY.collect()[("find", "ok")]
+    assert count >= 1
+    assert total > 0
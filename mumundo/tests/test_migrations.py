@@ -0,0 +1,70 @@
+import pytest
+from bson import ObjectId
+from mumundo.backend.jobs import migrations
+from mumundo.backend.jobs.batching import Throttle, iter_batches
+
+class Interrupted(Exception):
+    pass
+
+def test_throttle_paces_ops_and_batches_cover_range(mock_mongo):
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    throttle = Throttle(100, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        throttle.wait(50)
+    assert sleeps == [0.5, 0.5]
+
+    collection = mock_mongo.SpotifyDB.song
+    collection.insert_many([{"n": i} for i in range(7)])
+    batches = list(iter_batches(collection, {"n": {"$gte": 1}}, {"n": 1}, batch_size=3))
+    assert [[doc["n"] for doc in batch] for batch in batches] == [[1, 2, 3], [4, 5, 6]]
+
+def test_migrations_dry_run_then_resume(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    songs = db.song.insert_many([{"Title": "t", "Artist": "a", "Length": 10 * (i + 1)} for i in range(3)]).inserted_ids
+    playlists = db.playlist.insert_many([
+        {"Songs": [str(songs[0]), songs[1]], "Total_Time": 0},
+        {"Songs": [songs[2]], "Total_Time": 30, "Likes": 0, "Dislikes": 0, "Saves": 0, "IsPublic": True, "trending_score": 1.0},
+        {"Songs": [str(songs[2]), "not-an-id"], "Total_Time": 5},
+    ]).inserted_ids
+    fast = Throttle(0)
+
+    dry = migrations.run_migration(db, migrations.MIGRATIONS["playlist_total_time"], dry_run=True, throttle=fast)
+    assert dry["ops"] == 2 and dry["modified"] == 0
+    assert migrations.load_progress(db, "playlist_total_time") is None
+    assert db.playlist.find_one({"_id": playlists[0]})["Total_Time"] == 0
+
+    def crash(state):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        migrations.run_migration(db, migrations.MIGRATIONS["playlist_total_time"], batch_size=2, throttle=fast, progress=crash)
+    assert migrations.load_progress(db, "playlist_total_time")["last_id"] == playlists[1]
+
+    state = migrations.run_migration(db, migrations.MIGRATIONS["playlist_total_time"], batch_size=2, throttle=fast)
+    assert state["done"] and state["scanned"] == 3 and state["modified"] == 2
+    assert [p["Total_Time"] for p in db.playlist.find()] == [30, 30, 30]
+
+    assert migrations.main(["playlist_song_ids", "playlist_track_count", "playlist_defaults", "song_defaults", "--ops-per-second", "0"]) == 0
+    first = db.playlist.find_one({"_id": playlists[0]})
+    assert first["Songs"] == songs[:2] and first["Likes"] == 0 and "trending_score" in first
+    assert first["track_count"] == 2 and first["version"] >= 2 and first["created_at"] == playlists[0].generation_time.replace(tzinfo=None)
+    assert db.playlist.find_one({"_id": playlists[2]})["Songs"] == [songs[2], "not-an-id"]
+    assert db.playlist.find_one({"_id": playlists[1]})["IsPublic"] is True
+    assert db.song.find_one({"_id": songs[0]})["Album"] == ""
+
+def test_total_time_skips_playlist_edited_since_read(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    song = db.song.insert_one({"Title": "t", "Artist": "a", "Length": 40}).inserted_id
+    playlist_id = db.playlist.insert_one({"Songs": [song], "Total_Time": 0}).inserted_id
+
+    ops = migrations.recompute_total_time(db, list(db.playlist.find()))
+    db.playlist.update_one({"_id": playlist_id}, {"$set": {"Songs": []}})
+
+    assert db.playlist.bulk_write(ops).modified_count == 0
+    assert db.playlist.find_one({"_id": playlist_id})["Total_Time"] == 0
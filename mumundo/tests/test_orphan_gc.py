@@ -0,0 +1,33 @@
+from bson import ObjectId
+from mumundo.backend import OrphanGC
+from mumundo.backend.Metrics import ORPHANS_REMOVED
+from mumundo.backend.jobs.batching import Throttle
+
+def test_sweep_removes_orphans_in_batches(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    kept = str(db.playlist.insert_one({"Title": "kept"}).inserted_id)
+    gone = [str(ObjectId()) for _ in range(3)]
+
+    db.playlist_ratings.insert_many(
+        [{"playlist_id": kept, "type": "like"}]
+        + [{"playlist_id": playlist_id, "type": "like"} for playlist_id in gone for _ in range(2)]
+        + [{"playlist_id": "not-an-id", "type": "dislike"}]
+    )
+    db.playlist_reports.insert_many([{"playlist_id": kept}, {"playlist_id": gone[0]}])
+    user = db.users.insert_one({"playlists": [kept, gone[1], gone[2], gone[1]]}).inserted_id
+    db.users.insert_one({"playlists": []})
+
+    ORPHANS_REMOVED.clear()
+    fast = Throttle(0)
+    dry = OrphanGC.sweep(db, batch_size=2, throttle=fast, dry_run=True)
+    assert db.playlist_ratings.count_documents({}) == 8
+
+    summary = OrphanGC.sweep(db, batch_size=2, throttle=fast)
+
+    expected = {"playlist_ratings": 7, "playlist_reports": 1, "users.playlists": 3}
+    assert dry == {**expected, "dry_run": True} and summary == {**expected, "dry_run": False}
+    assert [r["playlist_id"] for r in db.playlist_ratings.find()] == [kept]
+    assert [r["playlist_id"] for r in db.playlist_reports.find()] == [kept]
+    assert db.users.find_one({"_id": user})["playlists"] == [kept]
+    assert ORPHANS_REMOVED.collect()[("playlist_ratings",)] == 7
+    assert OrphanGC.sweep(db, throttle=fast) == {"playlist_ratings": 0, "playlist_reports": 0, "users.playlists": 0, "dry_run": False}
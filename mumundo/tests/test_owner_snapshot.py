@@ -0,0 +1,50 @@
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import OwnerSnapshot
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.backend.models.user import User
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_profile_update_fans_out_and_checker_repairs(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    users = mock_mongo.MainDB
+
+    user_id = users.users.insert_one(
+        {"email": "a@example.com", "username": "before", "hashed_password": "x", "profile_picture": "default.jpg"}
+    ).inserted_id
+    user = User(id=user_id, email="a@example.com", username="before", hashed_password="x")
+
+    snapshot = OwnerSnapshot.owner_snapshot(user)
+    playlist_ids = db.playlist.insert_many([
+        {"Title": f"p{i}", "User": str(user_id), "Owner": snapshot, "Songs": [], "IsPublic": True}
+        for i in range(3)
+    ]).inserted_ids
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.patch("/api/user/profile", data={"username": "after"})
+            detail = await client.get(f"/api/playlists/{playlist_ids[0]}")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert detail.json()["user"] == {"id": str(user_id), "username": "after", "profilePicture": "default.jpg"}
+    assert db.playlist.count_documents({"Owner.username": "after"}) == 3
+
+    # A missed fan-out and a legacy playlist without a snapshot are both repaired
+    db.playlist.update_one({"_id": playlist_ids[1]}, {"$set": {"Owner": {"username": "stale", "profile_picture": "default.jpg"}}})
+    db.playlist.insert_one({"Title": "legacy", "User": str(user_id), "Songs": []})
+
+    assert OwnerSnapshot.check_consistency(db, users, repair=False)["playlists_stale"] == 2
+    assert OwnerSnapshot.check_consistency(db, users)["playlists_stale"] == 2
+    assert db.playlist.count_documents({"Owner.username": "after"}) == 4
+    assert OwnerSnapshot.check_consistency(db, users)["playlists_stale"] == 0
+
+def test_null_profile_picture_falls_back_to_default():
+    snapshot = OwnerSnapshot.owner_snapshot({"username": "u", "profile_picture": None})
+    assert snapshot == {"username": "u", "profile_picture": "default.jpg"}
+    info = OwnerSnapshot.owner_info({"User": "1", "Owner": {"username": "u", "profile_picture": None}})
+    assert info["profilePicture"] == "default.jpg"
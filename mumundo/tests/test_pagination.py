@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_user_playlists_keyset_pages(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="u", profile_picture="default.jpg", is_admin=False)
+    start = datetime(2025, 1, 1)
+    titles = ["delta", "alpha", "echo", "charlie", "bravo"]
+    db.playlist.insert_many([
+        {"Title": title, "User": str(user.id), "created_at": start + timedelta(days=i), "track_count": i, "Songs": []}
+        for i, title in enumerate(titles)
+    ])
+    # Imported before track_count existed, with two playlists sharing a timestamp
+    db.playlist.insert_one({"Title": "foxtrot", "User": str(user.id), "created_at": start, "Songs": [ObjectId()] * 3})
+    db.playlist.insert_one({"Title": "other", "User": str(ObjectId()), "created_at": start})
+
+    async def walk(client, **params):
+        pages, cursor = [], None
+        while True:
+            response = await client.get("/api/playlists/user", params={**params, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            pages.append(response.json())
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                return pages
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            newest = await walk(client, limit=2)
+            by_name = await walk(client, sort="name", limit=4)
+            bad = await client.get("/api/playlists/user", params={"sort": "name", "cursor": "garbage"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [len(page) for page in newest] == [2, 2, 2]
+    assert [p["name"] for page in newest for p in page][:4] == ["bravo", "charlie", "echo", "alpha"]
+    assert {p["name"] for p in newest[-1]} == {"delta", "foxtrot"}
+    assert [p["name"] for page in by_name for p in page] == ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+    assert {p["name"]: p["trackCount"] for page in by_name for p in page}["foxtrot"] == 3
+    assert bad.status_code == 400
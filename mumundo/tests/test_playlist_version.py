@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.backend.SongCache import song_cache
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_detail_and_ratings_answer_304_until_a_mutation(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="rater", profile_picture="default.jpg", is_admin=False)
+    song_id = db.song.insert_one({"Title": "t", "Artist": "a", "Album": "b", "Length": 60}).inserted_id
+    playlist_id = str(db.playlist.insert_one({
+        "Title": "Mix", "User": str(ObjectId()), "Songs": [song_id], "IsPublic": True, "Likes": 0, "Dislikes": 0, "Saves": 0
+    }).inserted_id)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get(f"/api/playlists/{playlist_id}")
+            ratings = await client.get(f"/api/playlists/{playlist_id}/ratings")
+            assert first.status_code == 200 and first.json()["tracks"]
+            assert first.headers["etag"] != ratings.headers["etag"]
+
+            get_many = song_cache.get_many_async
+            async def no_song_reads(song_ids):
+                raise AssertionError("revalidation loaded the tracks")
+            monkeypatch.setattr(song_cache, "get_many_async", no_song_reads)
+
+            cached = await client.get(f"/api/playlists/{playlist_id}", headers={"If-None-Match": first.headers["etag"]})
+            assert cached.status_code == 304 and cached.headers["etag"] == first.headers["etag"]
+            cached = await client.get(f"/api/playlists/{playlist_id}/ratings", headers={"If-None-Match": ratings.headers["etag"]})
+            assert cached.status_code == 304
+
+            assert (await client.post(f"/api/playlists/{playlist_id}/ratings", json={"type": "like"})).status_code == 200
+            fresh = await client.get(f"/api/playlists/{playlist_id}/ratings", headers={"If-None-Match": ratings.headers["etag"]})
+            monkeypatch.setattr(song_cache, "get_many_async", get_many)
+            detail = await client.get(f"/api/playlists/{playlist_id}", headers={"If-None-Match": first.headers["etag"]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert fresh.status_code == 200 and fresh.json()["likes"] == 1 and fresh.json()["user_rating"] == "like"
+    assert fresh.headers["etag"] != ratings.headers["etag"]
+    assert detail.status_code == 200 and detail.json()["likes"] == 1
+
+@pytest.mark.asyncio
+async def test_rating_is_removed_before_the_version_changes(mock_mongo, monkeypatch):
+    import mongomock_motor
+    db = mock_mongo.SpotifyDB
+    user = SimpleNamespace(id=ObjectId(), username="rater", profile_picture="default.jpg", is_admin=False)
+    playlist_id = str(db.playlist.insert_one({"Title": "Mix", "Likes": 1, "Dislikes": 0, "version": 3}).inserted_id)
+    db.playlist_ratings.insert_one({"playlist_id": playlist_id, "user_id": str(user.id), "type": "like"})
+
+    # What a concurrent get_ratings would see at the moment the version is bumped
+    ratings_at_bump = []
+    update_one = mongomock_motor.AsyncMongoMockCollection.update_one
+    async def recording_update_one(self, filter, update, *args, **kwargs):
+        if self.name == "playlist" and "version" in update.get("$inc", {}):
+            ratings_at_bump.append(db.playlist_ratings.count_documents({"playlist_id": playlist_id}))
+        return await update_one(self, filter, update, *args, **kwargs)
+    monkeypatch.setattr(mongomock_motor.AsyncMongoMockCollection, "update_one", recording_update_one)
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            removed = await client.delete(f"/api/playlists/{playlist_id}/ratings")
+            ratings = await client.get(f"/api/playlists/{playlist_id}/ratings")
+            again = await client.delete(f"/api/playlists/{playlist_id}/ratings")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert removed.status_code == 200 and ratings_at_bump == [0]
+    assert ratings.json() == {"likes": 0, "dislikes": 0, "user_rating": None}
+    assert db.playlist.find_one({"_id": ObjectId(playlist_id)})["version"] == 4
+    assert again.status_code == 404
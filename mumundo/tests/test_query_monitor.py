@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mumundo.backend import QueryMonitor
+from mumundo.backend.QueryMonitor import (
+    QueryAccountingListener,
+    QueryAccountingMiddleware,
+    QueryBudgetExceeded,
+    query_budget,
+)
+
+listener = QueryAccountingListener()
+
+def fake_command(name="find", micros=2000):
+    return SimpleNamespace(command_name=name, database_name="SpotifyDB", duration_micros=micros)
+
+def make_app(queries):
+    app = FastAPI()
+    app.add_middleware(QueryAccountingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        for _ in range(queries):
+            listener.succeeded(fake_command())
+        return {"id": item_id}
+
+    return app
+
+def test_debug_headers_report_query_count(monkeypatch):
+    monkeypatch.setattr(QueryMonitor, "DEBUG", True)
+
+    response = TestClient(make_app(queries=3)).get("/items/1")
+
+    assert response.headers["x-db-query-count"] == "3"
+    assert float(response.headers["x-db-time-ms"]) == pytest.approx(6.0)
+
+def test_strict_mode_fails_route_over_budget(monkeypatch):
+    monkeypatch.setattr(QueryMonitor, "STRICT", True)
+    monkeypatch.setitem(QueryMonitor.ROUTE_BUDGETS, "/items/{item_id}", 2)
+
+    with pytest.raises(QueryBudgetExceeded):
+        TestClient(make_app(queries=5)).get("/items/1")
+
+def test_query_budget_context_manager():
+    with query_budget(2):
+        listener.succeeded(fake_command())
+
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(1):
+            listener.succeeded(fake_command())
+            listener.succeeded(fake_command("update"))
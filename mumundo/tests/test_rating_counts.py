@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import PlaylistVersion, RatingCounts
+from mumundo.backend.CoreAuth import get_current_user
+from mumundo.main import app
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_drifted_counters(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    monkeypatch.setattr("mumundo.backend.jobs.batching.OPS_PER_SECOND", 0)
+    monkeypatch.setattr(RatingCounts, "CONFIRM_DELAY_SECONDS", 0)
+
+    drifted = db.playlist.insert_one({"Title": "a", "Likes": 5, "Dislikes": -1, "Saves": 0, "trending_score": 9.0}).inserted_id
+    correct = db.playlist.insert_one({"Title": "b", "Likes": 1, "Dislikes": 0}).inserted_id
+    unrated = db.playlist.insert_one({"Title": "c", "Likes": 2}).inserted_id
+    db.playlist_ratings.insert_many(
+        [{"playlist_id": str(drifted), "user_id": str(ObjectId()), "type": vote} for vote in ("like", "like", "dislike")]
+        + [{"playlist_id": str(correct), "user_id": str(ObjectId()), "type": "like"}]
+    )
+
+    # Admin routes check is_admin against the stored user
+    admin_id = mock_mongo.MainDB.users.insert_one(
+        {"email": "admin@example.com", "username": "admin", "hashed_password": "x", "is_admin": True}
+    ).inserted_id
+    admin = SimpleNamespace(id=admin_id, email="admin@example.com", is_admin=True)
+    app.dependency_overrides[get_current_user] = lambda: admin
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            # Both run as background tasks, which finish before the test client returns
+            dry = await client.post("/api/admin/ratings/reconcile?dry_run=true")
+            assert db.playlist.find_one({"_id": drifted})["Likes"] == 5
+            started = await client.post("/api/admin/ratings/reconcile")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert dry.status_code == 202 and dry.json()["dry_run"]
+    assert started.status_code == 202
+    fixed = db.playlist.find_one({"_id": drifted})
+    assert (fixed["Likes"], fixed["Dislikes"]) == (2, 1) and fixed["trending_score"] != 9.0
+    assert (db.playlist.find_one({"_id": unrated})["Likes"], db.playlist.find_one({"_id": unrated})["Dislikes"]) == (0, 0)
+    assert RatingCounts.reconcile(db)["playlists_drifted"] == 0
+
+    db.playlist.update_one({"_id": correct}, {"$set": {"Likes": 4}})
+    assert RatingCounts.reconcile(db, repair=False) == {
+        "playlists_scanned": 3, "playlists_drifted": 1, "likes_drift": 3, "dislikes_drift": 0,
+        "repaired": 0, "skipped": 0, "dry_run": True
+    }
+
+def test_reconcile_leaves_a_vote_in_flight_to_its_route(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    monkeypatch.setattr("mumundo.backend.jobs.batching.OPS_PER_SECOND", 0)
+    monkeypatch.setattr(RatingCounts, "CONFIRM_DELAY_SECONDS", 0)
+    playlist_id = db.playlist.insert_one({"Title": "a", "Likes": 1, "Dislikes": 0, "version": 1}).inserted_id
+    db.playlist_ratings.insert_one({"playlist_id": str(playlist_id), "user_id": "u1", "type": "like"})
+
+    # rate_playlist inserts its vote while reconcile is scanning and $incs after the first count
+    count_votes = RatingCounts.count_votes
+    calls = []
+    def racing_count_votes(db, playlist_ids):
+        calls.append(playlist_ids)
+        if len(calls) == 1:
+            db.playlist_ratings.insert_one({"playlist_id": str(playlist_id), "user_id": "u2", "type": "like"})
+        elif len(calls) == 2:
+            db.playlist.update_one({"_id": playlist_id}, PlaylistVersion.bump({"$inc": {"Likes": 1}}))
+        return count_votes(db, playlist_ids)
+    monkeypatch.setattr(RatingCounts, "count_votes", racing_count_votes)
+
+    report = RatingCounts.reconcile(db)
+
+    assert report["repaired"] == 0 and report["skipped"] == 1
+    assert db.playlist.find_one({"_id": playlist_id})["Likes"] == 2
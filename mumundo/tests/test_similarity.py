@@ -0,0 +1,80 @@
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import Similarity
+from mumundo.main import app
+
+def test_signature_similarity_tracks_jaccard():
+    songs = [ObjectId() for _ in range(200)]
+    a = Similarity.minhash_signature(songs[:150])
+    b = Similarity.minhash_signature(songs[50:200])
+
+    # True Jaccard is 100 / 200 = 0.5
+    assert abs(Similarity.estimate_similarity(a, b) - 0.5) < 0.2
+    assert Similarity.estimate_similarity(a, a) == 1.0
+
+@pytest.mark.asyncio
+async def test_similar_endpoint_returns_overlapping_public_playlists(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    shared = [ObjectId() for _ in range(40)]
+
+    def add_playlist(title, songs, is_public=True):
+        playlist_id = db.playlist.insert_one(
+            {"Title": title, "User": str(ObjectId()), "Songs": songs, "IsPublic": is_public, "image_url": ""}
+        ).inserted_id
+        Similarity.index_playlist(db, playlist_id, songs, is_public)
+        return playlist_id
+
+    source = add_playlist("Source", shared + [ObjectId() for _ in range(5)])
+    near = add_playlist("Near", shared + [ObjectId() for _ in range(5)])
+    add_playlist("Private twin", shared, is_public=False)
+    add_playlist("Unrelated", [ObjectId() for _ in range(45)])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(f"/api/playlists/{source}/similar")
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["id"] for r in results] == [str(near)]
+    assert results[0]["similarity"] > 0.6
+    assert results[0]["user"]["username"] == "Unknown User"
+
+    # Visibility changes are reflected immediately
+    Similarity.set_visibility(db, near, False)
+    assert Similarity.find_similar(db, source) == []
+
+@pytest.mark.asyncio
+async def test_admin_delete_of_reported_playlist_cleans_up_like_owner_delete(mock_mongo):
+    from types import SimpleNamespace
+    from mumundo.backend import LibraryStats
+    from mumundo.backend.CoreAuth import get_current_user
+
+    db = mock_mongo.SpotifyDB
+    owner_id = str(ObjectId())
+    songs = [{"_id": ObjectId(), "Artist": "A", "Length": 100} for _ in range(4)]
+    db.song.insert_many(songs)
+    playlist_id = db.playlist.insert_one(
+        {"Title": "Reported", "User": owner_id, "Songs": [song["_id"] for song in songs], "IsPublic": True}
+    ).inserted_id
+    Similarity.index_playlist(db, playlist_id, [song["_id"] for song in songs], True)
+    LibraryStats.apply_playlist(db, owner_id, songs)
+    report_id = mock_mongo.AdminDB.playlist_reports.insert_one(
+        {"playlist_id": str(playlist_id), "user_id": str(ObjectId()), "reason": "Spam", "status": "pending"}
+    ).inserted_id
+
+    admin_id = mock_mongo.MainDB.users.insert_one(
+        {"email": "admin@example.com", "username": "admin", "hashed_password": "x", "is_admin": True}
+    ).inserted_id
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=admin_id, email="admin@example.com", is_admin=True)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(f"/api/admin/reports/{report_id}/delete")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert db.playlist.find_one({"_id": playlist_id}) is None
+    assert db.playlist_lsh.find_one({"_id": playlist_id}) is None
+    stats = db.user_stats.find_one({"_id": owner_id})
+    assert (stats["playlist_count"], stats["track_count"], stats["artists"]) == (0, 0, {})
+    assert mock_mongo.AdminDB.playlist_reports.find_one({"_id": report_id})["status"] == "reviewed"
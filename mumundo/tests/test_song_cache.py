@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+from bson import ObjectId
+from mumundo.backend.SongCache import SongCache
+
+def test_get_many_fetches_only_misses_and_evicts_lru(mock_mongo):
+    songs = mock_mongo.SpotifyDB.song
+    ids = songs.insert_many(
+        [{"Title": f"Song {i}", "Artist": "A", "Album": "", "Length": 100 + i} for i in range(5)]
+    ).inserted_ids
+
+    queries = []
+    def find(query, projection):
+        queries.append(query["_id"]["$in"])
+        return songs.find(query, projection)
+
+    cache = SongCache(SimpleNamespace(song=SimpleNamespace(find=find)), max_entries=3)
+
+    first = cache.get_many(ids[:3])
+    assert [first[i]["Title"] for i in ids[:3]] == ["Song 0", "Song 1", "Song 2"]
+    assert "image_url" not in first[ids[0]]
+
+    # Hits come from memory (even though the stored title changed); the miss is one $in
+    songs.update_one({"_id": ids[0]}, {"$set": {"Title": "Renamed"}})
+    second = cache.get_many([ids[0], ids[2], ids[3]])
+    assert second[ids[0]]["Title"] == "Song 0"
+    assert queries[-1] == [ids[3]]
+
+    # ids[1] was least recently used and got evicted
+    cache.get_many([ids[1]])
+    assert queries[-1] == [ids[1]]
+    assert len(cache) == 3
+
+    # Invalidation drops the stale entry
+    cache.invalidate(ids[0])
+    assert cache.get(ids[0])["Title"] == "Renamed"
+    assert cache.get(ObjectId()) is None
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from mumundo.backend import SpotifyClient
+from mumundo.backend.Metrics import SPOTIFY_RETRIES
+
+@pytest.mark.asyncio
+async def test_429_honors_retry_after_then_gives_up_with_503(fake_spotify):
+    fake_spotify.add_playlist("p1", 3)
+    sp = SpotifyClient.get_spotify_client()
+    scheduler = SpotifyClient.SpotifyScheduler(rate=1000, burst=10, max_concurrency=2, max_retries=2)
+    retried_before = SPOTIFY_RETRIES.collect().get(("429",), 0)
+
+    fake_spotify.throttle(2, retry_after=0)
+    playlist = await scheduler.call("playlist", sp.playlist, "p1")
+    assert playlist["name"] == "Playlist p1"
+    assert fake_spotify.rate_limited == 2
+    assert SPOTIFY_RETRIES.collect()[("429",)] - retried_before == 2
+
+    fake_spotify.throttle(10, retry_after=0)
+    with pytest.raises(HTTPException) as exc:
+        await scheduler.call("playlist", sp.playlist, "p1")
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_queued_background_calls():
+    scheduler = SpotifyClient.SpotifyScheduler(rate=50, burst=1, max_concurrency=1)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.call(name, order.append, name, priority=priority)
+
+    background = [asyncio.create_task(call(f"page{i}", SpotifyClient.BACKGROUND)) for i in range(3)]
+    await asyncio.sleep(0)
+    search = asyncio.create_task(call("search", SpotifyClient.INTERACTIVE))
+    await asyncio.gather(search, *background)
+
+    assert order[0] == "page0"
+    assert order[1] == "search"
@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+import pytest
+
+IMPORT_BUDGET_MS = 5000
+
+def test_import_is_lazy_and_reports_timings():
+    script = (
+        "import json, sys\n"
+        "import mumundo.main\n"
+        "from mumundo.backend import MongoHandler\n"
+        "from mumundo.backend.Startup import startup_timer\n"
+        "print(json.dumps({\n"
+        "    'report': startup_timer.report(),\n"
+        "    'spotipy': 'spotipy' in sys.modules,\n"
+        "    'clients': [MongoHandler.client is not None, MongoHandler.sync_client is not None],\n"
+        "}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result["spotipy"] is False
+    assert result["clients"] == [False, False]
+
+    imports = result["report"]["imports_ms"]
+    assert "mumundo.backend.routes.spotify_integration" in imports
+    assert result["report"]["phases_ms"]["imports"] < IMPORT_BUDGET_MS
+
+@pytest.mark.asyncio
+async def test_startup_skips_dummy_user_by_default(mock_mongo, monkeypatch):
+    from mumundo import main
+    from mumundo.backend.models.user import User
+
+    monkeypatch.setattr(main.startup_timer, "phases", {})
+    monkeypatch.setattr(main, "setup_logging", lambda: None)
+
+    await main.startup_event()
+    await main.shutdown_event()
+
+    assert "init_db" in main.startup_timer.phases
+    assert "seed_dummy_user" not in main.startup_timer.phases
+    assert await User.find_one(User.email == "dummy@example.com") is None
@@ -0,0 +1,90 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from mumundo.backend import MongoHandler, SpotifyClient
+from mumundo.backend.Metrics import SPOTIFY_CIRCUIT_REJECTED, SPOTIFY_TIMEOUTS
+
+@pytest.mark.asyncio
+async def test_slow_spotify_times_out_then_circuit_fails_fast_until_probe(fake_spotify, monkeypatch):
+    breaker = SpotifyClient.CircuitBreaker(failure_threshold=2, reset_seconds=0.3)
+    monkeypatch.setattr(SpotifyClient, "scheduler", SpotifyClient.SpotifyScheduler(rate=1000, burst=100, breaker=breaker))
+    SPOTIFY_TIMEOUTS.clear()
+    SPOTIFY_CIRCUIT_REJECTED.clear()
+
+    sp = SpotifyClient.get_spotify_client()
+    fake_spotify.add_playlist("slow", 3)
+    fake_spotify.delay(1.0)
+
+    started = time.monotonic()
+    for _ in range(2):
+        with pytest.raises(HTTPException) as timed_out:
+            await SpotifyClient.spotify_call("playlist", sp.playlist, "slow", deadline=0.1)
+        assert timed_out.value.status_code == 504
+    assert breaker.state == SpotifyClient.CircuitBreaker.OPEN
+
+    # Open: rejected without reaching Spotify
+    sent = fake_spotify.requests
+    with pytest.raises(HTTPException) as rejected:
+        await SpotifyClient.spotify_call("playlist", sp.playlist, "slow", deadline=0.1)
+    assert rejected.value.status_code == 503 and rejected.value.headers["Retry-After"] == "1"
+    assert fake_spotify.requests == sent
+    assert time.monotonic() - started < 0.9
+
+    # Once the reset window passes a probe goes through and closes the circuit
+    fake_spotify.delay(0)
+    await asyncio.sleep(0.35)
+    playlist = await SpotifyClient.spotify_call("playlist", sp.playlist, "slow", deadline=2)
+    assert playlist["id"] == "slow" and breaker.state == SpotifyClient.CircuitBreaker.CLOSED
+
+    assert SPOTIFY_TIMEOUTS.collect() == {("playlist", "upstream"): 2.0}
+    assert SPOTIFY_CIRCUIT_REJECTED.collect() == {(): 1.0}
+
+@pytest.mark.asyncio
+async def test_queueing_past_the_deadline_does_not_open_the_circuit(fake_spotify, monkeypatch):
+    breaker = SpotifyClient.CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    monkeypatch.setattr(SpotifyClient, "scheduler", SpotifyClient.SpotifyScheduler(rate=1, burst=1, breaker=breaker))
+    SPOTIFY_TIMEOUTS.clear()
+    sp = SpotifyClient.get_spotify_client()
+    sent = fake_spotify.requests
+
+    # One token: the first lookup goes out, the other two time out waiting for the limiter
+    results = await asyncio.gather(*(
+        SpotifyClient.spotify_call("track", sp.track, f"t{i}", priority=SpotifyClient.INTERACTIVE, deadline=0.2)
+        for i in range(3)
+    ), return_exceptions=True)
+
+    assert results[0]["id"] == "t0"
+    assert [error.status_code for error in results[1:]] == [504, 504]
+    assert SPOTIFY_TIMEOUTS.collect() == {("track", "queue"): 2.0}
+    assert breaker.state == SpotifyClient.CircuitBreaker.CLOSED
+    # The token request plus the one lookup that got a slot
+    assert fake_spotify.requests - sent == 2
+
+def test_mongo_clients_get_timeouts(monkeypatch):
+    options = MongoHandler._client_options()
+    assert options["serverSelectionTimeoutMS"] == MongoHandler.SERVER_SELECTION_TIMEOUT_MS
+    assert options["socketTimeoutMS"] == MongoHandler.SOCKET_TIMEOUT_MS
+
+    monkeypatch.setattr(MongoHandler, "SOCKET_TIMEOUT_MS", 0)
+    assert "socketTimeoutMS" not in MongoHandler._client_options()
+
+def test_all_mongo_clients_use_the_same_uri(monkeypatch):
+    import motor.motor_asyncio
+    import pymongo
+
+    uris = []
+    def client(uri, **options):
+        uris.append(uri)
+        return object()
+
+    monkeypatch.setattr(pymongo, "MongoClient", client)
+    monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", client)
+    monkeypatch.delenv("MONGODB_URI", raising=False)
+    for name in ("client", "sync_client", "log_client"):
+        monkeypatch.setattr(MongoHandler, name, None)
+
+    MongoHandler.get_client()
+    MongoHandler.get_sync_client()
+    MongoHandler.get_log_client()
+    assert uris == [MongoHandler.full_uri] * 3
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from bson import ObjectId
+from mumundo.backend import MongoHandler, Trending
+from mumundo.main import app
+
+def test_score_blends_votes_with_time_decay():
+    now = datetime(2025, 6, 1)
+    half_life = timedelta(hours=Trending.HALF_LIFE_HOURS)
+
+    fresh = Trending.trending_score(3, 0, 0, now)
+    older_same_votes = Trending.trending_score(3, 0, 0, now - half_life)
+    older_more_votes = Trending.trending_score(15, 0, 0, now - half_life)
+
+    assert fresh > older_same_votes
+    # Quadrupled votes outweigh one half-life of age
+    assert older_more_votes > fresh
+
+@pytest.mark.asyncio
+async def test_trending_feed_is_ordered_by_score(mock_mongo):
+    db = mock_mongo.SpotifyDB
+    now = datetime.utcnow()
+
+    def add_playlist(title, likes, age_hours, is_public=True):
+        return db.playlist.insert_one({
+            "Title": title, "User": str(ObjectId()), "Songs": [], "IsPublic": is_public, "image_url": "",
+            "Likes": likes, "Dislikes": 0, "Saves": 0, "created_at": now - timedelta(hours=age_hours),
+        }).inserted_id
+
+    add_playlist("Old hit", likes=50, age_hours=24 * 30)
+    add_playlist("New and liked", likes=10, age_hours=1)
+    add_playlist("New", likes=0, age_hours=2)
+    add_playlist("Private", likes=100, age_hours=1, is_public=False)
+
+    assert Trending.rescore_all(db) == {"scanned": 4, "updated": 4}
+    assert Trending.rescore_all(db) == {"scanned": 4, "updated": 0}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/playlists/public", params={"sort": "trending", "limit": 2})
+
+    assert response.status_code == 200
+    assert [p["name"] for p in response.json()] == ["New and liked", "New"]
+
+@pytest.mark.asyncio
+async def test_rescore_does_not_write_a_score_from_stale_counters(mock_mongo, monkeypatch):
+    db = mock_mongo.SpotifyDB
+    playlist_id = db.playlist.insert_one({"Title": "a", "Likes": 1, "Dislikes": 0, "Saves": 0, "created_at": datetime(2025, 6, 1)}).inserted_id
+
+    # Another rating lands between this rescore's read and its write
+    score_playlist = Trending.score_playlist
+    def racing_score(playlist):
+        if playlist["Likes"] == 1:
+            db.playlist.update_one({"_id": playlist_id}, {"$inc": {"Likes": 1}})
+        return score_playlist(playlist)
+    monkeypatch.setattr(Trending, "score_playlist", racing_score)
+
+    await Trending.rescore_playlist_async(MongoHandler.client["SpotifyDB"], playlist_id)
+
+    stored = db.playlist.find_one({"_id": playlist_id})
+    assert stored["trending_score"] == score_playlist(stored)
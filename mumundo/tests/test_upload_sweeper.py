@@ -0,0 +1,24 @@
+import os
+import time
+from mumundo.backend import UploadSweeper
+from mumundo.backend.jobs import sweep_uploads
+
+def test_sweep_removes_old_unreferenced_uploads(mock_mongo, tmp_path, capsys):
+    users = mock_mongo.MainDB.users
+    users.insert_many([{"profile_picture": "current.png"}, {"profile_picture": "default.jpg"}, {"username": "none"}])
+
+    old = time.time() - 3 * 86400
+    for name, size in (("current.png", 10), ("old.png", 300), ("older.jpg", 700), ("fresh.png", 50), ("default.jpg", 5)):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        if name != "fresh.png":
+            os.utime(path, (old, old))
+    (tmp_path / "subdir").mkdir()
+
+    dry = UploadSweeper.sweep(mock_mongo.MainDB, str(tmp_path), grace_seconds=86400, dry_run=True)
+    assert dry["files_removed"] == 2 and (tmp_path / "old.png").exists()
+
+    assert sweep_uploads.main(["--dir", str(tmp_path), "--grace-hours", "24"]) == 0
+    assert sorted(os.listdir(tmp_path)) == ["current.png", "default.jpg", "fresh.png", "subdir"]
+    assert "Removed 2 of 5 file(s)" in capsys.readouterr().out
+    assert UploadSweeper.sweep(mock_mongo.MainDB, str(tmp_path), grace_seconds=0)["bytes_reclaimed"] == 50
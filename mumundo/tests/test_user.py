@@ -1,4 +1,5 @@
 import pytest
+from bson import ObjectId
 from mumundo.backend.models.user import User
 
 @pytest.mark.asyncio
@@ -13,3 +14,52 @@ async def test_create_user(test_db):
     found = await User.find_one(User.email == "test@example.com")
     assert found is not None
     assert found.username == "testuser"
+
+@pytest.mark.asyncio
+async def test_cached_principal_is_read_only_and_admin_revocation_is_immediate(mock_mongo):
+    import httpx
+    from mumundo.backend.CoreAuth import create_access_token, get_principal
+    from mumundo.main import app
+
+    user = User(email="admin@example.com", username="admin", hashed_password="secret-hash", is_admin=True)
+    await user.insert()
+    token = create_access_token({"sub": user.email})
+
+    first = await get_principal(user.email)
+    cached = await get_principal(user.email)
+    assert cached == first and cached.is_admin
+    assert not hasattr(cached, "hashed_password") and not hasattr(cached, "save")
+    with pytest.raises(Exception):
+        cached.is_admin = False
+
+    # Revoked in the database while the principal is still cached
+    mock_mongo.MainDB.users.update_one({"_id": user.id}, {"$set": {"is_admin": False}})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/admin/ratings/reconcile?dry_run=true", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+    assert not (await get_principal(user.email)).is_admin
+    assert mock_mongo.MainDB.users.find_one({"_id": user.id})["hashed_password"] == "secret-hash"
+
+@pytest.mark.asyncio
+async def test_revoked_admin_cannot_delete_or_export_private_playlists(mock_mongo):
+    import httpx
+    from mumundo.backend.CoreAuth import create_access_token, get_principal
+    from mumundo.main import app
+
+    user = User(email="mod@example.com", username="mod", hashed_password="secret-hash", is_admin=True)
+    await user.insert()
+    token = create_access_token({"sub": user.email})
+    headers = {"Authorization": f"Bearer {token}"}
+    playlist_id = mock_mongo.SpotifyDB.playlist.insert_one(
+        {"Title": "Private", "User": str(ObjectId()), "Songs": [], "IsPublic": False}
+    ).inserted_id
+
+    assert (await get_principal(user.email)).is_admin
+    mock_mongo.MainDB.users.update_one({"_id": user.id}, {"$set": {"is_admin": False}})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        exported = await client.get(f"/api/playlists/{playlist_id}/export", headers=headers)
+        deleted = await client.delete(f"/api/playlists/{playlist_id}", headers=headers)
+
+    assert exported.status_code == 403
+    assert deleted.status_code == 403
+    assert mock_mongo.SpotifyDB.playlist.find_one({"_id": playlist_id}) is not None